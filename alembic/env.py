@@ -13,9 +13,14 @@ from app.db.models import (
     Account,
     Transfer,
     FxRate,
+    FxRateLatest,
+    FxRateDaily,
+    Currency,
     LedgerEntry,
+    LedgerCheckpoint,
     Audit,
     IdempotencyKey,
+    OutboxMessage,
 )
 
 config = context.config
@@ -1,14 +1,29 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.schemas.account import AccountCreate, AccountResponse, AccountOperationRequest
+from app.schemas.account import (
+    AccountCreate,
+    AccountResponse,
+    AccountOperationRequest,
+    BalanceAtBatchRequest,
+    BalanceAtResult,
+)
 from app.schemas.common import ResponseModel
 from app.services.account_service import AccountService
 from app.services.audit_service import AuditService
+from app.services.ledger_service import LedgerService
 from app.core.dependencies import get_current_active_user
-from app.db.models.user import User
+from app.db.models.user import User, UserRole
+from app.utils.http_headers import accepts_encoding
 from app.utils.localization import localization
+from app.utils.statement_output import (
+    STATEMENT_MEDIA_TYPES,
+    gzip_chunks,
+    iter_statement_chunks,
+)
 
 router = APIRouter(prefix="/accounts", tags=["Accounts"])
 
@@ -62,6 +77,57 @@ async def get_accounts(
     )
 
 
+def _no_ledger_history(account_id: int, at: datetime) -> str:
+    return f"No ledger history for account {account_id} as of {at.isoformat()}"
+
+
+@router.post("/balances/batch", response_model=ResponseModel[List[BalanceAtResult]])
+async def get_balances_at(
+    batch: BalanceAtBatchRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    account_service = AccountService()
+    ledger_service = LedgerService()
+
+    account_ids = batch.account_ids
+    if current_user.role != UserRole.ADMIN:
+        owned = {
+            account.id
+            for account in await account_service.get_user_accounts(db, current_user.id)
+        }
+        account_ids = [account_id for account_id in account_ids if account_id in owned]
+
+    balances = await ledger_service.get_balances_at(db, account_ids, batch.at)
+
+    results = []
+    for account_id in batch.account_ids:
+        found = balances.get(account_id)
+        if found is None:
+            results.append(BalanceAtResult(
+                account_id=account_id,
+                at=batch.at,
+                error=(
+                    _no_ledger_history(account_id, batch.at)
+                    if account_id in balances
+                    else "Account not found"
+                ),
+            ))
+        else:
+            results.append(BalanceAtResult(
+                account_id=account_id,
+                at=batch.at,
+                balance=found[0],
+                currency=found[1],
+            ))
+
+    return ResponseModel(
+        status="success",
+        message=f"Resolved {len(results)} historical balances",
+        data=results,
+    )
+
+
 @router.get("/{account_id}", response_model=ResponseModel[AccountResponse])
 async def get_account(
     account_id: int,
@@ -91,6 +157,105 @@ async def get_account(
     )
 
 
+@router.get("/{account_id}/balance", response_model=ResponseModel[BalanceAtResult])
+async def get_balance_at(
+    account_id: int,
+    at: datetime,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    account_service = AccountService()
+    ledger_service = LedgerService()
+
+    account = await account_service.get_account_by_id(db, account_id)
+
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=localization.translate("account_not_found", current_user.preferred_language),
+        )
+
+    if account.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to access this account",
+        )
+
+    found = await ledger_service.get_balance_at(db, account_id, at)
+
+    if found is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=_no_ledger_history(account_id, at),
+        )
+
+    return ResponseModel(
+        status="success",
+        message=f"Balance for account {account_id} as of {at.isoformat()}",
+        data=BalanceAtResult(
+            account_id=account_id,
+            at=at,
+            balance=found[0],
+            currency=found[1],
+        ),
+    )
+
+
+@router.get("/{account_id}/statement")
+async def export_statement(
+    account_id: int,
+    request: Request,
+    output_format: str = Query(default="csv", alias="format", pattern="^(csv|jsonl)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    account_service = AccountService()
+
+    account = await account_service.get_account_by_id(db, account_id)
+
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=localization.translate("account_not_found", current_user.preferred_language),
+        )
+
+    if account.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to access this account",
+        )
+
+    # The request session is closed once this handler returns, before the
+    # body is sent, so the stream opens its own on the same engine.
+    bind = db.bind
+
+    async def entry_batches():
+        async with AsyncSession(bind, expire_on_commit=False) as session:
+            async for entries in LedgerService().stream_entries(
+                session, account_id, start, end
+            ):
+                yield entries
+
+    chunks = iter_statement_chunks(output_format, entry_batches())
+    headers = {
+        "Content-Disposition": (
+            f'attachment; filename="statement-{account_id}.{output_format}"'
+        ),
+        "Vary": "Accept-Encoding",
+    }
+    if accepts_encoding(request.headers.get("accept-encoding"), "gzip"):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        chunks,
+        media_type=STATEMENT_MEDIA_TYPES[output_format],
+        headers=headers,
+    )
+
+
 @router.post("/{account_id}/deposit", response_model=ResponseModel[AccountResponse])
 async def deposit_to_account(
     account_id: int,
@@ -1,10 +1,25 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from email.utils import format_datetime
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.schemas.fx_rate import FxRateResponse, FxRateListResponse
+from app.schemas.fx_rate import (
+    FxRateResponse,
+    FxRateListResponse,
+    ConversionBatchRequest,
+    ConversionBatchResponse,
+    ConversionResult,
+    CurrencyInfo,
+    RateAtBatchRequest,
+    RateAtResult,
+)
 from app.schemas.common import ResponseModel
 from app.services.fx_rate_service import FxRateService
+from app.services.fx_history_service import FxHistoryService
+from app.core.config import settings
+from app.utils.http_headers import etag_matches
 from app.core.dependencies import get_current_active_user, get_current_admin_user
 from app.db.models.user import User
 
@@ -13,30 +28,66 @@ router = APIRouter(prefix="/rates", tags=["Exchange Rates"])
 
 @router.get("/latest", response_model=ResponseModel[FxRateListResponse])
 async def get_latest_rates(
+    request: Request,
+    response: Response,
     base: str = "USD",
     current_user: User = Depends(get_current_active_user),
 ):
     fx_service = FxRateService()
+    base = base.upper()
 
     try:
-        rates = await fx_service.fetch_latest_rates(base.upper())
-
-        return ResponseModel(
-            status="success",
-            message=f"Latest rates for {base}",
-            data=FxRateListResponse(
-                base=base.upper(),
-                date="latest",
-                rates=rates,
-            ),
+        snapshot = await fx_service.get_latest_rates(base)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
         )
-
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e),
         )
 
+    as_of = snapshot.as_of_for(base)
+    age = (datetime.utcnow() - as_of).total_seconds() if as_of else 0
+    max_age = max(0, int(settings.fx_rates_stale_after_seconds - age))
+
+    # A refresh that only re-confirms rates bumps checked_at, not the
+    # version, but still restarts max-age; the tag has to change with it.
+    checked = as_of.strftime("%Y%m%d%H%M%S%f") if as_of else "0"
+    headers = {
+        "ETag": f'W/"fx-{base}-{snapshot.version}-{checked}"',
+        "Cache-Control": (
+            f"private, max-age={max_age}, "
+            f"stale-while-revalidate={settings.fx_rates_stale_after_seconds}"
+        ),
+    }
+    if as_of:
+        headers["Last-Modified"] = format_datetime(
+            as_of.replace(tzinfo=timezone.utc), usegmt=True
+        )
+
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+
+    rates = snapshot.rates_for(base)
+    rates[base] = Decimal("1.0")
+
+    return ResponseModel(
+        status="success",
+        message=f"Latest rates for {base}",
+        data=FxRateListResponse(
+            base=base,
+            date=as_of.date().isoformat() if as_of else "latest",
+            rates=rates,
+            as_of=as_of,
+            version=snapshot.version,
+        ),
+    )
+
 
 @router.get("/convert")
 async def convert_currency(
@@ -76,6 +127,128 @@ async def convert_currency(
         )
 
 
+@router.post("/convert/batch", response_model=ResponseModel[ConversionBatchResponse])
+async def convert_currency_batch(
+    batch: ConversionBatchRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    fx_service = FxRateService()
+    snapshot = fx_service.get_snapshot()
+
+    items = [
+        (item.amount, item.from_currency.upper(), item.to_currency.upper())
+        for item in batch.items
+    ]
+    converted = await fx_service.convert_many(db, items, snapshot)
+
+    results = [
+        ConversionResult(
+            from_currency=from_currency,
+            to_currency=to_currency,
+            from_amount=amount,
+            to_amount=to_amount,
+            exchange_rate=rate,
+            error=(
+                None if rate is not None
+                else f"Exchange rate not available for {from_currency}/{to_currency}"
+            ),
+        )
+        for (amount, from_currency, to_currency), (to_amount, rate) in zip(items, converted)
+    ]
+
+    return ResponseModel(
+        status="success",
+        message=f"Converted {len(results)} amounts",
+        data=ConversionBatchResponse(
+            version=snapshot.version if snapshot is not None else None,
+            results=results,
+        ),
+    )
+
+
+def _rate_unavailable(base_currency: str, quote_currency: str, at: datetime) -> str:
+    return (
+        f"Exchange rate not available for {base_currency}/{quote_currency} "
+        f"at {at.isoformat()}"
+    )
+
+
+def _rate_at_result(
+    base_currency: str,
+    quote_currency: str,
+    at: datetime,
+    found,
+) -> RateAtResult:
+    if found is None:
+        return RateAtResult(
+            base_currency=base_currency,
+            quote_currency=quote_currency,
+            at=at,
+            error=_rate_unavailable(base_currency, quote_currency, at),
+        )
+
+    rate, rate_date = found
+    return RateAtResult(
+        base_currency=base_currency,
+        quote_currency=quote_currency,
+        at=at,
+        rate=rate,
+        rate_date=rate_date,
+    )
+
+
+@router.get("/history", response_model=ResponseModel[RateAtResult])
+async def get_rate_at(
+    base_currency: str,
+    quote_currency: str,
+    at: datetime,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    history_service = FxHistoryService()
+    base_currency = base_currency.upper()
+    quote_currency = quote_currency.upper()
+
+    found = await history_service.get_rate_at(db, base_currency, quote_currency, at)
+
+    if found is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=_rate_unavailable(base_currency, quote_currency, at),
+        )
+
+    return ResponseModel(
+        status="success",
+        message=f"Rate for {base_currency}/{quote_currency} as of {at.isoformat()}",
+        data=_rate_at_result(base_currency, quote_currency, at, found),
+    )
+
+
+@router.post("/history/batch", response_model=ResponseModel[List[RateAtResult]])
+async def get_rates_at(
+    batch: RateAtBatchRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    history_service = FxHistoryService()
+
+    queries = [
+        (item.base_currency.upper(), item.quote_currency.upper(), item.at)
+        for item in batch.items
+    ]
+    found = await history_service.get_rates_at(db, queries)
+
+    return ResponseModel(
+        status="success",
+        message=f"Resolved {len(queries)} historical rates",
+        data=[
+            _rate_at_result(base_currency, quote_currency, at, result)
+            for (base_currency, quote_currency, at), result in zip(queries, found)
+        ],
+    )
+
+
 @router.get("/currencies", response_model=ResponseModel[List[str]])
 async def get_supported_currencies(
     current_user: User = Depends(get_current_active_user),
@@ -92,6 +265,22 @@ async def get_supported_currencies(
     )
 
 
+@router.get("/currencies/details", response_model=ResponseModel[List[CurrencyInfo]])
+async def get_supported_currency_details(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    fx_service = FxRateService()
+
+    currencies = await fx_service.get_currency_details(db)
+
+    return ResponseModel(
+        status="success",
+        message=f"Retrieved {len(currencies)} currencies",
+        data=[CurrencyInfo(**currency) for currency in currencies],
+    )
+
+
 @router.post("/update")
 async def update_exchange_rates(
     base: str = "USD",
@@ -1,14 +1,24 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.schemas.transfer import TransferCreate, TransferResponse
+from app.schemas.transfer import (
+    TransferCreate,
+    TransferResponse,
+    TransferBatchItem,
+    TransferBatchResult,
+    TransferBatchResponse,
+)
 from app.schemas.common import ResponseModel
 from app.services.transfer_service import TransferService
 from app.services.audit_service import AuditService
+from app.services.outbox_service import OutboxService
+from app.core.config import settings
 from app.core.dependencies import get_current_active_user, get_idempotency_key
 from app.db.models.user import User
-from app.utils.message_broker import publish_transfer_task, publish_notification_task
+from app.utils.batch_input import iter_records
 from app.utils.localization import localization
 
 router = APIRouter(prefix="/transfers", tags=["Transfers"])
@@ -17,12 +27,14 @@ router = APIRouter(prefix="/transfers", tags=["Transfers"])
 @router.post("", response_model=ResponseModel[TransferResponse], status_code=status.HTTP_201_CREATED)
 async def create_transfer(
     transfer_data: TransferCreate,
+    execute: str = Query(default="async", pattern="^(async|sync)$"),
     current_user: User = Depends(get_current_active_user),
     idempotency_key: Optional[str] = Depends(get_idempotency_key),
     db: AsyncSession = Depends(get_db),
 ):
     transfer_service = TransferService()
     audit_service = AuditService()
+    outbox_service = OutboxService()
 
     try:
         transfer = await transfer_service.create_transfer(
@@ -46,17 +58,50 @@ async def create_transfer(
                 },
             )
 
-            await db.commit()
+            run_inline = execute == "sync" and transfer_service.qualifies_for_sync(transfer)
+
+            if run_inline:
+                results = await transfer_service.apply_transfers(db, [transfer])
+                error = results.get(transfer.id)
+                if error is None:
+                    await audit_service.log_action(
+                        db=db,
+                        action="transfer_completed",
+                        entity_type="transfer",
+                        entity_id=transfer.id,
+                        description=f"Transfer {transfer.id} completed synchronously",
+                    )
+
+            if run_inline and error is not None:
+                # The failure is committed so the transfer and its released
+                # hold are recorded, but nothing completed: no notification.
+                await db.commit()
+                return JSONResponse(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    content={
+                        "status": "error",
+                        "message": f"Transfer failed: {error}",
+                        "data": TransferResponse.model_validate(transfer).model_dump(
+                            mode="json"
+                        ),
+                    },
+                )
 
-            await publish_transfer_task(transfer.id)
+            if run_inline:
+                message = "Transfer completed"
+            else:
+                lanes = await transfer_service.transfer_lanes(db, [transfer])
+                await outbox_service.enqueue_transfer_tasks(db, [transfer], lanes)
+                message = "Transfer created and queued for processing"
 
-            await publish_notification_task(
+            await outbox_service.enqueue_notification(
+                db,
                 current_user.id,
                 localization.translate("transfer_completed", current_user.preferred_language),
                 "info",
             )
 
-            message = "Transfer created and queued for processing"
+            await db.commit()
         else:
             message = "Transfer already exists (idempotent response)"
 
@@ -70,6 +115,106 @@ async def create_transfer(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'item'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+@router.post("/batch", response_model=ResponseModel[TransferBatchResponse])
+async def create_transfer_batch(
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    transfer_service = TransferService()
+    audit_service = AuditService()
+    outbox_service = OutboxService()
+
+    items = []
+    try:
+        records = iter_records(
+            request.headers.get("content-type", ""),
+            request.stream(),
+            settings.transfer_batch_max_bytes,
+        )
+        async for record in records:
+            if len(items) >= settings.transfer_batch_max_items:
+                raise ValueError(
+                    f"Batch exceeds {settings.transfer_batch_max_items} items"
+                )
+            if isinstance(record, str):
+                items.append(record)
+                continue
+            try:
+                items.append(TransferBatchItem.model_validate(record))
+            except ValidationError as e:
+                items.append(_validation_message(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if not items:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Batch is empty")
+
+    outcomes = await transfer_service.create_transfers(db, current_user, items)
+    created = [transfer for outcome, transfer, _ in outcomes if outcome == "created"]
+
+    await audit_service.log_actions(
+        db,
+        action="transfer_created",
+        entity_type="transfer",
+        entries=[
+            (
+                transfer.id,
+                {
+                    "from_account_id": transfer.from_account_id,
+                    "to_account_id": transfer.to_account_id,
+                    "amount": str(transfer.from_amount),
+                    "currency": transfer.from_currency,
+                },
+            )
+            for transfer in created
+        ],
+        user=current_user,
+    )
+
+    if created:
+        lanes = await transfer_service.transfer_lanes(db, created, bulk=True)
+        await outbox_service.enqueue_transfer_tasks(db, created, lanes)
+        await outbox_service.enqueue_notification(
+            db,
+            current_user.id,
+            localization.translate("transfer_completed", current_user.preferred_language),
+            "info",
+        )
+
+    await db.commit()
+
+    results = [
+        TransferBatchResult(
+            index=index,
+            status=outcome,
+            transfer=TransferResponse.model_validate(transfer) if transfer else None,
+            error=error,
+        )
+        for index, (outcome, transfer, error) in enumerate(outcomes)
+    ]
+    failed = sum(1 for result in results if result.status == "error")
+
+    return ResponseModel(
+        status="success",
+        message=f"Processed {len(results)} transfers",
+        data=TransferBatchResponse(
+            total=len(results),
+            created=len(created),
+            existing=len(results) - len(created) - failed,
+            failed=failed,
+            results=results,
+        ),
+    )
+
+
 @router.get("", response_model=ResponseModel[List[TransferResponse]])
 async def get_transfers(
     limit: int = 100,
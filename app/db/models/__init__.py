@@ -2,16 +2,26 @@ from app.db.models.user import User
 from app.db.models.account import Account
 from app.db.models.transfer import Transfer
 from app.db.models.fx_rate import FxRate
+from app.db.models.fx_rate_latest import FxRateLatest
+from app.db.models.fx_rate_daily import FxRateDaily
+from app.db.models.currency import Currency
 from app.db.models.ledger_entry import LedgerEntry
+from app.db.models.ledger_checkpoint import LedgerCheckpoint
 from app.db.models.audit import Audit
 from app.db.models.idempotency_key import IdempotencyKey
+from app.db.models.outbox_message import OutboxMessage
 
 __all__ = [
     "User",
     "Account",
     "Transfer",
     "FxRate",
+    "FxRateLatest",
+    "FxRateDaily",
+    "Currency",
     "LedgerEntry",
+    "LedgerCheckpoint",
     "Audit",
     "IdempotencyKey",
+    "OutboxMessage",
 ]
@@ -24,6 +24,16 @@ class Account(Base):
         default=Decimal("0.00"),
         nullable=False
     )
+    held_balance: Mapped[Decimal] = mapped_column(
+        Numeric(precision=20, scale=2),
+        default=Decimal("0.00"),
+        nullable=False
+    )
+    tier: Mapped[str] = mapped_column(
+        String(20),
+        default="standard",
+        nullable=False
+    )
 
     fixed_commission: Mapped[Decimal] = mapped_column(
         Numeric(precision=20, scale=2),
@@ -48,5 +58,9 @@ class Account(Base):
 
     user: Mapped["User"] = relationship("User", back_populates="accounts")
 
+    @property
+    def available_balance(self) -> Decimal:
+        return self.balance - (self.held_balance or Decimal("0.00"))
+
     def __repr__(self) -> str:
         return f"<Account(id={self.id}, user_id={self.user_id}, currency={self.currency}, balance={self.balance})>"
@@ -10,6 +10,7 @@ class FxRate(Base):
     __tablename__ = "fx_rates"
     __table_args__ = (
         Index("idx_currency_pair_date", "base_currency", "quote_currency", "rate_date"),
+        Index("idx_fx_rate_date", "rate_date"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
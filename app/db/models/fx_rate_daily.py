@@ -0,0 +1,46 @@
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import String, Date, DateTime, Numeric, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+
+class FxRateDaily(Base):
+
+    __tablename__ = "fx_rates_daily"
+    __table_args__ = (
+        UniqueConstraint(
+            "base_currency", "quote_currency", "day",
+            name="uq_fx_rates_daily_pair_day",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+    base_currency: Mapped[str] = mapped_column(String(3), nullable=False)
+    quote_currency: Mapped[str] = mapped_column(String(3), nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+
+    open_rate: Mapped[Decimal] = mapped_column(Numeric(precision=20, scale=8), nullable=False)
+    high_rate: Mapped[Decimal] = mapped_column(Numeric(precision=20, scale=8), nullable=False)
+    low_rate: Mapped[Decimal] = mapped_column(Numeric(precision=20, scale=8), nullable=False)
+    close_rate: Mapped[Decimal] = mapped_column(Numeric(precision=20, scale=8), nullable=False)
+    samples: Mapped[int] = mapped_column(nullable=False, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<FxRateDaily({self.base_currency}/{self.quote_currency} {self.day}: "
+            f"O={self.open_rate} H={self.high_rate} L={self.low_rate} C={self.close_rate})>"
+        )
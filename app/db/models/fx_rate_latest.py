@@ -0,0 +1,42 @@
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import String, DateTime, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+
+class FxRateLatest(Base):
+
+    __tablename__ = "fx_rates_latest"
+
+    base_currency: Mapped[str] = mapped_column(String(3), primary_key=True)
+    quote_currency: Mapped[str] = mapped_column(String(3), primary_key=True)
+
+    rate: Mapped[Decimal] = mapped_column(
+        Numeric(precision=20, scale=8),
+        nullable=False
+    )
+
+    rate_date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    source: Mapped[str] = mapped_column(String(50), nullable=False)
+
+    fx_rate_id: Mapped[int] = mapped_column(nullable=False)
+
+    checked_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        nullable=False
+    )
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<FxRateLatest({self.base_currency}/{self.quote_currency}={self.rate}, "
+            f"date={self.rate_date})>"
+        )
@@ -0,0 +1,36 @@
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import DateTime, Numeric, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+
+class LedgerCheckpoint(Base):
+
+    __tablename__ = "ledger_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("account_id", "as_of", name="uq_ledger_checkpoints_account_as_of"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+    account_id: Mapped[int] = mapped_column(ForeignKey("accounts.id"), nullable=False)
+    as_of: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    balance: Mapped[Decimal] = mapped_column(
+        Numeric(precision=20, scale=2),
+        nullable=False
+    )
+    last_entry_id: Mapped[int] = mapped_column(nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<LedgerCheckpoint(account_id={self.account_id}, as_of={self.as_of}, "
+            f"balance={self.balance})>"
+        )
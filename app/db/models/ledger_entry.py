@@ -1,6 +1,7 @@
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import String, DateTime, Numeric, ForeignKey, Enum as SQLEnum
+from typing import Optional
+from sqlalchemy import String, DateTime, Numeric, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base import Base
 import enum
@@ -14,6 +15,9 @@ class LedgerEntryType(str, enum.Enum):
 class LedgerEntry(Base):
 
     __tablename__ = "ledger_entries"
+    __table_args__ = (
+        Index("idx_ledger_account_created", "account_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
 
@@ -23,9 +27,10 @@ class LedgerEntry(Base):
         index=True
     )
 
-    transfer_id: Mapped[int] = mapped_column(
+    # Empty for deposits and withdrawals.
+    transfer_id: Mapped[Optional[int]] = mapped_column(
         ForeignKey("transfers.id"),
-        nullable=False,
+        nullable=True,
         index=True
     )
 
@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import String, DateTime, JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+
+class OutboxMessage(Base):
+
+    __tablename__ = "outbox_messages"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+    queue_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    arguments: Mapped[dict] = mapped_column(JSON, nullable=True)
+    priority: Mapped[int] = mapped_column(default=0, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<OutboxMessage(id={self.id}, queue_name={self.queue_name})>"
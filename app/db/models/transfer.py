@@ -1,6 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import String, DateTime, Numeric, ForeignKey, Enum as SQLEnum, Text
+from sqlalchemy import String, DateTime, Numeric, ForeignKey, Enum as SQLEnum, Text, BigInteger
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base import Base
 import enum
@@ -45,11 +45,17 @@ class Transfer(Base):
         Numeric(precision=20, scale=8),
         nullable=False
     )
+    fx_snapshot_version: Mapped[int] = mapped_column(BigInteger, nullable=True)
     commission_amount: Mapped[Decimal] = mapped_column(
         Numeric(precision=20, scale=2),
         default=Decimal("0.00"),
         nullable=False
     )
+    hold_amount: Mapped[Decimal] = mapped_column(
+        Numeric(precision=20, scale=2),
+        default=Decimal("0.00"),
+        nullable=False
+    )
     fixed_commission: Mapped[Decimal] = mapped_column(
         Numeric(precision=20, scale=2),
         default=Decimal("0.00"),
@@ -4,15 +4,20 @@ from app.core.config import settings
 from app.db.base import Base
 
 
+# SQLite (local benchmarks) runs on NullPool, which takes no pool options.
+pool_options = {} if settings.database_url.startswith("sqlite") else {
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_timeout": settings.db_pool_timeout,
+    "pool_recycle": settings.db_pool_recycle,
+    "pool_pre_ping": True,
+}
+
 engine = create_async_engine(
     settings.database_url,
     echo=settings.db_echo,
     future=True,
-    pool_size=settings.db_pool_size,
-    max_overflow=settings.db_max_overflow,
-    pool_timeout=settings.db_pool_timeout,
-    pool_recycle=settings.db_pool_recycle,
-    pool_pre_ping=True,
+    **pool_options,
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
@@ -5,11 +6,13 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from app.core.config import settings
-from app.db.session import init_db
+from app.db.session import init_db, AsyncSessionLocal
 from app.api.v1 import auth, accounts, transfers, rates, audit
+from app.services.fx_snapshot import fx_snapshot_store
 from app.utils.message_broker import message_broker
 from app.utils.telegram_logger import telegram_logger
 from app.utils.redis_client import redis_client
+from app.services.fx_providers import fx_rate_provider
 from app.utils.rate_limiter import rate_limit_check
 import time
 
@@ -21,10 +24,15 @@ async def lifespan(app: FastAPI):
     try:
         await init_db()
 
+        async with AsyncSessionLocal() as db:
+            await fx_snapshot_store.refresh(db)
+
         await message_broker.connect()
 
         await redis_client.connect()
 
+        fx_watch_task = asyncio.create_task(fx_snapshot_store.watch(AsyncSessionLocal))
+
         await telegram_logger.log_success(f"{settings.app_name} started successfully")
 
     except Exception as e:
@@ -36,8 +44,11 @@ async def lifespan(app: FastAPI):
     await telegram_logger.log_info(f"{settings.app_name} shutting down...")
 
     try:
+        fx_watch_task.cancel()
+        await asyncio.gather(fx_watch_task, return_exceptions=True)
         await message_broker.close()
         await redis_client.disconnect()
+        await fx_rate_provider.close()
         await telegram_logger.log_info(f"{settings.app_name} shut down successfully")
     except Exception as e:
         await telegram_logger.log_error(f"Error during shutdown: {str(e)}")
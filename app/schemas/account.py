@@ -1,6 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field, ConfigDict
 
 
@@ -30,6 +30,9 @@ class AccountResponse(AccountBase):
     id: int
     user_id: int
     balance: Decimal
+    held_balance: Decimal
+    available_balance: Decimal
+    tier: str
     fixed_commission: Optional[Decimal]
     percentage_commission: Optional[Decimal]
     created_at: datetime
@@ -43,6 +46,9 @@ class AccountResponse(AccountBase):
                 "user_id": 1,
                 "currency": "USD",
                 "balance": "1000.00",
+                "held_balance": "0.00",
+                "available_balance": "1000.00",
+                "tier": "standard",
                 "fixed_commission": None,
                 "percentage_commission": None,
                 "created_at": "2024-01-01T00:00:00",
@@ -63,3 +69,27 @@ class AccountOperationRequest(BaseModel):
             }
         }
     )
+
+
+class BalanceAtBatchRequest(BaseModel):
+
+    account_ids: List[int] = Field(min_length=1, max_length=10000)
+    at: datetime
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "account_ids": [1, 2, 3],
+                "at": "2024-01-31T23:59:59"
+            }
+        }
+    )
+
+
+class BalanceAtResult(BaseModel):
+
+    account_id: int
+    at: datetime
+    balance: Optional[Decimal] = None
+    currency: Optional[str] = None
+    error: Optional[str] = None
@@ -1,5 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
+from typing import List, Optional
 from pydantic import BaseModel, Field, ConfigDict
 
 
@@ -36,12 +37,16 @@ class FxRateListResponse(BaseModel):
     base: str
     date: str
     rates: dict[str, Decimal]
+    as_of: Optional[datetime] = None
+    version: Optional[int] = None
 
     model_config = ConfigDict(
         json_schema_extra={
             "example": {
                 "base": "USD",
                 "date": "2024-01-01",
+                "as_of": "2024-01-01T12:00:00",
+                "version": 1042,
                 "rates": {
                     "EUR": "0.92",
                     "GBP": "0.79",
@@ -50,3 +55,110 @@ class FxRateListResponse(BaseModel):
             }
         }
     )
+
+
+class ConversionItem(BaseModel):
+
+    amount: Decimal = Field(gt=0)
+    from_currency: str = Field(min_length=3, max_length=3)
+    to_currency: str = Field(min_length=3, max_length=3)
+
+
+class ConversionBatchRequest(BaseModel):
+
+    items: List[ConversionItem] = Field(min_length=1, max_length=1000)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "items": [
+                    {"amount": "100.00", "from_currency": "USD", "to_currency": "EUR"},
+                    {"amount": "2500.00", "from_currency": "JPY", "to_currency": "USD"}
+                ]
+            }
+        }
+    )
+
+
+class ConversionResult(BaseModel):
+
+    from_currency: str
+    to_currency: str
+    from_amount: Decimal
+    to_amount: Optional[Decimal] = None
+    exchange_rate: Optional[Decimal] = None
+    error: Optional[str] = None
+
+
+class ConversionBatchResponse(BaseModel):
+
+    version: Optional[int] = None
+    results: List[ConversionResult]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "version": 1042,
+                "results": [
+                    {
+                        "from_currency": "USD",
+                        "to_currency": "EUR",
+                        "from_amount": "100.00",
+                        "to_amount": "92.00",
+                        "exchange_rate": "0.92",
+                        "error": None
+                    }
+                ]
+            }
+        }
+    )
+
+
+class RateAtQuery(BaseModel):
+
+    base_currency: str = Field(min_length=3, max_length=3)
+    quote_currency: str = Field(min_length=3, max_length=3)
+    at: datetime
+
+
+class RateAtBatchRequest(BaseModel):
+
+    items: List[RateAtQuery] = Field(min_length=1, max_length=10000)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "items": [
+                    {"base_currency": "USD", "quote_currency": "EUR", "at": "2024-01-01T12:00:00"},
+                    {"base_currency": "GBP", "quote_currency": "JPY", "at": "2024-01-02T08:30:00"}
+                ]
+            }
+        }
+    )
+
+
+class RateAtResult(BaseModel):
+
+    base_currency: str
+    quote_currency: str
+    at: datetime
+    rate: Optional[Decimal] = None
+    rate_date: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+class CurrencyInfo(BaseModel):
+
+    code: str
+    name: Optional[str] = None
+    minor_units: int
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "code": "JPY",
+                "name": "Yen",
+                "minor_units": 0
+            }
+        }
+    )
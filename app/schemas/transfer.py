@@ -1,6 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field, ConfigDict, model_validator
 
 
@@ -47,6 +47,7 @@ class TransferResponse(TransferBase):
     from_amount: Decimal
     to_amount: Decimal
     exchange_rate: Decimal
+    fx_snapshot_version: Optional[int] = None
     commission_amount: Decimal
     fixed_commission: Decimal
     percentage_commission: Decimal
@@ -69,6 +70,7 @@ class TransferResponse(TransferBase):
                 "from_amount": "100.00",
                 "to_amount": "92.00",
                 "exchange_rate": "0.92",
+                "fx_snapshot_version": 1042,
                 "commission_amount": "1.00",
                 "fixed_commission": "0.00",
                 "percentage_commission": "0.01",
@@ -82,3 +84,40 @@ class TransferResponse(TransferBase):
             }
         }
     )
+
+
+class TransferBatchItem(TransferCreate):
+
+    idempotency_key: Optional[str] = Field(default=None, max_length=255)
+
+
+class TransferBatchResult(BaseModel):
+
+    index: int
+    status: str
+    transfer: Optional[TransferResponse] = None
+    error: Optional[str] = None
+
+
+class TransferBatchResponse(BaseModel):
+
+    total: int
+    created: int
+    existing: int
+    failed: int
+    results: List[TransferBatchResult]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "total": 2,
+                "created": 1,
+                "existing": 0,
+                "failed": 1,
+                "results": [
+                    {"index": 0, "status": "created", "transfer": {"id": 1}},
+                    {"index": 1, "status": "error", "error": "Insufficient funds"}
+                ]
+            }
+        }
+    )
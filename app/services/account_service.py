@@ -1,10 +1,13 @@
 from decimal import Decimal
-from typing import Optional, List
-from sqlalchemy import select, and_
+from datetime import datetime
+from typing import Optional, List, Dict, Iterable, Set, Tuple
+from sqlalchemy import select, and_, update, case
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models.account import Account
+from app.db.models.ledger_entry import LedgerEntry, LedgerEntryType
 from app.db.models.user import User
 from app.schemas.account import AccountCreate
+from app.services.currency_registry import currency_registry
 
 
 class AccountService:
@@ -15,10 +18,14 @@ class AccountService:
         user: User,
         account_data: AccountCreate,
     ) -> Account:
+        currency = account_data.currency.upper()
+        if not currency_registry.is_supported(currency):
+            raise ValueError(f"Unsupported currency {currency}")
+
         stmt = select(Account).where(
             and_(
                 Account.user_id == user.id,
-                Account.currency == account_data.currency.upper(),
+                Account.currency == currency,
             )
         )
         result = await db.execute(stmt)
@@ -31,7 +38,7 @@ class AccountService:
 
         account = Account(
             user_id=user.id,
-            currency=account_data.currency.upper(),
+            currency=currency,
             balance=Decimal("0.00"),
             fixed_commission=account_data.fixed_commission,
             percentage_commission=account_data.percentage_commission,
@@ -82,18 +89,163 @@ class AccountService:
         account: Account,
         amount: Decimal,
     ) -> Account:
-        account.balance += amount
-
-        if account.balance < 0:
-            raise ValueError("Insufficient funds")
+        # Same locked, set-based update as transfers, so the ledger entry's
+        # balance_after is the balance this change actually produced.
+        balances = await self.apply_balance_changes(db, {account.id: amount})
+        balance_after, currency = balances[account.id]
 
+        db.add(LedgerEntry(
+            account_id=account.id,
+            entry_type=LedgerEntryType.CREDIT if amount > 0 else LedgerEntryType.DEBIT,
+            amount=abs(amount),
+            currency=currency,
+            balance_after=balance_after,
+            description="Deposit" if amount > 0 else "Withdrawal",
+        ))
         await db.flush()
         await db.refresh(account)
         return account
 
+    async def lock_accounts(
+        self,
+        db: AsyncSession,
+        account_ids: Iterable[int],
+    ) -> None:
+        await db.execute(
+            select(Account.id)
+            .where(Account.id.in_(sorted(account_ids)))
+            .order_by(Account.id)
+            .with_for_update()
+        )
+
+    def _locked_ids(self, account_ids: List[int]):
+        # Lock in id order so two statements touching the same accounts
+        # cannot deadlock.
+        return (
+            select(Account.id)
+            .where(Account.id.in_(account_ids))
+            .order_by(Account.id)
+            .with_for_update()
+            .scalar_subquery()
+        )
+
+    async def place_holds(
+        self,
+        db: AsyncSession,
+        holds: Dict[int, Decimal],
+    ) -> Set[int]:
+        if not holds:
+            return set()
+
+        account_ids = sorted(holds)
+        amounts = case(
+            {account_id: holds[account_id] for account_id in account_ids},
+            value=Account.id,
+        )
+        # The availability check and the hold are one conditional UPDATE, so
+        # concurrent requests cannot reserve the same funds twice.
+        result = await db.execute(
+            update(Account)
+            .where(
+                Account.id.in_(self._locked_ids(account_ids)),
+                Account.balance - Account.held_balance >= amounts,
+            )
+            .values(held_balance=Account.held_balance + amounts)
+            .returning(Account.id)
+            .execution_options(synchronize_session=False)
+        )
+        return set(result.scalars().all())
+
+    async def place_hold(
+        self,
+        db: AsyncSession,
+        account_id: int,
+        amount: Decimal,
+    ) -> None:
+        if account_id not in await self.place_holds(db, {account_id: amount}):
+            raise ValueError("Insufficient funds")
+
+    async def release_holds(
+        self,
+        db: AsyncSession,
+        holds: Dict[int, Decimal],
+    ) -> None:
+        holds = {account_id: amount for account_id, amount in holds.items() if amount}
+        if not holds:
+            return
+
+        account_ids = sorted(holds)
+        await db.execute(
+            update(Account)
+            .where(Account.id.in_(self._locked_ids(account_ids)))
+            .values(
+                held_balance=Account.held_balance - case(
+                    {account_id: holds[account_id] for account_id in account_ids},
+                    value=Account.id,
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def apply_balance_changes(
+        self,
+        db: AsyncSession,
+        changes: Dict[int, Decimal],
+        releases: Optional[Dict[int, Decimal]] = None,
+    ) -> Dict[int, Tuple[Decimal, str]]:
+        account_ids = sorted(changes)
+        releases = releases or {}
+
+        values = {
+            "balance": Account.balance + case(
+                {account_id: changes[account_id] for account_id in account_ids},
+                value=Account.id,
+            ),
+            "updated_at": datetime.utcnow(),
+        }
+        if any(releases.values()):
+            # A debit that was reserved at creation consumes its hold.
+            values["held_balance"] = Account.held_balance - case(
+                {
+                    account_id: releases.get(account_id, Decimal("0"))
+                    for account_id in account_ids
+                },
+                value=Account.id,
+            )
+
+        stmt = (
+            update(Account)
+            .where(Account.id.in_(self._locked_ids(account_ids)))
+            .values(**values)
+            .returning(
+                Account.id, Account.balance, Account.held_balance, Account.currency
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        rows = result.all()
+        balances = {
+            account_id: (balance, currency)
+            for account_id, balance, _, currency in rows
+        }
+
+        if len(balances) != len(account_ids):
+            raise ValueError("Account not found")
+
+        # A debit covered by its own hold only needs the balance itself. Any
+        # part beyond the hold must come out of funds no other transfer has
+        # reserved.
+        for account_id, balance, held, _ in rows:
+            unreserved = -changes[account_id] - releases.get(account_id, Decimal("0"))
+            floor = held if unreserved > 0 else Decimal("0")
+            if balance < floor:
+                raise ValueError("Insufficient funds")
+
+        return balances
+
     async def check_sufficient_balance(
         self,
         account: Account,
         amount: Decimal,
     ) -> bool:
-        return account.balance >= amount
+        return account.available_balance >= amount
@@ -1,5 +1,5 @@
-from typing import Optional, Dict, Any, List
-from sqlalchemy import select
+from typing import Optional, Dict, Any, List, Tuple
+from sqlalchemy import select, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models.audit import Audit
 from app.db.models.user import User
@@ -38,6 +38,31 @@ class AuditService:
 
         return audit
 
+    async def log_actions(
+        self,
+        db: AsyncSession,
+        action: str,
+        entity_type: str,
+        entries: List[Tuple[int, Optional[Dict[str, Any]]]],
+        user: Optional[User] = None,
+    ) -> None:
+        if not entries:
+            return
+
+        await db.execute(
+            insert(Audit),
+            [
+                {
+                    "user_id": user.id if user else None,
+                    "action": action,
+                    "entity_type": entity_type,
+                    "entity_id": entity_id,
+                    "new_values": new_values,
+                }
+                for entity_id, new_values in entries
+            ],
+        )
+
     async def get_user_audit_logs(
         self,
         db: AsyncSession,
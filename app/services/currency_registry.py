@@ -0,0 +1,107 @@
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models.currency import Currency
+from app.db.upsert import dialect_insert
+from app.utils.currencies import (
+    AMOUNT_SCALE,
+    ISO_4217,
+    currency_name,
+    minor_units_for,
+    quantum_for,
+)
+
+
+class CurrencyRegistry:
+
+    def __init__(self):
+        self._minor_units: Dict[str, int] = {}
+        self._persisted: frozenset = frozenset()
+        self._codes: Tuple[str, ...] = ()
+
+    def _replace(self, minor_units: Dict[str, int], persisted: Iterable[str]) -> None:
+        self._minor_units = MappingProxyType(dict(minor_units))
+        self._persisted = frozenset(persisted)
+        self._codes = tuple(sorted(minor_units))
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._minor_units
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    @property
+    def codes(self) -> Tuple[str, ...]:
+        return self._codes
+
+    def is_supported(self, code: str) -> bool:
+        # Before the first ingest the registry is empty; fall back to the
+        # static ISO table so accounts can still be opened.
+        if not self._minor_units:
+            return code in ISO_4217
+        return code in self._minor_units
+
+    def minor_units(self, code: str) -> int:
+        units = self._minor_units.get(code)
+        return minor_units_for(code) if units is None else units
+
+    def quantum(self, code: str) -> Decimal:
+        return quantum_for(min(self.minor_units(code), AMOUNT_SCALE))
+
+    def details(self) -> List[Dict]:
+        return [
+            {
+                "code": code,
+                "name": currency_name(code),
+                "minor_units": self._minor_units[code],
+            }
+            for code in self._codes
+        ]
+
+    async def load(
+        self,
+        db: AsyncSession,
+        extra_codes: Optional[Iterable[str]] = None,
+    ) -> None:
+        result = await db.execute(select(Currency.code, Currency.minor_units))
+        minor_units = {code: units for code, units in result.all()}
+        persisted = set(minor_units)
+
+        # Codes already present in rates but not yet registered (databases
+        # populated before the registry existed) are served from memory and
+        # persisted by the next ingest.
+        for code in extra_codes or ():
+            minor_units.setdefault(code, minor_units_for(code))
+
+        self._replace(minor_units, persisted)
+
+    async def register(self, db: AsyncSession, codes: Iterable[str]) -> List[str]:
+        new_codes = sorted({code for code in codes if code not in self._persisted})
+        if not new_codes:
+            return []
+
+        stmt = dialect_insert(db, Currency).values([
+            {
+                "code": code,
+                "name": currency_name(code),
+                "minor_units": minor_units_for(code),
+            }
+            for code in new_codes
+        ])
+        await db.execute(
+            stmt.on_conflict_do_nothing(index_elements=[Currency.code])
+        )
+
+        minor_units = dict(self._minor_units)
+        for code in new_codes:
+            minor_units.setdefault(code, minor_units_for(code))
+        self._replace(minor_units, self._persisted | set(new_codes))
+        return new_codes
+
+    def clear(self) -> None:
+        self._replace({}, ())
+
+
+currency_registry = CurrencyRegistry()
@@ -0,0 +1,307 @@
+import asyncio
+from bisect import bisect_right
+from datetime import datetime, date, time, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, delete, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.models.fx_rate import FxRate
+from app.db.models.fx_rate_daily import FxRateDaily
+from app.db.upsert import dialect_insert
+from app.services.fx_snapshot import CROSS_RATE_PIVOTS, RATE_QUANTUM, fx_snapshot_store
+
+CandleKey = Tuple[str, str, date]
+RateAt = Tuple[Decimal, datetime]
+
+
+class FxRateTimeIndex:
+
+    def __init__(self):
+        self._times: Dict[Tuple[str, str], List[datetime]] = {}
+        self._rates: Dict[Tuple[str, str], List[Decimal]] = {}
+        self.last_rate_id = 0
+        self.version = -1
+
+    def __len__(self) -> int:
+        return sum(len(times) for times in self._times.values())
+
+    def add(self, base_currency: str, quote_currency: str, at: datetime, rate: Decimal) -> None:
+        pair = (base_currency, quote_currency)
+        times = self._times.setdefault(pair, [])
+        rates = self._rates.setdefault(pair, [])
+
+        if not times or at >= times[-1]:
+            times.append(at)
+            rates.append(rate)
+        else:
+            position = bisect_right(times, at)
+            times.insert(position, at)
+            rates.insert(position, rate)
+
+    def _direct_rate_at(self, pair: Tuple[str, str], at: datetime) -> Optional[RateAt]:
+        times = self._times.get(pair)
+        if not times:
+            return None
+
+        position = bisect_right(times, at) - 1
+        if position < 0:
+            return None
+
+        return self._rates[pair][position], times[position]
+
+    def _pair_rate_at(
+        self,
+        base_currency: str,
+        quote_currency: str,
+        at: datetime,
+    ) -> Optional[RateAt]:
+        if base_currency == quote_currency:
+            return Decimal("1.0"), at
+
+        direct = self._direct_rate_at((base_currency, quote_currency), at)
+        if direct is not None:
+            return direct
+
+        inverse = self._direct_rate_at((quote_currency, base_currency), at)
+        if inverse is not None and inverse[0] != 0:
+            return (Decimal("1.0") / inverse[0]).quantize(RATE_QUANTUM), inverse[1]
+
+        return None
+
+    def rate_at(
+        self,
+        base_currency: str,
+        quote_currency: str,
+        at: datetime,
+    ) -> Optional[RateAt]:
+        found = self._pair_rate_at(base_currency, quote_currency, at)
+        if found is not None:
+            return found
+
+        for pivot in CROSS_RATE_PIVOTS:
+            if pivot in (base_currency, quote_currency):
+                continue
+            to_pivot = self._pair_rate_at(base_currency, pivot, at)
+            from_pivot = self._pair_rate_at(pivot, quote_currency, at)
+            if to_pivot is not None and from_pivot is not None:
+                return (
+                    (to_pivot[0] * from_pivot[0]).quantize(RATE_QUANTUM),
+                    min(to_pivot[1], from_pivot[1]),
+                )
+
+        return None
+
+
+def to_naive_utc(at: datetime) -> datetime:
+    if at.tzinfo is None:
+        return at
+    return at.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+_time_index = FxRateTimeIndex()
+_time_index_lock = asyncio.Lock()
+
+
+def reset_time_index() -> None:
+    global _time_index
+    _time_index = FxRateTimeIndex()
+
+
+class FxHistoryService:
+
+    async def get_time_index(self, db: AsyncSession) -> FxRateTimeIndex:
+        global _time_index
+
+        version = fx_snapshot_store.version
+        if _time_index.version == version and version:
+            return _time_index
+
+        async with _time_index_lock:
+            if _time_index.version == version and version:
+                return _time_index
+
+            if _time_index.version < 0:
+                index = FxRateTimeIndex()
+                await self._load_daily_rollups(db, index)
+            else:
+                index = _time_index
+
+            await self._load_raw_rates(db, index)
+            index.version = version
+            _time_index = index
+
+        return _time_index
+
+    async def _load_daily_rollups(self, db: AsyncSession, index: FxRateTimeIndex) -> None:
+        stmt = select(
+            FxRateDaily.base_currency,
+            FxRateDaily.quote_currency,
+            FxRateDaily.day,
+            FxRateDaily.open_rate,
+            FxRateDaily.close_rate,
+        )
+        result = await db.stream(stmt)
+
+        # Pruned days keep only their candle: treat the open as the rate from
+        # midnight and the close as the last rate of the day.
+        async for base_currency, quote_currency, day, open_rate, close_rate in result:
+            day_start = datetime.combine(day, time.min)
+            index.add(base_currency, quote_currency, day_start, open_rate)
+            index.add(base_currency, quote_currency, datetime.combine(day, time.max), close_rate)
+
+    async def _load_raw_rates(self, db: AsyncSession, index: FxRateTimeIndex) -> None:
+        stmt = (
+            select(
+                FxRate.id,
+                FxRate.base_currency,
+                FxRate.quote_currency,
+                FxRate.rate_date,
+                FxRate.rate,
+            )
+            .where(FxRate.id > index.last_rate_id)
+            .order_by(FxRate.id)
+        )
+        result = await db.stream(stmt)
+
+        async for rate_id, base_currency, quote_currency, rate_date, rate in result:
+            index.add(base_currency, quote_currency, rate_date, rate)
+            index.last_rate_id = rate_id
+
+    async def get_rate_at(
+        self,
+        db: AsyncSession,
+        base_currency: str,
+        quote_currency: str,
+        at: datetime,
+    ) -> Optional[RateAt]:
+        index = await self.get_time_index(db)
+        return index.rate_at(base_currency, quote_currency, to_naive_utc(at))
+
+    async def get_rates_at(
+        self,
+        db: AsyncSession,
+        queries: List[Tuple[str, str, datetime]],
+    ) -> List[Optional[RateAt]]:
+        index = await self.get_time_index(db)
+        return [
+            index.rate_at(base_currency, quote_currency, to_naive_utc(at))
+            for base_currency, quote_currency, at in queries
+        ]
+
+    async def rollup_and_prune(
+        self,
+        db: AsyncSession,
+        retention_days: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> Tuple[int, int]:
+        if retention_days is None:
+            retention_days = settings.fx_history_retention_days
+        batch_size = batch_size or settings.fx_history_prune_batch_size
+
+        cutoff = datetime.combine(
+            datetime.utcnow().date() - timedelta(days=retention_days), time.min
+        )
+
+        rolled_up: set = set()
+        pruned = 0
+
+        while True:
+            stmt = (
+                select(
+                    FxRate.id,
+                    FxRate.base_currency,
+                    FxRate.quote_currency,
+                    FxRate.rate,
+                    FxRate.rate_date,
+                )
+                .where(FxRate.rate_date < cutoff)
+                .order_by(FxRate.rate_date, FxRate.id)
+                .limit(batch_size)
+            )
+            result = await db.execute(stmt)
+            rows = result.all()
+
+            if not rows:
+                break
+
+            candles: Dict[CandleKey, List] = {}
+            for _, base_currency, quote_currency, rate, rate_date in rows:
+                key = (base_currency, quote_currency, rate_date.date())
+                candle = candles.get(key)
+                if candle is None:
+                    candles[key] = [rate, rate, rate, rate, 1]
+                else:
+                    candle[1] = max(candle[1], rate)
+                    candle[2] = min(candle[2], rate)
+                    candle[3] = rate
+                    candle[4] += 1
+
+            await self._merge_daily_candles(db, candles)
+            await db.execute(
+                delete(FxRate).where(FxRate.id.in_([row[0] for row in rows]))
+            )
+            await db.commit()
+
+            rolled_up.update(candles)
+            pruned += len(rows)
+
+        return len(rolled_up), pruned
+
+    async def _merge_daily_candles(
+        self,
+        db: AsyncSession,
+        candles: Dict[CandleKey, List],
+    ) -> None:
+        stmt = select(FxRateDaily).where(
+            tuple_(
+                FxRateDaily.base_currency,
+                FxRateDaily.quote_currency,
+                FxRateDaily.day,
+            ).in_(list(candles))
+        )
+        result = await db.execute(stmt)
+
+        # Batches are taken oldest-first, so an existing candle always
+        # precedes the new samples: keep its open, take our close.
+        for existing in result.scalars().all():
+            candle = candles[(existing.base_currency, existing.quote_currency, existing.day)]
+            candle[0] = existing.open_rate
+            candle[1] = max(candle[1], existing.high_rate)
+            candle[2] = min(candle[2], existing.low_rate)
+            candle[4] += existing.samples
+
+        updated_at = datetime.utcnow()
+        insert_stmt = dialect_insert(db, FxRateDaily).values([
+            {
+                "base_currency": base_currency,
+                "quote_currency": quote_currency,
+                "day": day,
+                "open_rate": open_rate,
+                "high_rate": high_rate,
+                "low_rate": low_rate,
+                "close_rate": close_rate,
+                "samples": samples,
+                "created_at": updated_at,
+                "updated_at": updated_at,
+            }
+            for (base_currency, quote_currency, day), (
+                open_rate, high_rate, low_rate, close_rate, samples
+            ) in candles.items()
+        ])
+        insert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[
+                FxRateDaily.base_currency,
+                FxRateDaily.quote_currency,
+                FxRateDaily.day,
+            ],
+            set_={
+                "open_rate": insert_stmt.excluded.open_rate,
+                "high_rate": insert_stmt.excluded.high_rate,
+                "low_rate": insert_stmt.excluded.low_rate,
+                "close_rate": insert_stmt.excluded.close_rate,
+                "samples": insert_stmt.excluded.samples,
+                "updated_at": insert_stmt.excluded.updated_at,
+            },
+        )
+        await db.execute(insert_stmt)
@@ -0,0 +1,160 @@
+import asyncio
+import json
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+import httpx
+from app.core.config import settings
+from app.utils.frankfurter_client import FrankfurterClient, frankfurter_client
+
+# quote currency -> (rate, source)
+ProviderRates = Dict[str, Tuple[Decimal, str]]
+
+
+class FxRateProvider:
+
+    name = "provider"
+
+    async def fetch(self, base_currency: str) -> Optional[ProviderRates]:
+        raise NotImplementedError
+
+    def confirm(self, base_currencies: Iterable[str]) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class FrankfurterProvider(FxRateProvider):
+
+    name = "frankfurter.app"
+
+    def __init__(self, client: Optional[FrankfurterClient] = None):
+        self.client = client or frankfurter_client
+
+    async def fetch(self, base_currency: str) -> Optional[ProviderRates]:
+        try:
+            rates = await self.client.fetch_latest(base_currency, conditional=True)
+        except httpx.HTTPError as e:
+            raise Exception(f"Failed to fetch exchange rates: {str(e)}")
+
+        if rates is None:
+            return None
+
+        return {quote: (rate, self.name) for quote, rate in rates.items()}
+
+    def confirm(self, base_currencies: Iterable[str]) -> None:
+        self.client.confirm_validators(base_currencies)
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+class StaticFxRateProvider(FxRateProvider):
+
+    name = "static"
+
+    def __init__(
+        self,
+        rates: Optional[Dict[str, Dict[str, Decimal]]] = None,
+        path: Optional[str] = None,
+    ):
+        if path:
+            with open(path) as rates_file:
+                raw = json.load(rates_file)
+            rates = {
+                base.upper(): {
+                    quote.upper(): Decimal(str(rate)) for quote, rate in quotes.items()
+                }
+                for base, quotes in raw.items()
+            }
+        self.rates = rates or {}
+
+    async def fetch(self, base_currency: str) -> Optional[ProviderRates]:
+        quotes = self.rates.get(base_currency)
+
+        if quotes is None:
+            # Derive the base from any table that quotes it.
+            for pivot, pivot_quotes in self.rates.items():
+                pivot_rate = pivot_quotes.get(base_currency)
+                if pivot_rate:
+                    quotes = {
+                        quote: rate / pivot_rate
+                        for quote, rate in pivot_quotes.items()
+                        if quote != base_currency
+                    }
+                    quotes[pivot] = Decimal("1.0") / pivot_rate
+                    break
+
+        if quotes is None:
+            raise Exception(f"No static exchange rates for {base_currency}")
+
+        return {quote: (rate, self.name) for quote, rate in quotes.items()}
+
+
+class MergedFxRateProvider(FxRateProvider):
+
+    def __init__(self, providers: List[FxRateProvider]):
+        self.providers = providers
+        self.name = "+".join(provider.name for provider in providers)
+        self._last: Dict[Tuple[int, str], ProviderRates] = {}
+
+    async def fetch(self, base_currency: str) -> Optional[ProviderRates]:
+        results = await asyncio.gather(
+            *(provider.fetch(base_currency) for provider in self.providers),
+            return_exceptions=True,
+        )
+
+        if all(result is None for result in results):
+            return None
+
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if len(errors) == len(results):
+            raise errors[0]
+
+        merged: ProviderRates = {}
+        # Lowest priority first, so earlier providers overwrite later ones.
+        for position in reversed(range(len(self.providers))):
+            result = results[position]
+            key = (position, base_currency)
+            if isinstance(result, BaseException):
+                continue
+            if result is None:
+                # Unchanged upstream: reuse what this provider said last time so
+                # a lower-priority source cannot override it.
+                result = self._last.get(key)
+                if result is None:
+                    continue
+            else:
+                self._last[key] = result
+            merged.update(result)
+
+        return merged
+
+    def confirm(self, base_currencies: Iterable[str]) -> None:
+        base_currencies = list(base_currencies)
+        for provider in self.providers:
+            provider.confirm(base_currencies)
+
+    async def close(self) -> None:
+        for provider in self.providers:
+            await provider.close()
+
+
+def build_fx_provider() -> FxRateProvider:
+    providers: List[FxRateProvider] = []
+
+    for name in settings.fx_providers_list:
+        if name == "frankfurter":
+            providers.append(FrankfurterProvider())
+        elif name == "static":
+            providers.append(StaticFxRateProvider(path=settings.fx_static_rates_path or None))
+        else:
+            raise ValueError(f"Unknown FX rate provider: {name}")
+
+    if len(providers) == 1:
+        return providers[0]
+
+    return MergedFxRateProvider(providers)
+
+
+fx_rate_provider = build_fx_provider()
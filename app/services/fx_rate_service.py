@@ -1,12 +1,54 @@
+import asyncio
+from functools import partial
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional, Dict
-import httpx
-from sqlalchemy import select, and_
+from typing import Optional, Dict, List, Tuple
+from sqlalchemy import select, and_, or_, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 from app.db.models.fx_rate import FxRate
+from app.db.models.fx_rate_latest import FxRateLatest
+from app.db.session import AsyncSessionLocal
+from app.db.upsert import dialect_insert
+from app.services.currency_registry import currency_registry
+from app.services.fx_providers import ProviderRates, fx_rate_provider
+from app.services.fx_snapshot import FxRateSnapshot, RATE_QUANTUM, fx_snapshot_store
 from app.utils.redis_client import redis_client
+from app.utils.timing import StageTimer
+
+
+FX_REFRESH_LOCK_TTL_SECONDS = 60
+
+_refresh_tasks: Dict[str, asyncio.Task] = {}
+
+
+def _on_refresh_done(base_currency: str, task: asyncio.Task) -> None:
+    if _refresh_tasks.get(base_currency) is task:
+        del _refresh_tasks[base_currency]
+    if not task.cancelled() and task.exception() is not None:
+        print(f"FX refresh for {base_currency} failed: {task.exception()}")
+
+
+class FxIngestReport:
+
+    def __init__(self, base_currencies: List[str]):
+        self.base_currencies = base_currencies
+        self.count = 0
+        self.unchanged: List[str] = []
+        self.skipped = 0
+        self.failed: Dict[str, str] = {}
+        self.version = 0
+        self.timer = StageTimer()
+
+    def summary(self) -> str:
+        return (
+            f"{self.count} rates imported for "
+            f"{len(self.base_currencies) - len(self.failed) - len(self.unchanged)}"
+            f"/{len(self.base_currencies)} base currencies "
+            f"({len(self.unchanged)} unchanged, {self.skipped} rates not moved), "
+            f"version {self.version} "
+            f"({self.timer.report()})"
+        )
 
 
 class FxRateService:
@@ -14,28 +56,30 @@ class FxRateService:
     def __init__(self):
         self.api_url = settings.frankfurter_api_url
         self.cache_ttl = settings.redis_cache_ttl
+        self.session_factory = AsyncSessionLocal
+        self.provider = fx_rate_provider
 
-    async def fetch_latest_rates(
+    async def fetch_rates_for_bases(
         self,
-        base_currency: str = "USD",
-    ) -> Dict[str, Decimal]:
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.api_url}/v1/latest",
-                    params={"base": base_currency},
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                data = response.json()
+        base_currencies: List[str],
+    ) -> Tuple[Dict[str, ProviderRates], List[str], Dict[str, str]]:
+        results = await asyncio.gather(
+            *(self.provider.fetch(base) for base in base_currencies),
+            return_exceptions=True,
+        )
 
-                rates = {base_currency: Decimal("1.0")}
-                for currency, rate in data.get("rates", {}).items():
-                    rates[currency] = Decimal(str(rate))
+        fetched: Dict[str, ProviderRates] = {}
+        unchanged: List[str] = []
+        failed: Dict[str, str] = {}
+        for base_currency, result in zip(base_currencies, results):
+            if isinstance(result, BaseException):
+                failed[base_currency] = str(result)
+            elif result is None:
+                unchanged.append(base_currency)
+            else:
+                fetched[base_currency] = result
 
-                return rates
-            except httpx.HTTPError as e:
-                raise Exception(f"Failed to fetch exchange rates: {str(e)}")
+        return fetched, unchanged, failed
 
     async def get_exchange_rate(
         self,
@@ -46,11 +90,16 @@ class FxRateService:
         if base_currency == quote_currency:
             return Decimal("1.0")
 
-        cache_key = f"fx_rate:{base_currency}:{quote_currency}"
+        cache_key = f"fx_rate:{fx_snapshot_store.version}:{base_currency}:{quote_currency}"
         cached_rate = await redis_client.get(cache_key)
         if cached_rate:
             return Decimal(cached_rate)
 
+        rate = await self._get_latest_table_rate(db, base_currency, quote_currency)
+        if rate is not None:
+            await redis_client.set(cache_key, str(rate), self.cache_ttl)
+            return rate
+
         stmt = (
             select(FxRate)
             .where(
@@ -92,31 +141,259 @@ class FxRateService:
 
         return None
 
+    async def _get_latest_table_rate(
+        self,
+        db: AsyncSession,
+        base_currency: str,
+        quote_currency: str,
+    ) -> Optional[Decimal]:
+        stmt = select(FxRateLatest).where(
+            or_(
+                and_(
+                    FxRateLatest.base_currency == base_currency,
+                    FxRateLatest.quote_currency == quote_currency,
+                ),
+                and_(
+                    FxRateLatest.base_currency == quote_currency,
+                    FxRateLatest.quote_currency == base_currency,
+                ),
+            )
+        )
+        result = await db.execute(stmt)
+        rows = {
+            (row.base_currency, row.quote_currency): row.rate
+            for row in result.scalars().all()
+        }
+
+        direct = rows.get((base_currency, quote_currency))
+        if direct is not None:
+            return direct
+
+        inverse = rows.get((quote_currency, base_currency))
+        if inverse:
+            return Decimal("1.0") / inverse
+
+        return None
+
+    async def write_rates(self, db: AsyncSession, rows: List[Dict]) -> None:
+        if not rows:
+            return
+
+        result = await db.execute(
+            insert(FxRate).returning(
+                FxRate.id, FxRate.base_currency, FxRate.quote_currency
+            ),
+            rows,
+        )
+        rate_ids = {
+            (base_currency, quote_currency): rate_id
+            for rate_id, base_currency, quote_currency in result.all()
+        }
+
+        updated_at = datetime.utcnow()
+        stmt = dialect_insert(db, FxRateLatest).values([
+            {
+                "base_currency": row["base_currency"],
+                "quote_currency": row["quote_currency"],
+                "rate": row["rate"],
+                "rate_date": row["rate_date"],
+                "source": row["source"],
+                "fx_rate_id": rate_ids[(row["base_currency"], row["quote_currency"])],
+                "checked_at": row["rate_date"],
+                "updated_at": updated_at,
+            }
+            for row in rows
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FxRateLatest.base_currency, FxRateLatest.quote_currency],
+            set_={
+                "rate": stmt.excluded.rate,
+                "rate_date": stmt.excluded.rate_date,
+                "source": stmt.excluded.source,
+                "fx_rate_id": stmt.excluded.fx_rate_id,
+                "checked_at": stmt.excluded.checked_at,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        await db.execute(stmt)
+
+    async def ingest_latest_rates(
+        self,
+        db: AsyncSession,
+        base_currencies: List[str],
+    ) -> FxIngestReport:
+        report = FxIngestReport(base_currencies)
+
+        with report.timer.stage("fetch"):
+            fetched, report.unchanged, report.failed = await self.fetch_rates_for_bases(
+                base_currencies
+            )
+
+        if not fetched and not report.unchanged:
+            raise Exception(
+                "Failed to fetch exchange rates: "
+                + "; ".join(f"{base}: {error}" for base, error in report.failed.items())
+            )
+
+        checked_at = datetime.utcnow()
+
+        with report.timer.stage("transform"):
+            current = await self._get_latest_table_rates(db, list(fetched))
+            rows = []
+            for base_currency, rates in fetched.items():
+                for quote_currency, (rate, source) in rates.items():
+                    if quote_currency == base_currency:
+                        continue
+
+                    rate = rate.quantize(RATE_QUANTUM)
+                    if current.get((base_currency, quote_currency)) == rate:
+                        report.skipped += 1
+                        continue
+
+                    rows.append({
+                        "base_currency": base_currency,
+                        "quote_currency": quote_currency,
+                        "rate": rate,
+                        "rate_date": checked_at,
+                        "source": source,
+                    })
+
+        with report.timer.stage("write"):
+            await self.write_rates(db, rows)
+            await self._touch_latest_rates(db, list(fetched) + report.unchanged, checked_at)
+            await currency_registry.register(
+                db,
+                {
+                    currency
+                    for base_currency, rates in fetched.items()
+                    for currency in (base_currency, *rates)
+                },
+            )
+            await db.commit()
+            self.provider.confirm(fetched)
+
+        with report.timer.stage("snapshot"):
+            snapshot = await fx_snapshot_store.refresh(db)
+            await fx_snapshot_store.publish_version(snapshot)
+
+        report.version = snapshot.version
+        report.count = len(rows)
+        return report
+
+    async def _get_latest_table_rates(
+        self,
+        db: AsyncSession,
+        base_currencies: List[str],
+    ) -> Dict[Tuple[str, str], Decimal]:
+        if not base_currencies:
+            return {}
+
+        stmt = select(
+            FxRateLatest.base_currency,
+            FxRateLatest.quote_currency,
+            FxRateLatest.rate,
+        ).where(FxRateLatest.base_currency.in_(base_currencies))
+        result = await db.execute(stmt)
+        return {(base, quote): rate for base, quote, rate in result.all()}
+
+    async def _touch_latest_rates(
+        self,
+        db: AsyncSession,
+        base_currencies: List[str],
+        checked_at: datetime,
+    ) -> None:
+        if not base_currencies:
+            return
+
+        await db.execute(
+            update(FxRateLatest)
+            .where(FxRateLatest.base_currency.in_(base_currencies))
+            .values(checked_at=checked_at)
+        )
+
     async def update_rates_from_api(
         self,
         db: AsyncSession,
         base_currency: str = "USD",
     ) -> int:
-        rates = await self.fetch_latest_rates(base_currency)
-        rate_date = datetime.utcnow()
-        count = 0
-
-        for quote_currency, rate in rates.items():
-            if quote_currency == base_currency:
-                continue
-
-            fx_rate = FxRate(
-                base_currency=base_currency,
-                quote_currency=quote_currency,
-                rate=rate,
-                rate_date=rate_date,
-                source="frankfurter.app",
-            )
-            db.add(fx_rate)
-            count += 1
+        report = await self.ingest_latest_rates(db, [base_currency])
+        return report.count
+
+    def get_snapshot(self) -> Optional[FxRateSnapshot]:
+        return fx_snapshot_store.snapshot
+
+    def is_stale(self, snapshot: FxRateSnapshot, base_currency: str) -> bool:
+        as_of = snapshot.as_of_for(base_currency)
+        if as_of is None:
+            return True
+        age = (datetime.utcnow() - as_of).total_seconds()
+        return age > settings.fx_rates_stale_after_seconds
+
+    def refresh_base(self, base_currency: str, background: bool = True) -> asyncio.Task:
+        task = _refresh_tasks.get(base_currency)
+        if task is None:
+            task = asyncio.create_task(self._refresh_base(base_currency, background))
+            task.add_done_callback(partial(_on_refresh_done, base_currency))
+            _refresh_tasks[base_currency] = task
+        return task
+
+    async def _refresh_base(self, base_currency: str, use_lock: bool) -> None:
+        lock_key = f"fx_refresh_lock:{base_currency}"
+        if use_lock and not await redis_client.set_if_absent(
+            lock_key, "1", FX_REFRESH_LOCK_TTL_SECONDS
+        ):
+            return
+
+        # The TTL only covers a process that dies mid-refresh; a finished or
+        # failed refresh lets the next stale read try again right away.
+        try:
+            async with self.session_factory() as db:
+                await self.ingest_latest_rates(db, [base_currency])
+        finally:
+            if use_lock:
+                await redis_client.delete(lock_key)
+
+    async def get_latest_rates(self, base_currency: str) -> FxRateSnapshot:
+        snapshot = fx_snapshot_store.snapshot
+        # Only configured bases are ever fetched upstream. Others may still be
+        # served from inverse or cross rates already in the snapshot.
+        configured = base_currency in settings.fx_base_currencies_list
+
+        if snapshot is None or not snapshot.has_base(base_currency):
+            if not configured:
+                raise ValueError(f"Exchange rates not available for {base_currency}")
+
+            await asyncio.shield(self.refresh_base(base_currency, background=False))
+            snapshot = fx_snapshot_store.snapshot
+
+            if snapshot is None or not snapshot.has_base(base_currency):
+                raise ValueError(f"Exchange rates not available for {base_currency}")
 
-        await db.commit()
-        return count
+        elif configured and self.is_stale(snapshot, base_currency):
+            self.refresh_base(base_currency)
+
+        return snapshot
+
+    async def resolve_rate(
+        self,
+        db: AsyncSession,
+        from_currency: str,
+        to_currency: str,
+        snapshot: Optional[FxRateSnapshot] = None,
+    ) -> Optional[Decimal]:
+        if from_currency == to_currency:
+            return Decimal("1.0")
+
+        snapshot = snapshot or fx_snapshot_store.snapshot
+        rate = snapshot.get_rate(from_currency, to_currency) if snapshot else None
+
+        if rate is None:
+            rate = await self.get_exchange_rate(db, from_currency, to_currency)
+
+        return rate
+
+    def quantize_amount(self, amount: Decimal, currency: str) -> Decimal:
+        return amount.quantize(currency_registry.quantum(currency))
 
     async def convert_amount(
         self,
@@ -124,36 +401,56 @@ class FxRateService:
         amount: Decimal,
         from_currency: str,
         to_currency: str,
+        snapshot: Optional[FxRateSnapshot] = None,
     ) -> tuple[Decimal, Decimal]:
         if from_currency == to_currency:
             return amount, Decimal("1.0")
 
-        rate = await self.get_exchange_rate(db, from_currency, to_currency)
+        rate = await self.resolve_rate(db, from_currency, to_currency, snapshot)
 
         if rate is None:
             raise ValueError(
                 f"Exchange rate not available for {from_currency}/{to_currency}"
             )
 
-        converted_amount = amount * rate
-        converted_amount = converted_amount.quantize(Decimal("0.01"))
+        converted_amount = self.quantize_amount(amount * rate, to_currency)
 
         return converted_amount, rate
 
-    async def get_all_supported_currencies(self, db: AsyncSession) -> list[str]:
-        cache_key = "fx_currencies:all"
-        cached_currencies = await redis_client.get_json(cache_key)
-        if cached_currencies:
-            return cached_currencies
+    async def convert_many(
+        self,
+        db: AsyncSession,
+        items: List[Tuple[Decimal, str, str]],
+        snapshot: Optional[FxRateSnapshot] = None,
+    ) -> List[Tuple[Optional[Decimal], Optional[Decimal]]]:
+        snapshot = snapshot or fx_snapshot_store.snapshot
 
-        stmt = select(FxRate.quote_currency).distinct()
-        result = await db.execute(stmt)
-        currencies = [row[0] for row in result.fetchall()]
+        rates: Dict[Tuple[str, str], Optional[Decimal]] = {}
+        for _, from_currency, to_currency in items:
+            pair = (from_currency, to_currency)
+            if pair not in rates:
+                rates[pair] = await self.resolve_rate(
+                    db, from_currency, to_currency, snapshot
+                )
 
-        stmt = select(FxRate.base_currency).distinct()
-        result = await db.execute(stmt)
-        base_currencies = [row[0] for row in result.fetchall()]
+        results: List[Tuple[Optional[Decimal], Optional[Decimal]]] = []
+        for amount, from_currency, to_currency in items:
+            rate = rates[(from_currency, to_currency)]
+            if from_currency == to_currency:
+                results.append((amount, rate))
+            elif rate is None:
+                results.append((None, None))
+            else:
+                results.append((self.quantize_amount(amount * rate, to_currency), rate))
+
+        return results
+
+    async def get_all_supported_currencies(self, db: AsyncSession) -> list[str]:
+        if not len(currency_registry):
+            snapshot = fx_snapshot_store.snapshot
+            await currency_registry.load(db, snapshot.currencies if snapshot else None)
+        return list(currency_registry.codes)
 
-        all_currencies = sorted(list(set(currencies + base_currencies)))
-        await redis_client.set_json(cache_key, all_currencies, self.cache_ttl)
-        return all_currencies
+    async def get_currency_details(self, db: AsyncSession) -> List[Dict]:
+        await self.get_all_supported_currencies(db)
+        return currency_registry.details()
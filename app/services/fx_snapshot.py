@@ -0,0 +1,274 @@
+import asyncio
+import json
+from datetime import datetime
+from decimal import Decimal
+from itertools import permutations
+from types import MappingProxyType
+from typing import Callable, Dict, FrozenSet, Mapping, Optional, Tuple
+from sqlalchemy import select, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.models.fx_rate import FxRate
+from app.db.models.fx_rate_latest import FxRateLatest
+from app.services.currency_registry import currency_registry
+from app.utils.redis_client import redis_client
+
+
+CROSS_RATE_PIVOTS = ("USD", "EUR")
+RATE_QUANTUM = Decimal("0.00000001")
+
+RateMatrix = Dict[Tuple[str, str], Decimal]
+
+
+def build_rate_matrix(direct_rates: Mapping[Tuple[str, str], Decimal]) -> RateMatrix:
+    matrix: RateMatrix = {
+        pair: rate for pair, rate in direct_rates.items() if pair[0] != pair[1]
+    }
+
+    for (base, quote), rate in list(matrix.items()):
+        if (quote, base) not in matrix and rate != 0:
+            matrix[(quote, base)] = (Decimal("1.0") / rate).quantize(RATE_QUANTUM)
+
+    currencies = {currency for pair in matrix for currency in pair}
+
+    for base, quote in permutations(sorted(currencies), 2):
+        if (base, quote) in matrix:
+            continue
+
+        for pivot in CROSS_RATE_PIVOTS:
+            to_pivot = matrix.get((base, pivot))
+            from_pivot = matrix.get((pivot, quote))
+            if to_pivot is not None and from_pivot is not None:
+                matrix[(base, quote)] = (to_pivot * from_pivot).quantize(RATE_QUANTUM)
+                break
+
+    return matrix
+
+
+class FxRateSnapshot:
+
+    __slots__ = (
+        "_rates",
+        "_by_base",
+        "_currency_as_of",
+        "_currencies",
+        "version",
+        "as_of",
+        "loaded_at",
+    )
+
+    def __init__(
+        self,
+        rates: Mapping[Tuple[str, str], Decimal],
+        version: int,
+        as_of: Optional[datetime],
+        currency_as_of: Optional[Mapping[str, datetime]] = None,
+    ):
+        by_base: Dict[str, Dict[str, Decimal]] = {}
+        for (base, quote), rate in rates.items():
+            by_base.setdefault(base, {})[quote] = rate
+
+        object.__setattr__(self, "_rates", MappingProxyType(dict(rates)))
+        object.__setattr__(
+            self,
+            "_by_base",
+            MappingProxyType(
+                {base: MappingProxyType(quotes) for base, quotes in by_base.items()}
+            ),
+        )
+        object.__setattr__(
+            self, "_currency_as_of", MappingProxyType(dict(currency_as_of or {}))
+        )
+        object.__setattr__(
+            self,
+            "_currencies",
+            frozenset(currency for pair in rates for currency in pair),
+        )
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "as_of", as_of)
+        object.__setattr__(self, "loaded_at", datetime.utcnow())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FxRateSnapshot is immutable")
+
+    def __len__(self) -> int:
+        return len(self._rates)
+
+    @property
+    def currencies(self) -> FrozenSet[str]:
+        return self._currencies
+
+    def has_pair(self, base_currency: str, quote_currency: str) -> bool:
+        return (base_currency, quote_currency) in self._rates
+
+    def get_rate(self, base_currency: str, quote_currency: str) -> Optional[Decimal]:
+        if base_currency == quote_currency:
+            return Decimal("1.0")
+        return self._rates.get((base_currency, quote_currency))
+
+    def has_base(self, base_currency: str) -> bool:
+        return base_currency in self._by_base
+
+    def rates_for(self, base_currency: str) -> Dict[str, Decimal]:
+        return dict(self._by_base.get(base_currency, {}))
+
+    def as_of_for(self, currency: str) -> Optional[datetime]:
+        return self._currency_as_of.get(currency, self.as_of)
+
+    def __repr__(self) -> str:
+        return (
+            f"<FxRateSnapshot(version={self.version}, pairs={len(self._rates)}, "
+            f"as_of={self.as_of})>"
+        )
+
+
+async def _load_latest_from_history(db: AsyncSession):
+    latest = (
+        select(
+            FxRate.base_currency,
+            FxRate.quote_currency,
+            func.max(FxRate.rate_date).label("rate_date"),
+        )
+        .group_by(FxRate.base_currency, FxRate.quote_currency)
+        .subquery()
+    )
+
+    stmt = (
+        select(
+            FxRate.id,
+            FxRate.base_currency,
+            FxRate.quote_currency,
+            FxRate.rate,
+            FxRate.rate_date,
+        )
+        .join(
+            latest,
+            and_(
+                FxRate.base_currency == latest.c.base_currency,
+                FxRate.quote_currency == latest.c.quote_currency,
+                FxRate.rate_date == latest.c.rate_date,
+            ),
+        )
+        .order_by(FxRate.id)
+    )
+
+    result = await db.execute(stmt)
+    return result.all()
+
+
+async def load_fx_snapshot(db: AsyncSession) -> FxRateSnapshot:
+    result = await db.execute(
+        select(
+            FxRateLatest.fx_rate_id,
+            FxRateLatest.base_currency,
+            FxRateLatest.quote_currency,
+            FxRateLatest.rate,
+            FxRateLatest.checked_at,
+        )
+    )
+    rows = result.all()
+
+    if not rows:
+        # Databases populated before fx_rates_latest existed.
+        rows = await _load_latest_from_history(db)
+
+    direct_rates: RateMatrix = {}
+    currency_as_of: Dict[str, datetime] = {}
+    version = 0
+
+    for rate_id, base_currency, quote_currency, rate, rate_date in rows:
+        direct_rates[(base_currency, quote_currency)] = rate
+        version = max(version, rate_id)
+        for currency in (base_currency, quote_currency):
+            if currency not in currency_as_of or rate_date > currency_as_of[currency]:
+                currency_as_of[currency] = rate_date
+
+    as_of = max(currency_as_of.values()) if currency_as_of else None
+
+    return FxRateSnapshot(
+        build_rate_matrix(direct_rates), version, as_of, currency_as_of
+    )
+
+
+class FxSnapshotStore:
+
+    def __init__(self):
+        self._snapshot: Optional[FxRateSnapshot] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def snapshot(self) -> Optional[FxRateSnapshot]:
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version if self._snapshot is not None else 0
+
+    async def refresh(self, db: AsyncSession) -> FxRateSnapshot:
+        async with self._lock:
+            snapshot = await load_fx_snapshot(db)
+            await currency_registry.load(db, snapshot.currencies)
+            # Readers hold a reference to the old snapshot, so a plain
+            # reassignment is the whole swap.
+            self._snapshot = snapshot
+            return snapshot
+
+    def clear(self) -> None:
+        self._snapshot = None
+
+    async def publish_version(self, snapshot: FxRateSnapshot) -> None:
+        await redis_client.publish_json(
+            settings.fx_rates_channel,
+            {
+                "version": snapshot.version,
+                "as_of": snapshot.as_of.isoformat() if snapshot.as_of else None,
+            },
+        )
+
+    async def watch(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        retry_delay: float = 5.0,
+    ) -> None:
+        while True:
+            pubsub = redis_client.pubsub()
+            if pubsub is None:
+                return
+
+            try:
+                await pubsub.subscribe(settings.fx_rates_channel)
+
+                # Catch up on anything published while we were not subscribed.
+                async with session_factory() as db:
+                    await self.refresh(db)
+
+                async for message in pubsub.listen():
+                    try:
+                        payload = json.loads(message["data"])
+                        version = int(payload["version"])
+                        as_of = (
+                            datetime.fromisoformat(payload["as_of"])
+                            if payload.get("as_of") else None
+                        )
+                    except (KeyError, TypeError, ValueError):
+                        continue
+
+                    current = self._snapshot
+                    if current is not None and version <= current.version and (
+                        as_of is None or (current.as_of and as_of <= current.as_of)
+                    ):
+                        continue
+
+                    async with session_factory() as db:
+                        await self.refresh(db)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"FX snapshot watcher error: {e}")
+                await asyncio.sleep(retry_delay)
+            finally:
+                await pubsub.aclose()
+
+
+fx_snapshot_store = FxSnapshotStore()
@@ -0,0 +1,179 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.models.account import Account
+from app.db.models.ledger_checkpoint import LedgerCheckpoint
+from app.db.models.ledger_entry import LedgerEntry
+from app.db.upsert import dialect_insert
+from app.services.fx_history_service import to_naive_utc
+
+EPOCH = datetime(1970, 1, 1)
+
+BalanceAt = Tuple[Decimal, str]
+
+
+def checkpoint_boundary(now: datetime) -> datetime:
+    # Entries get created_at before their transaction commits, so a boundary
+    # is only checkpointed once late commits for it can no longer arrive.
+    interval = max(settings.ledger_checkpoint_interval_seconds, 1)
+    settled = now - timedelta(seconds=settings.ledger_checkpoint_settle_seconds)
+    seconds = int((settled - EPOCH).total_seconds()) // interval * interval
+    return EPOCH + timedelta(seconds=seconds)
+
+
+class LedgerService:
+
+    async def create_checkpoints(
+        self,
+        db: AsyncSession,
+        as_of: Optional[datetime] = None,
+    ) -> int:
+        as_of = as_of or checkpoint_boundary(datetime.utcnow())
+
+        result = await db.execute(select(func.max(LedgerCheckpoint.as_of)))
+        previous = result.scalar_one_or_none()
+        if previous is not None and previous >= as_of:
+            return 0
+
+        # Only accounts that moved since the previous boundary get a new
+        # checkpoint; the others are still covered by their last one.
+        conditions = [LedgerEntry.created_at <= as_of]
+        if previous is not None:
+            conditions.append(LedgerEntry.created_at > previous)
+
+        ranked = (
+            select(
+                LedgerEntry.account_id,
+                LedgerEntry.id,
+                LedgerEntry.balance_after,
+                func.row_number().over(
+                    partition_by=LedgerEntry.account_id,
+                    order_by=(LedgerEntry.created_at.desc(), LedgerEntry.id.desc()),
+                ).label("position"),
+            )
+            .where(*conditions)
+            .subquery()
+        )
+        result = await db.execute(
+            select(ranked.c.account_id, ranked.c.id, ranked.c.balance_after)
+            .where(ranked.c.position == 1)
+        )
+        rows = [
+            {
+                "account_id": account_id,
+                "as_of": as_of,
+                "balance": balance,
+                "last_entry_id": entry_id,
+                "created_at": datetime.utcnow(),
+            }
+            for account_id, entry_id, balance in result.all()
+        ]
+
+        if rows:
+            stmt = dialect_insert(db, LedgerCheckpoint)
+            await db.execute(
+                stmt.on_conflict_do_nothing(index_elements=["account_id", "as_of"]),
+                rows,
+            )
+        await db.commit()
+
+        return len(rows)
+
+    async def get_balances_at(
+        self,
+        db: AsyncSession,
+        account_ids: List[int],
+        at: datetime,
+    ) -> Dict[int, Optional[BalanceAt]]:
+        if not account_ids:
+            return {}
+        at = to_naive_utc(at)
+
+        # Every lookup is a correlated LIMIT 1 subquery: a seek on the
+        # checkpoint key, then a seek on (account_id, created_at) bounded by
+        # that checkpoint. Nothing scans an account's history.
+        def checkpoint(column):
+            return (
+                select(column)
+                .where(
+                    LedgerCheckpoint.account_id == Account.id,
+                    LedgerCheckpoint.as_of <= at,
+                )
+                .order_by(LedgerCheckpoint.as_of.desc())
+                .limit(1)
+                .correlate(Account)
+                .scalar_subquery()
+            )
+
+        checkpoint_at = checkpoint(LedgerCheckpoint.as_of)
+        latest_entry_balance = (
+            select(LedgerEntry.balance_after)
+            .where(
+                LedgerEntry.account_id == Account.id,
+                LedgerEntry.created_at <= at,
+                LedgerEntry.created_at > func.coalesce(checkpoint_at, EPOCH),
+            )
+            .order_by(LedgerEntry.created_at.desc(), LedgerEntry.id.desc())
+            .limit(1)
+            .correlate(Account)
+            .scalar_subquery()
+        )
+
+        result = await db.execute(
+            select(
+                Account.id,
+                Account.currency,
+                func.coalesce(
+                    latest_entry_balance, checkpoint(LedgerCheckpoint.balance)
+                ),
+            )
+            .where(Account.id.in_(set(account_ids)))
+        )
+
+        balances: Dict[int, Optional[BalanceAt]] = {
+            account_id: None for account_id in account_ids
+        }
+        for account_id, currency, balance in result.all():
+            if balance is not None:
+                balances[account_id] = (Decimal(balance), currency)
+        return balances
+
+    async def get_balance_at(
+        self,
+        db: AsyncSession,
+        account_id: int,
+        at: datetime,
+    ) -> Optional[BalanceAt]:
+        balances = await self.get_balances_at(db, [account_id], at)
+        return balances[account_id]
+
+    async def stream_entries(
+        self,
+        db: AsyncSession,
+        account_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[List[LedgerEntry]]:
+        batch_size = batch_size or settings.statement_stream_batch_size
+
+        conditions = [LedgerEntry.account_id == account_id]
+        if start is not None:
+            conditions.append(LedgerEntry.created_at >= to_naive_utc(start))
+        if end is not None:
+            conditions.append(LedgerEntry.created_at < to_naive_utc(end))
+
+        # A server-side cursor fetching batch_size rows at a time; the
+        # session holds entries weakly, so a yielded batch is freed once the
+        # caller is done with it.
+        result = await db.stream_scalars(
+            select(LedgerEntry)
+            .where(*conditions)
+            .order_by(LedgerEntry.created_at, LedgerEntry.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for entries in result.partitions():
+            yield entries
@@ -0,0 +1,153 @@
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select, insert, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.models.outbox_message import OutboxMessage
+from app.db.models.transfer import Transfer
+from app.services.transfer_service import TransferService
+from app.utils.message_broker import (
+    DEFAULT_TRANSFER_LANE,
+    message_broker,
+    transfer_lane_priority,
+    transfer_queue_arguments,
+    transfer_queue_for_account,
+    transfer_task_payload,
+)
+
+OUTBOX_RELAY_LOCK_ID = 7104330261
+
+
+class OutboxService:
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        messages: List[Tuple[str, Dict[str, Any]]],
+        priority: int = 0,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if not messages:
+            return
+
+        await db.execute(
+            insert(OutboxMessage),
+            [
+                {
+                    "queue_name": queue_name,
+                    "payload": payload,
+                    "arguments": arguments,
+                    "priority": priority,
+                }
+                for queue_name, payload in messages
+            ],
+        )
+
+    async def enqueue_transfer_tasks(
+        self,
+        db: AsyncSession,
+        transfers: List[Transfer],
+        lanes: Optional[Dict[int, str]] = None,
+        trace_id: Optional[str] = None,
+    ) -> None:
+        lanes = lanes or {}
+        trace_id = trace_id or uuid.uuid4().hex
+        enqueued_at = time.time()
+        transfer_service = TransferService()
+
+        by_lane: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        for transfer in transfers:
+            lane = lanes.get(transfer.id, DEFAULT_TRANSFER_LANE)
+            by_lane.setdefault(lane, []).append((
+                transfer_queue_for_account(transfer.from_account_id),
+                transfer_task_payload(
+                    transfer.id,
+                    transfer.from_account_id,
+                    lane,
+                    snapshot=(
+                        transfer_service.transfer_snapshot(transfer)
+                        if settings.transfer_task_snapshots else None
+                    ),
+                    trace_id=trace_id,
+                    enqueued_at=enqueued_at,
+                ),
+            ))
+
+        for lane, messages in by_lane.items():
+            await self.enqueue(
+                db,
+                messages,
+                priority=transfer_lane_priority(lane),
+                arguments=transfer_queue_arguments() or None,
+            )
+
+    async def enqueue_notification(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        message: str,
+        notification_type: str = "info",
+    ) -> None:
+        await self.enqueue(
+            db,
+            [(
+                settings.rabbitmq_notification_queue,
+                {"user_id": user_id, "message": message, "type": notification_type},
+            )],
+        )
+
+    async def _take_relay_lock(self, db: AsyncSession) -> bool:
+        if db.get_bind().dialect.name != "postgresql":
+            return True
+        result = await db.execute(
+            select(func.pg_try_advisory_xact_lock(OUTBOX_RELAY_LOCK_ID))
+        )
+        return bool(result.scalar_one())
+
+    async def relay_batch(self, db: AsyncSession, batch_size: int) -> int:
+        # Publish order has to follow commit order, or a newer task for an
+        # account could overtake an older one. Batches are therefore
+        # serialized across relay replicas: a replica that misses the
+        # advisory lock idles until the batch holding it has committed.
+        if not await self._take_relay_lock(db):
+            await db.rollback()
+            return 0
+
+        result = await db.execute(
+            select(OutboxMessage)
+            .order_by(OutboxMessage.id)
+            .limit(batch_size)
+            .with_for_update()
+        )
+        messages = list(result.scalars().all())
+        if not messages:
+            await db.rollback()
+            return 0
+
+        groups: Dict[Tuple[str, int, str], List[Dict[str, Any]]] = {}
+        for message in messages:
+            key = (
+                message.queue_name,
+                message.priority,
+                json.dumps(message.arguments, sort_keys=True),
+            )
+            groups.setdefault(key, []).append(message.payload)
+
+        for (queue_name, priority, arguments), payloads in groups.items():
+            await message_broker.publish_many(
+                queue_name,
+                payloads,
+                priority=priority,
+                arguments=json.loads(arguments),
+                tasks_per_message=settings.broker_tasks_per_message,
+            )
+
+        await db.execute(
+            delete(OutboxMessage)
+            .where(OutboxMessage.id.in_([message.id for message in messages]))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return len(messages)
@@ -1,8 +1,10 @@
 from decimal import Decimal
 from datetime import datetime
-from typing import Optional, List
-from sqlalchemy import select, or_
+from typing import Any, Optional, List, Dict, Tuple, Union
+from sqlalchemy import select, or_, insert, update, case
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 from app.core.config import settings
 from app.db.models.transfer import Transfer, TransferStatus
 from app.db.models.account import Account
@@ -10,7 +12,23 @@ from app.db.models.ledger_entry import LedgerEntry, LedgerEntryType
 from app.db.models.user import User
 from app.services.fx_rate_service import FxRateService
 from app.services.account_service import AccountService
-from app.schemas.transfer import TransferCreate
+from app.schemas.transfer import TransferCreate, TransferBatchItem
+
+SNAPSHOT_DECIMAL_FIELDS = (
+    "from_amount",
+    "to_amount",
+    "exchange_rate",
+    "commission_amount",
+    "hold_amount",
+)
+SNAPSHOT_FIELDS = (
+    "id",
+    "user_id",
+    "from_account_id",
+    "to_account_id",
+    "from_currency",
+    "to_currency",
+) + SNAPSHOT_DECIMAL_FIELDS
 
 
 class TransferService:
@@ -68,18 +86,25 @@ class TransferService:
 
         from_currency = from_account.currency
         to_currency = to_account.currency
+        snapshot = self.fx_service.get_snapshot()
 
         if transfer_data.from_amount is not None:
             from_amount = transfer_data.from_amount
             to_amount, exchange_rate = await self.fx_service.convert_amount(
-                db, from_amount, from_currency, to_currency
+                db, from_amount, from_currency, to_currency, snapshot
+            )
+            priced_by_snapshot = snapshot is not None and snapshot.has_pair(
+                from_currency, to_currency
             )
         else:
             to_amount = transfer_data.to_amount
             from_amount, inverse_rate = await self.fx_service.convert_amount(
-                db, to_amount, to_currency, from_currency
+                db, to_amount, to_currency, from_currency, snapshot
             )
             exchange_rate = Decimal("1.0") / inverse_rate if inverse_rate != 0 else Decimal("1.0")
+            priced_by_snapshot = snapshot is not None and snapshot.has_pair(
+                to_currency, from_currency
+            )
 
         commission = self.calculate_commission(
             from_amount,
@@ -89,10 +114,9 @@ class TransferService:
 
         total_debit = from_amount + commission
 
-        if not await self.account_service.check_sufficient_balance(
-            from_account, total_debit
-        ):
-            raise ValueError("Insufficient funds")
+        # Reserve the debit now so queued transfers cannot overdraw the
+        # account between creation and execution.
+        await self.account_service.place_hold(db, from_account.id, total_debit)
 
         transfer = Transfer(
             from_account_id=from_account.id,
@@ -102,7 +126,9 @@ class TransferService:
             from_amount=from_amount,
             to_amount=to_amount,
             exchange_rate=exchange_rate,
+            fx_snapshot_version=snapshot.version if priced_by_snapshot else None,
             commission_amount=commission,
+            hold_amount=total_debit,
             fixed_commission=from_account.fixed_commission or Decimal("0.00"),
             percentage_commission=from_account.percentage_commission or Decimal("0.00"),
             status=TransferStatus.CREATED,
@@ -117,69 +143,449 @@ class TransferService:
 
         return transfer
 
-    async def execute_transfer(
+    def qualifies_for_sync(self, transfer: Transfer) -> bool:
+        return (
+            transfer.from_currency == transfer.to_currency
+            and transfer.exchange_rate == Decimal("1.0")
+            and transfer.from_amount <= Decimal(str(settings.sync_transfer_max_amount))
+        )
+
+    def transfer_snapshot(self, transfer: Transfer) -> Dict[str, Any]:
+        snapshot = {field: getattr(transfer, field) for field in SNAPSHOT_FIELDS}
+        for field in SNAPSHOT_DECIMAL_FIELDS:
+            snapshot[field] = str(snapshot[field])
+        snapshot["status"] = transfer.status.value
+        return snapshot
+
+    def transfer_from_snapshot(
         self,
         db: AsyncSession,
-        transfer: Transfer,
+        snapshot: Dict[str, Any],
     ) -> Transfer:
-        try:
-            transfer.status = TransferStatus.PROCESSING
-            await db.flush()
+        # Tasks enqueued before holds existed carry no hold_amount.
+        values = {field: snapshot.get(field, "0") for field in SNAPSHOT_FIELDS}
+        for field in SNAPSHOT_DECIMAL_FIELDS:
+            values[field] = Decimal(values[field])
+        values["status"] = TransferStatus(snapshot["status"])
+
+        # Attached as already persisted, so no SELECT is issued. Amounts never
+        # change after creation and the claim in _apply_transfer re-checks
+        # the status, so a stale snapshot cannot apply a transfer twice.
+        transfer = Transfer(**values)
+        make_transient_to_detached(transfer)
+        db.add(transfer)
+        return transfer
 
-            from_account = await self.account_service.get_account_by_id(
-                db, transfer.from_account_id
+    async def transfer_lanes(
+        self,
+        db: AsyncSession,
+        transfers: List[Transfer],
+        bulk: bool = False,
+    ) -> Dict[int, str]:
+        if not transfers:
+            return {}
+
+        result = await db.execute(
+            select(Account.id, Account.tier).where(
+                Account.id.in_({transfer.from_account_id for transfer in transfers})
             )
-            to_account = await self.account_service.get_account_by_id(
-                db, transfer.to_account_id
+        )
+        tiers = {account_id: (tier or "").lower() for account_id, tier in result.all()}
+        express_tiers = settings.transfer_express_tiers_list
+        express_max = Decimal(str(settings.transfer_express_max_amount))
+        bulk_min = Decimal(str(settings.transfer_bulk_min_amount))
+
+        # Batch uploads always take the bulk lane, whatever the amounts, so a
+        # payroll run of small payments cannot flood the express lane.
+        lanes = {}
+        for transfer in transfers:
+            if bulk:
+                lanes[transfer.id] = "bulk"
+            elif (
+                tiers.get(transfer.from_account_id) in express_tiers
+                or transfer.from_amount <= express_max
+            ):
+                lanes[transfer.id] = "express"
+            elif transfer.from_amount >= bulk_min:
+                lanes[transfer.id] = "bulk"
+            else:
+                lanes[transfer.id] = "standard"
+        return lanes
+
+    async def create_transfers(
+        self,
+        db: AsyncSession,
+        user: User,
+        items: List[Union[TransferBatchItem, str]],
+    ) -> List[Tuple[str, Optional[Transfer], Optional[str]]]:
+        outcomes: List[Optional[Tuple[str, Optional[Transfer], Optional[str]]]] = [
+            ("error", None, item) if isinstance(item, str) else None
+            for item in items
+        ]
+        pending = [
+            (index, item) for index, item in enumerate(items)
+            if not isinstance(item, str)
+        ]
+
+        keys = {item.idempotency_key for _, item in pending if item.idempotency_key}
+        existing: Dict[str, Transfer] = {}
+        if keys:
+            result = await db.execute(
+                select(Transfer).where(Transfer.idempotency_key.in_(keys))
             )
-
-            if not from_account or not to_account:
-                raise ValueError("Account not found")
-
-            total_debit = transfer.from_amount + transfer.commission_amount
-            await self.account_service.update_balance(
-                db, from_account, -total_debit
+            existing = {
+                transfer.idempotency_key: transfer
+                for transfer in result.scalars().all()
+            }
+
+        account_ids = {item.from_account_id for _, item in pending} | {
+            item.to_account_id for _, item in pending
+        }
+        accounts: Dict[int, Account] = {}
+        if account_ids:
+            # Holds are placed with Core updates, so accounts already in the
+            # session may carry a stale held_balance.
+            result = await db.execute(
+                select(Account)
+                .where(Account.id.in_(account_ids))
+                .execution_options(populate_existing=True)
             )
+            accounts = {account.id: account for account in result.scalars().all()}
+
+        seen_keys = set()
+        priced = []
+        for index, item in pending:
+            key = item.idempotency_key
+            if key and key in existing:
+                if existing[key].user_id != user.id:
+                    outcomes[index] = (
+                        "error", None, "Idempotency key already used by another user"
+                    )
+                else:
+                    outcomes[index] = ("existing", existing[key], None)
+                continue
+            if key and key in seen_keys:
+                outcomes[index] = ("error", None, "Duplicate idempotency key in batch")
+                continue
+
+            from_account = accounts.get(item.from_account_id)
+            to_account = accounts.get(item.to_account_id)
+            if not from_account:
+                outcomes[index] = ("error", None, "Source account not found")
+            elif not to_account:
+                outcomes[index] = ("error", None, "Destination account not found")
+            elif from_account.user_id != user.id:
+                outcomes[index] = ("error", None, "You don't own the source account")
+            else:
+                if key:
+                    seen_keys.add(key)
+                priced.append((index, item, from_account, to_account))
+
+        snapshot = self.fx_service.get_snapshot()
+        conversions = await self.fx_service.convert_many(
+            db,
+            [
+                (item.from_amount, from_account.currency, to_account.currency)
+                if item.from_amount is not None
+                else (item.to_amount, to_account.currency, from_account.currency)
+                for _, item, from_account, to_account in priced
+            ],
+            snapshot,
+        )
 
-            debit_entry = LedgerEntry(
-                account_id=from_account.id,
-                transfer_id=transfer.id,
-                entry_type=LedgerEntryType.DEBIT,
-                amount=total_debit,
-                currency=from_account.currency,
-                balance_after=from_account.balance,
-                description=f"Transfer to account {to_account.id}",
+        debits: Dict[int, Decimal] = {}
+        rows = []
+        row_indexes = []
+        for (index, item, from_account, to_account), (converted, rate) in zip(
+            priced, conversions
+        ):
+            from_currency = from_account.currency
+            to_currency = to_account.currency
+            if rate is None:
+                outcomes[index] = (
+                    "error",
+                    None,
+                    f"Exchange rate not available for {from_currency}/{to_currency}",
+                )
+                continue
+
+            if item.from_amount is not None:
+                from_amount, to_amount, exchange_rate = item.from_amount, converted, rate
+                pair = (from_currency, to_currency)
+            else:
+                from_amount, to_amount = converted, item.to_amount
+                exchange_rate = Decimal("1.0") / rate if rate != 0 else Decimal("1.0")
+                pair = (to_currency, from_currency)
+
+            commission = self.calculate_commission(
+                from_amount,
+                from_account.fixed_commission,
+                from_account.percentage_commission,
             )
-            db.add(debit_entry)
 
-            await self.account_service.update_balance(
-                db, to_account, transfer.to_amount
+            # Items are checked in order against what earlier items in the
+            # same batch already committed to spend.
+            hold_amount = from_amount + commission
+            total_debit = debits.get(from_account.id, Decimal("0")) + hold_amount
+            if total_debit > from_account.available_balance:
+                outcomes[index] = ("error", None, "Insufficient funds")
+                continue
+            debits[from_account.id] = total_debit
+
+            priced_by_snapshot = snapshot is not None and snapshot.has_pair(*pair)
+            rows.append({
+                "from_account_id": from_account.id,
+                "to_account_id": to_account.id,
+                "from_currency": from_currency,
+                "to_currency": to_currency,
+                "from_amount": from_amount,
+                "to_amount": to_amount,
+                "exchange_rate": exchange_rate,
+                "fx_snapshot_version": snapshot.version if priced_by_snapshot else None,
+                "commission_amount": commission,
+                "hold_amount": hold_amount,
+                "fixed_commission": from_account.fixed_commission or Decimal("0.00"),
+                "percentage_commission": (
+                    from_account.percentage_commission or Decimal("0.00")
+                ),
+                "status": TransferStatus.CREATED,
+                "user_id": user.id,
+                "idempotency_key": item.idempotency_key,
+                "description": item.description,
+            })
+            row_indexes.append(index)
+
+        # The check above read balances without a lock. The holds are placed
+        # atomically, and an account that lost a race meanwhile fails all of
+        # its items rather than some of them.
+        held = await self.account_service.place_holds(db, debits)
+        kept = [
+            (index, row) for index, row in zip(row_indexes, rows)
+            if row["from_account_id"] in held
+        ]
+        for index, row in zip(row_indexes, rows):
+            if row["from_account_id"] not in held:
+                outcomes[index] = ("error", None, "Insufficient funds")
+        row_indexes = [index for index, _ in kept]
+        rows = [row for _, row in kept]
+
+        if rows:
+            result = await db.scalars(
+                insert(Transfer).returning(Transfer, sort_by_parameter_order=True),
+                rows,
             )
+            for index, transfer in zip(row_indexes, result.all()):
+                outcomes[index] = ("created", transfer, None)
 
-            credit_entry = LedgerEntry(
-                account_id=to_account.id,
-                transfer_id=transfer.id,
-                entry_type=LedgerEntryType.CREDIT,
-                amount=transfer.to_amount,
-                currency=to_account.currency,
-                balance_after=to_account.balance,
-                description=f"Transfer from account {from_account.id}",
+        return outcomes
+
+    async def load_destinations(
+        self,
+        db: AsyncSession,
+        transfers: List[Transfer],
+    ) -> Dict[int, Tuple[str, bool]]:
+        result = await db.execute(
+            select(Account.id, Account.currency, User.is_active)
+            .join(User, Account.user_id == User.id)
+            .where(Account.id.in_({transfer.to_account_id for transfer in transfers}))
+        )
+        return {
+            account_id: (currency, is_active)
+            for account_id, currency, is_active in result.all()
+        }
+
+    def destination_error(
+        self,
+        transfer: Transfer,
+        destinations: Dict[int, Tuple[str, bool]],
+    ) -> Optional[str]:
+        destination = destinations.get(transfer.to_account_id)
+        if destination is None:
+            return "Destination account not found"
+
+        currency, is_active = destination
+        if not is_active:
+            return "Destination account is inactive"
+        if currency != transfer.to_currency:
+            return "Destination account currency does not match the transfer"
+        return None
+
+    async def _apply_transfer(
+        self,
+        db: AsyncSession,
+        transfer: Transfer,
+        completed_at: datetime,
+        destinations: Dict[int, Tuple[str, bool]],
+    ) -> bool:
+        # Claiming the transfer first makes a redelivered message a no-op.
+        result = await db.execute(
+            update(Transfer)
+            .where(
+                Transfer.id == transfer.id,
+                Transfer.status.in_(
+                    [TransferStatus.CREATED, TransferStatus.PROCESSING]
+                ),
             )
-            db.add(credit_entry)
+            .values(status=TransferStatus.COMPLETED, completed_at=completed_at)
+            .returning(Transfer.id)
+            .execution_options(synchronize_session=False)
+        )
+        if result.scalar_one_or_none() is None:
+            return False
+
+        # The destination is re-checked at execution: it may have been
+        # deactivated or changed since the transfer was priced.
+        error = self.destination_error(transfer, destinations)
+        if error:
+            raise ValueError(error)
+
+        total_debit = transfer.from_amount + transfer.commission_amount
+        changes = {transfer.from_account_id: -total_debit}
+        changes[transfer.to_account_id] = (
+            changes.get(transfer.to_account_id, Decimal("0")) + transfer.to_amount
+        )
+        balances = await self.account_service.apply_balance_changes(
+            db, changes, {transfer.from_account_id: transfer.hold_amount}
+        )
 
-            transfer.status = TransferStatus.COMPLETED
-            transfer.completed_at = datetime.utcnow()
+        await db.execute(
+            insert(LedgerEntry),
+            [
+                {
+                    "account_id": transfer.from_account_id,
+                    "transfer_id": transfer.id,
+                    "entry_type": LedgerEntryType.DEBIT,
+                    "amount": total_debit,
+                    "currency": balances[transfer.from_account_id][1],
+                    "balance_after": balances[transfer.from_account_id][0],
+                    "description": f"Transfer to account {transfer.to_account_id}",
+                },
+                {
+                    "account_id": transfer.to_account_id,
+                    "transfer_id": transfer.id,
+                    "entry_type": LedgerEntryType.CREDIT,
+                    "amount": transfer.to_amount,
+                    "currency": balances[transfer.to_account_id][1],
+                    "balance_after": balances[transfer.to_account_id][0],
+                    "description": f"Transfer from account {transfer.from_account_id}",
+                },
+            ],
+        )
+        return True
+
+    async def execute_transfer(
+        self,
+        db: AsyncSession,
+        transfer: Transfer,
+    ) -> bool:
+        # False when another delivery already completed or failed the
+        # transfer; nothing was applied then.
+        transfer_id = transfer.id
+        completed_at = datetime.utcnow()
+
+        try:
+            destinations = await self.load_destinations(db, [transfer])
+            if not await self._apply_transfer(
+                db, transfer, completed_at, destinations
+            ):
+                return False
 
             await db.commit()
-            await db.refresh(transfer)
 
-            return transfer
+            set_committed_value(transfer, "status", TransferStatus.COMPLETED)
+            set_committed_value(transfer, "completed_at", completed_at)
+            return True
 
-        except Exception as e:
-            transfer.status = TransferStatus.FAILED
-            transfer.error_message = str(e)
+        except ValueError as e:
+            await db.rollback()
+            await self.mark_failed(db, {transfer_id: str(e)})
             await db.commit()
+            await db.refresh(transfer)
             raise
+        except Exception:
+            # Anything else (lost connection, serialization failure) leaves
+            # the transfer claimable so a retry can pick it up.
+            await db.rollback()
+            raise
+
+    async def apply_transfers(
+        self,
+        db: AsyncSession,
+        transfers: List[Transfer],
+    ) -> Dict[int, Optional[str]]:
+        completed_at = datetime.utcnow()
+        results: Dict[int, Optional[str]] = {}
+
+        # Take every account lock up front in id order; per-transfer locking
+        # alone could deadlock two batches that touch the same accounts.
+        await self.account_service.lock_accounts(
+            db,
+            {transfer.from_account_id for transfer in transfers}
+            | {transfer.to_account_id for transfer in transfers},
+        )
+
+        destinations = await self.load_destinations(db, transfers)
+
+        for transfer in sorted(transfers, key=lambda t: (t.from_account_id, t.id)):
+            try:
+                async with db.begin_nested():
+                    if not await self._apply_transfer(
+                        db, transfer, completed_at, destinations
+                    ):
+                        continue
+                results[transfer.id] = None
+                set_committed_value(transfer, "status", TransferStatus.COMPLETED)
+                set_committed_value(transfer, "completed_at", completed_at)
+            except ValueError as e:
+                results[transfer.id] = str(e)
+
+        failed = {transfer_id: error for transfer_id, error in results.items() if error}
+        await self.mark_failed(db, failed)
+        for transfer in transfers:
+            if transfer.id in failed:
+                set_committed_value(transfer, "status", TransferStatus.FAILED)
+                set_committed_value(transfer, "error_message", failed[transfer.id])
+
+        return results
+
+    async def execute_transfers(
+        self,
+        db: AsyncSession,
+        transfers: List[Transfer],
+    ) -> Dict[int, Optional[str]]:
+        results = await self.apply_transfers(db, transfers)
+        await db.commit()
+        return results
+
+    async def mark_failed(
+        self,
+        db: AsyncSession,
+        errors: Dict[int, str],
+    ) -> None:
+        if not errors:
+            return
+
+        # Only transfers still pending hold funds; the status guard makes a
+        # repeated failure release nothing twice.
+        result = await db.execute(
+            update(Transfer)
+            .where(
+                Transfer.id.in_(list(errors)),
+                Transfer.status.in_(
+                    [TransferStatus.CREATED, TransferStatus.PROCESSING]
+                ),
+            )
+            .values(
+                status=TransferStatus.FAILED,
+                error_message=case(errors, value=Transfer.id),
+            )
+            .returning(Transfer.from_account_id, Transfer.hold_amount)
+            .execution_options(synchronize_session=False)
+        )
+        releases: Dict[int, Decimal] = {}
+        for account_id, hold_amount in result.all():
+            releases[account_id] = releases.get(account_id, Decimal("0")) + hold_amount
+        await self.account_service.release_holds(db, releases)
 
     async def get_transfer_by_id(
         self,
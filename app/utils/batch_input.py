@@ -0,0 +1,176 @@
+import codecs
+import csv
+import json
+import re
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
+
+JSON_CONTENT_TYPES = ("application/json",)
+JSONL_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/x-jsonlines")
+CSV_CONTENT_TYPES = ("text/csv", "application/csv")
+
+Record = Union[Dict[str, Any], str]
+
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+async def limit_bytes(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > max_bytes:
+            raise ValueError(f"Batch exceeds {max_bytes} bytes")
+        yield chunk
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+async def iter_jsonl_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield f"Invalid JSON: {e}"
+            continue
+        yield record if isinstance(record, dict) else "Expected a JSON object"
+
+
+class _PendingLines:
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[str]]:
+    # One reader sees every line, so quoted fields may span lines. It is only
+    # advanced once the quotes buffered so far balance, i.e. a row is whole.
+    pending = _PendingLines()
+    reader = csv.reader(pending)
+    quotes = 0
+    async for line in iter_lines(chunks):
+        pending.lines.append(line + "\n")
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        quotes = 0
+        yield next(reader)
+    if pending.lines:
+        yield next(reader)
+
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    header = None
+    async for row in iter_csv_rows(chunks):
+        if not any(value.strip() for value in row):
+            continue
+        if header is None:
+            header = [column.strip() for column in row]
+            continue
+        if len(row) != len(header):
+            yield f"Expected {len(header)} columns, got {len(row)}"
+            continue
+        yield {
+            column: value.strip()
+            for column, value in zip(header, row)
+            if value.strip()
+        }
+
+
+class JsonArrayReader:
+
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.expect = "["
+
+    def feed(self, text: str, final: bool = False) -> List[Any]:
+        # Only the unparsed tail of the body is buffered; every complete
+        # element is decoded and handed out as soon as it has arrived. The
+        # chunk is walked with an offset and compacted once at the end.
+        buffer = self.buffer + text
+        position = 0
+        items = []
+        while True:
+            position = JSON_WHITESPACE.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if self.expect == "[":
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                position += 1
+                self.expect = "first"
+            elif self.expect == "first" and char == "]":
+                position += 1
+                self.expect = "end"
+            elif self.expect in ("first", "value"):
+                try:
+                    item, end = self.decoder.raw_decode(buffer, position)
+                except ValueError as e:
+                    if final:
+                        raise ValueError(f"Invalid JSON: {e}")
+                    break
+                if end == len(buffer) and not final:
+                    # A number may continue in the next chunk.
+                    break
+                items.append(item)
+                position = end
+                self.expect = ","
+            elif self.expect == ",":
+                if char not in ",]":
+                    raise ValueError("Invalid JSON: expected ',' or ']'")
+                position += 1
+                self.expect = "value" if char == "," else "end"
+            else:
+                raise ValueError("Invalid JSON: extra data after the array")
+
+        self.buffer = buffer[position:]
+        if final and self.expect != "end":
+            raise ValueError("Invalid JSON: unexpected end of data")
+        return items
+
+
+async def iter_json_array_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    reader = JsonArrayReader()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in chunks:
+        for record in reader.feed(decoder.decode(chunk)):
+            yield record if isinstance(record, dict) else "Expected a JSON object"
+    for record in reader.feed(decoder.decode(b"", final=True), final=True):
+        yield record if isinstance(record, dict) else "Expected a JSON object"
+
+
+def iter_records(
+    content_type: str,
+    chunks: AsyncIterator[bytes],
+    max_bytes: Optional[int] = None,
+) -> AsyncIterator[Record]:
+    if max_bytes is not None:
+        chunks = limit_bytes(chunks, max_bytes)
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in JSONL_CONTENT_TYPES:
+        return iter_jsonl_records(chunks)
+    if media_type in CSV_CONTENT_TYPES:
+        return iter_csv_records(chunks)
+    if media_type in JSON_CONTENT_TYPES or not media_type:
+        return iter_json_array_records(chunks)
+    raise ValueError(f"Unsupported content type {media_type}")
@@ -0,0 +1,38 @@
+from app.utils.brokers.base import (
+    BaseBroker,
+    KeyedDispatcher,
+    dead_letter_queue_name,
+    retry_queue_name,
+)
+from app.utils.brokers.amqp import AmqpBroker
+from app.utils.brokers.memory import InMemoryBroker
+from app.utils.brokers.redis_streams import RedisStreamsBroker
+
+BROKER_BACKENDS = {
+    "amqp": AmqpBroker,
+    "memory": InMemoryBroker,
+    "redis": RedisStreamsBroker,
+}
+
+
+def create_broker(backend: str) -> BaseBroker:
+    broker_class = BROKER_BACKENDS.get(backend.strip().lower())
+    if broker_class is None:
+        raise ValueError(
+            f"Unknown message broker backend: {backend}. "
+            f"Expected one of: {', '.join(BROKER_BACKENDS)}"
+        )
+    return broker_class()
+
+
+__all__ = [
+    "BaseBroker",
+    "KeyedDispatcher",
+    "AmqpBroker",
+    "InMemoryBroker",
+    "RedisStreamsBroker",
+    "BROKER_BACKENDS",
+    "create_broker",
+    "dead_letter_queue_name",
+    "retry_queue_name",
+]
@@ -0,0 +1,437 @@
+import asyncio
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Dict, Any, Optional, Callable, List, FrozenSet, AsyncIterator, Hashable
+from aio_pika import connect_robust, Message, Channel, Queue
+from aio_pika.abc import AbstractIncomingMessage, AbstractRobustConnection
+from app.core.config import settings
+from app.utils.brokers.base import (
+    BaseBroker,
+    KeyedDispatcher,
+    dead_letter_queue_name,
+    decode_message,
+    encode_messages,
+    retry_delay_ms,
+    retry_queue_name,
+)
+
+PUBLISH_CHUNK_SIZE = 500
+
+
+class AmqpBroker(BaseBroker):
+
+    def __init__(self):
+        self.connection: Optional[AbstractRobustConnection] = None
+        self.channel: Optional[Channel] = None
+        self._publish_channels: Optional[asyncio.Queue] = None
+        self._declared: Dict[str, FrozenSet] = {}
+
+    async def connect(self) -> None:
+        self.connection = await connect_robust(settings.rabbitmq_url)
+        await self.open_channels()
+
+    async def open_channels(self) -> None:
+        self.channel = await self.connection.channel()
+        self._declared.clear()
+
+        publish_channels: asyncio.Queue = asyncio.Queue()
+        for _ in range(max(settings.rabbitmq_publish_channels, 1)):
+            publish_channels.put_nowait(
+                await self.connection.channel(
+                    publisher_confirms=settings.rabbitmq_publisher_confirms
+                )
+            )
+        self._publish_channels = publish_channels
+
+    async def close(self) -> None:
+        if self._publish_channels:
+            # Channels still checked out close themselves on return once
+            # they find the pool gone.
+            channels, self._publish_channels = self._publish_channels, None
+            while not channels.empty():
+                await channels.get_nowait().close()
+        if self.channel:
+            await self.channel.close()
+        if self.connection:
+            await self.connection.close()
+        self._declared.clear()
+
+    @asynccontextmanager
+    async def publish_channel(self) -> AsyncIterator[Channel]:
+        if not self._publish_channels:
+            await self.connect()
+
+        channels = self._publish_channels
+        channel = await channels.get()
+        try:
+            yield channel
+        finally:
+            # A channel-level error (PRECONDITION_FAILED, for one) closes the
+            # channel; hand back a fresh one instead of poisoning the pool.
+            if channels is not self._publish_channels:
+                # The pool was closed (or reopened) while this was out.
+                if not channel.is_closed:
+                    await channel.close()
+            elif channel.is_closed:
+                try:
+                    channel = await self.connection.channel(
+                        publisher_confirms=settings.rabbitmq_publisher_confirms
+                    )
+                finally:
+                    channels.put_nowait(channel)
+            else:
+                channels.put_nowait(channel)
+
+    @asynccontextmanager
+    async def _deliveries(self, queue: Queue) -> AsyncIterator[asyncio.Queue]:
+        # A plain consumer feeding a local queue, so waits can time out on
+        # the local get(). Timing out QueueIterator.__anext__ closes the
+        # iterator instead: the consumer is cancelled (a single-active-
+        # consumer queue may fail over to another worker) and buffered
+        # deliveries are nacked with multiple=True.
+        deliveries: asyncio.Queue = asyncio.Queue()
+        consumer_tag = await queue.consume(deliveries.put)
+        try:
+            yield deliveries
+        finally:
+            await queue.cancel(consumer_tag)
+            while not deliveries.empty():
+                await deliveries.get_nowait().nack(requeue=True)
+
+    async def declare_queue(
+        self,
+        channel: Channel,
+        queue_name: str,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        # Queue declarations are idempotent on the broker, so one per process
+        # is enough. Redeclaring with other arguments would fail on the
+        # broker, so it fails here too rather than being skipped.
+        key = frozenset((arguments or {}).items())
+        declared = self._declared.get(queue_name)
+        if declared == key:
+            return
+        if declared is not None:
+            raise ValueError(
+                f"Queue {queue_name} already declared with arguments {dict(declared)}, "
+                f"not {dict(key)}"
+            )
+        await channel.declare_queue(queue_name, durable=True, arguments=arguments)
+        self._declared[queue_name] = key
+
+    async def publish_many(
+        self,
+        queue_name: str,
+        messages: List[Dict[str, Any]],
+        priority: int = 0,
+        arguments: Optional[Dict[str, Any]] = None,
+        tasks_per_message: int = 1,
+    ) -> None:
+        bodies = encode_messages(messages, tasks_per_message)
+
+        async with self.publish_channel() as channel:
+            await self.declare_queue(channel, queue_name, arguments)
+
+            # With confirms on, each chunk is published back to back and the
+            # confirms are awaited together.
+            for start in range(0, len(bodies), PUBLISH_CHUNK_SIZE):
+                await asyncio.gather(*(
+                    channel.default_exchange.publish(
+                        Message(body=body, delivery_mode=2, priority=priority),
+                        routing_key=queue_name,
+                    )
+                    for body in bodies[start:start + PUBLISH_CHUNK_SIZE]
+                ))
+
+    async def consume_messages(
+        self,
+        queue_name: str,
+        callback: Callable,
+        prefetch_count: int = 1,
+        arguments: Optional[Dict[str, Any]] = None,
+        concurrency: int = 1,
+        ordering_key: Optional[Callable[[Dict[str, Any]], Hashable]] = None,
+    ) -> None:
+        if not self.channel:
+            await self.connect()
+
+        await self.channel.set_qos(prefetch_count=max(prefetch_count, concurrency))
+        queue = await self.channel.declare_queue(
+            queue_name, durable=True, arguments=arguments
+        )
+
+        dispatcher = KeyedDispatcher(concurrency, ordering_key)
+
+        try:
+            async with queue.iterator() as queue_iter:
+                async for message in queue_iter:
+                    try:
+                        tasks = decode_message(message.body)
+                    except ValueError as e:
+                        print(f"Error decoding message: {e}")
+                        await self.dead_letter(queue_name, message, f"Undecodable: {e}")
+                        await message.ack()
+                        continue
+
+                    await dispatcher.submit(
+                        tasks,
+                        partial(self._handle_message, queue_name, message, tasks, callback),
+                    )
+        finally:
+            # The consumer is cancelled by now; let in-flight handlers finish
+            # and ack before the channel goes away.
+            await dispatcher.drain(settings.consumer_drain_timeout_seconds)
+
+    async def _handle_message(
+        self,
+        queue_name: str,
+        message: AbstractIncomingMessage,
+        tasks: List[Dict[str, Any]],
+        callback: Callable,
+    ) -> None:
+        # A batch envelope is retried as a whole, so its tasks must be safe
+        # to run twice.
+        try:
+            for task in tasks:
+                await callback(task)
+        except Exception as e:
+            print(f"Error processing message: {e}")
+            await self._retry_or_requeue(queue_name, [message], str(e))
+            return
+        await message.ack()
+
+    async def _retry_or_requeue(
+        self,
+        queue_name: str,
+        messages: List[AbstractIncomingMessage],
+        error: str,
+    ) -> None:
+        try:
+            for message in messages:
+                await self.retry_later(queue_name, message, error)
+        except Exception as e:
+            # Without a retry copy the only safe option is the broker's own
+            # redelivery.
+            print(f"Error scheduling retry: {e}")
+            for message in messages:
+                await message.nack(requeue=True)
+            return
+
+        for message in messages:
+            await message.ack()
+
+    async def _declare_retry_queue(
+        self,
+        channel: Channel,
+        queue_name: str,
+        attempt: int,
+    ) -> str:
+        retry_queue = retry_queue_name(queue_name, attempt)
+        delay_ms = retry_delay_ms(attempt)
+        # Expired messages dead-letter through the default exchange straight
+        # back onto the work queue.
+        await self.declare_queue(
+            channel,
+            retry_queue,
+            {
+                "x-message-ttl": delay_ms,
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": queue_name,
+            },
+        )
+        return retry_queue
+
+    async def retry_later(
+        self,
+        queue_name: str,
+        message: AbstractIncomingMessage,
+        error: str,
+    ) -> None:
+        headers = dict(message.headers or {})
+        attempt = int(headers.get("x-retry-count", 0)) + 1
+
+        if attempt > settings.broker_max_retries:
+            await self.dead_letter(queue_name, message, error)
+            return
+
+        async with self.publish_channel() as channel:
+            retry_queue = await self._declare_retry_queue(channel, queue_name, attempt)
+            await channel.default_exchange.publish(
+                Message(
+                    body=message.body,
+                    headers={**headers, "x-retry-count": attempt, "x-last-error": error[:500]},
+                    delivery_mode=2,
+                    priority=message.priority or 0,
+                ),
+                routing_key=retry_queue,
+            )
+
+    async def dead_letter(
+        self,
+        queue_name: str,
+        message: AbstractIncomingMessage,
+        error: str,
+    ) -> None:
+        async with self.publish_channel() as channel:
+            dlq = dead_letter_queue_name(queue_name)
+            await self.declare_queue(channel, dlq)
+            await channel.default_exchange.publish(
+                Message(
+                    body=message.body,
+                    headers={
+                        **dict(message.headers or {}),
+                        "x-last-error": error[:500],
+                        "x-original-queue": queue_name,
+                    },
+                    delivery_mode=2,
+                    priority=message.priority or 0,
+                ),
+                routing_key=dlq,
+            )
+
+    async def replay_dead_letters(
+        self,
+        queue_name: str,
+        limit: Optional[int] = None,
+    ) -> int:
+        if not self.channel:
+            await self.connect()
+
+        dlq = await self.channel.declare_queue(
+            dead_letter_queue_name(queue_name), durable=True
+        )
+        replayed = 0
+
+        while limit is None or replayed < limit:
+            message = await dlq.get(fail=False)
+            if message is None:
+                break
+
+            headers = {
+                key: value for key, value in dict(message.headers or {}).items()
+                if key not in ("x-retry-count", "x-last-error", "x-original-queue")
+            }
+            async with self.publish_channel() as channel:
+                await channel.default_exchange.publish(
+                    Message(
+                        body=message.body,
+                        headers=headers,
+                        delivery_mode=2,
+                        priority=message.priority or 0,
+                    ),
+                    routing_key=queue_name,
+                )
+            await message.ack()
+            replayed += 1
+
+        return replayed
+
+    async def drain_queue(
+        self,
+        queue_name: str,
+        callback: Callable,
+        idle_timeout: float,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        if not self.channel:
+            await self.connect()
+
+        await self.channel.set_qos(prefetch_count=1)
+        queue = await self.channel.declare_queue(
+            queue_name, durable=True, arguments=arguments
+        )
+        drained = 0
+
+        async with self._deliveries(queue) as deliveries:
+            while True:
+                try:
+                    message = await asyncio.wait_for(deliveries.get(), idle_timeout)
+                except asyncio.TimeoutError:
+                    declared = await self.channel.declare_queue(queue_name, passive=True)
+                    if not declared.declaration_result.message_count:
+                        return drained
+                    continue
+
+                try:
+                    tasks = decode_message(message.body)
+                except ValueError as e:
+                    await self.dead_letter(queue_name, message, f"Undecodable: {e}")
+                    await message.ack()
+                else:
+                    await self._handle_message(queue_name, message, tasks, callback)
+                drained += 1
+
+    async def consume_batches(
+        self,
+        queue_name: str,
+        callback: Callable,
+        batch_size: int,
+        batch_timeout: float,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if not self.channel:
+            await self.connect()
+
+        # A channel of its own, so the multiple-ack below cannot reach
+        # deliveries of another consumer.
+        channel = await self.connection.channel()
+        await channel.set_qos(prefetch_count=batch_size)
+        queue = await channel.declare_queue(
+            queue_name, durable=True, arguments=arguments
+        )
+
+        try:
+            await self._consume_batches(queue, callback, batch_size, batch_timeout)
+        finally:
+            await channel.close()
+
+    async def _consume_batches(
+        self,
+        queue: Queue,
+        callback: Callable,
+        batch_size: int,
+        batch_timeout: float,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+
+        async with self._deliveries(queue) as deliveries:
+            while True:
+                messages = [await deliveries.get()]
+                deadline = loop.time() + batch_timeout
+
+                while len(messages) < batch_size:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        messages.append(
+                            await asyncio.wait_for(deliveries.get(), remaining)
+                        )
+                    except asyncio.TimeoutError:
+                        break
+
+                batch: List[Dict[str, Any]] = []
+                decoded: List[AbstractIncomingMessage] = []
+                undecodable: List[AbstractIncomingMessage] = []
+                for message in messages:
+                    try:
+                        batch.extend(decode_message(message.body))
+                        decoded.append(message)
+                    except ValueError as e:
+                        print(f"Error decoding message: {e}")
+                        await self.dead_letter(queue.name, message, f"Undecodable: {e}")
+                        undecodable.append(message)
+
+                try:
+                    if batch:
+                        await callback(batch)
+                except Exception as e:
+                    print(f"Error processing batch of {len(messages)} messages: {e}")
+                    await self._retry_or_requeue(queue.name, decoded, str(e))
+                    for message in undecodable:
+                        await message.ack()
+                    continue
+
+                # Every delivery on this channel up to the last one belongs
+                # to this batch, so a single multiple-ack covers it.
+                await messages[-1].ack(multiple=True)
@@ -0,0 +1,164 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional, Callable, Awaitable, List, Set, Hashable
+from app.core.config import settings
+from app.utils.brokers.envelope import decode_envelope, encode_envelope
+
+
+def retry_queue_name(queue_name: str, attempt: int) -> str:
+    return f"{queue_name}.retry.{attempt}"
+
+
+def dead_letter_queue_name(queue_name: str) -> str:
+    return f"{queue_name}.dlq"
+
+
+def retry_delay_ms(attempt: int) -> int:
+    return int(min(
+        settings.broker_retry_base_delay_ms * 2 ** (attempt - 1),
+        settings.broker_retry_max_delay_ms,
+    ))
+
+
+def encode_messages(
+    messages: List[Dict[str, Any]],
+    tasks_per_message: int = 1,
+) -> List[bytes]:
+    size = max(tasks_per_message, 1)
+    return [
+        encode_envelope(messages[start:start + size])
+        for start in range(0, len(messages), size)
+    ]
+
+
+def decode_message(body: bytes) -> List[Dict[str, Any]]:
+    return decode_envelope(body)
+
+
+class KeyedDispatcher:
+
+    def __init__(
+        self,
+        concurrency: int = 1,
+        ordering_key: Optional[Callable[[Dict[str, Any]], Hashable]] = None,
+    ):
+        self._semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self._ordering_key = ordering_key
+        self._in_flight: Set[asyncio.Task] = set()
+        self._tails: Dict[Hashable, asyncio.Future] = {}
+
+    async def submit(
+        self,
+        tasks: List[Dict[str, Any]],
+        handler: Callable[[], Awaitable[None]],
+    ) -> None:
+        await self._semaphore.acquire()
+
+        # A message waits for the previous message of every key it carries.
+        # The chain is extended here, in delivery order and without
+        # yielding, so messages sharing a key run in that order.
+        keys = set()
+        if self._ordering_key:
+            keys = {self._ordering_key(task) for task in tasks} - {None}
+        previous = [self._tails[key] for key in keys if key in self._tails]
+        done = asyncio.get_running_loop().create_future()
+        for key in keys:
+            self._tails[key] = done
+
+        task = asyncio.create_task(self._run(keys, previous, done, handler))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _run(
+        self,
+        keys: Set[Hashable],
+        previous: List[asyncio.Future],
+        done: asyncio.Future,
+        handler: Callable[[], Awaitable[None]],
+    ) -> None:
+        try:
+            for future in previous:
+                await asyncio.shield(future)
+            await handler()
+        finally:
+            done.set_result(None)
+            for key in keys:
+                if self._tails.get(key) is done:
+                    del self._tails[key]
+            self._semaphore.release()
+
+    async def drain(self, timeout: float) -> None:
+        if self._in_flight:
+            await asyncio.wait(self._in_flight, timeout=timeout)
+
+
+class BaseBroker(ABC):
+
+    @abstractmethod
+    async def connect(self) -> None:
+        ...
+
+    @abstractmethod
+    async def close(self) -> None:
+        ...
+
+    async def publish_message(
+        self,
+        queue_name: str,
+        message: Dict[str, Any],
+        priority: int = 0,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        await self.publish_many(queue_name, [message], priority, arguments)
+
+    @abstractmethod
+    async def publish_many(
+        self,
+        queue_name: str,
+        messages: List[Dict[str, Any]],
+        priority: int = 0,
+        arguments: Optional[Dict[str, Any]] = None,
+        tasks_per_message: int = 1,
+    ) -> None:
+        ...
+
+    @abstractmethod
+    async def consume_messages(
+        self,
+        queue_name: str,
+        callback: Callable,
+        prefetch_count: int = 1,
+        arguments: Optional[Dict[str, Any]] = None,
+        concurrency: int = 1,
+        ordering_key: Optional[Callable[[Dict[str, Any]], Hashable]] = None,
+    ) -> None:
+        ...
+
+    @abstractmethod
+    async def consume_batches(
+        self,
+        queue_name: str,
+        callback: Callable,
+        batch_size: int,
+        batch_timeout: float,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        ...
+
+    @abstractmethod
+    async def drain_queue(
+        self,
+        queue_name: str,
+        callback: Callable,
+        idle_timeout: float,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        ...
+
+    @abstractmethod
+    async def replay_dead_letters(
+        self,
+        queue_name: str,
+        limit: Optional[int] = None,
+    ) -> int:
+        ...
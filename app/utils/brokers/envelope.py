@@ -0,0 +1,92 @@
+import json
+import time
+from typing import Dict, Any, List, Optional
+from app.core.config import settings
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+
+ENVELOPE_VERSION = 1
+# No JSON document starts with a NUL byte, so bodies published before
+# envelopes existed are still told apart.
+ENVELOPE_MARKER = b"\x00"
+CODEC_JSON = b"j"
+CODEC_MSGPACK = b"m"
+HEADER_SIZE = 3
+
+ENVELOPE_FIELDS = ("enqueued_at", "trace_id")
+
+
+def default_codec() -> bytes:
+    if settings.broker_message_codec.lower() == "msgpack" and MSGPACK_AVAILABLE:
+        return CODEC_MSGPACK
+    return CODEC_JSON
+
+
+def encode_envelope(
+    tasks: List[Dict[str, Any]],
+    codec: Optional[bytes] = None,
+) -> bytes:
+    # Metadata shared by every task moves up to the envelope; decode puts it
+    # back, so a batch of tasks from one request carries it once.
+    envelope: Dict[str, Any] = {"v": ENVELOPE_VERSION}
+    for field in ENVELOPE_FIELDS:
+        values = {task.get(field) for task in tasks}
+        if len(values) == 1 and None not in values:
+            envelope[field] = values.pop()
+    if "enqueued_at" not in envelope:
+        envelope["enqueued_at"] = time.time()
+
+    envelope["tasks"] = [
+        {
+            key: value for key, value in task.items()
+            if key not in ENVELOPE_FIELDS or envelope.get(key) != value
+        }
+        for task in tasks
+    ]
+
+    codec = codec or default_codec()
+    if codec == CODEC_MSGPACK:
+        body = msgpack.packb(envelope, use_bin_type=True)
+    else:
+        body = json.dumps(envelope, separators=(",", ":")).encode()
+
+    return ENVELOPE_MARKER + bytes([ENVELOPE_VERSION]) + codec + body
+
+
+def decode_envelope(body: bytes) -> List[Dict[str, Any]]:
+    if not body.startswith(ENVELOPE_MARKER):
+        message = json.loads(body.decode())
+        if not isinstance(message, dict):
+            raise ValueError("Message is not an object")
+        return [message]
+
+    if len(body) < HEADER_SIZE:
+        raise ValueError("Truncated envelope header")
+    version = body[1]
+    codec = body[2:HEADER_SIZE]
+    if version > ENVELOPE_VERSION:
+        raise ValueError(f"Unsupported envelope version {version}")
+
+    payload = body[HEADER_SIZE:]
+    if codec == CODEC_MSGPACK:
+        if not MSGPACK_AVAILABLE:
+            raise ValueError("msgpack envelope received but msgpack is not installed")
+        try:
+            envelope = msgpack.unpackb(payload, raw=False)
+        except Exception as e:
+            raise ValueError(f"Invalid msgpack envelope: {e}")
+    elif codec == CODEC_JSON:
+        envelope = json.loads(payload.decode())
+    else:
+        raise ValueError(f"Unknown envelope codec {codec!r}")
+
+    if not isinstance(envelope, dict) or not isinstance(envelope.get("tasks"), list):
+        raise ValueError("Envelope has no task list")
+
+    shared = {field: envelope[field] for field in ENVELOPE_FIELDS if field in envelope}
+    return [{**shared, **task} for task in envelope["tasks"]]
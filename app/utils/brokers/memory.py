@@ -0,0 +1,248 @@
+import asyncio
+import itertools
+from functools import partial
+from typing import Dict, Any, Optional, Callable, List, Hashable
+from app.core.config import settings
+from app.utils.brokers.base import (
+    BaseBroker,
+    KeyedDispatcher,
+    dead_letter_queue_name,
+    decode_message,
+    encode_messages,
+    retry_delay_ms,
+)
+
+
+class MemoryMessage:
+
+    __slots__ = ("body", "headers", "priority")
+
+    def __init__(self, body: bytes, headers: Dict[str, Any], priority: int = 0):
+        self.body = body
+        self.headers = headers
+        self.priority = priority
+
+
+class InMemoryBroker(BaseBroker):
+    # Queues live in this process only and there is no redelivery: a message
+    # is gone once a consumer has taken it. Meant for tests, benchmarks and
+    # single-process deployments where the API and workers share a loop.
+
+    def __init__(self):
+        self._queues: Dict[str, asyncio.PriorityQueue] = {}
+        self._sequence = itertools.count()
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+
+    async def connect(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+
+    def queue_size(self, queue_name: str) -> int:
+        queue = self._queues.get(queue_name)
+        return queue.qsize() if queue else 0
+
+    def _queue(self, queue_name: str) -> asyncio.PriorityQueue:
+        queue = self._queues.get(queue_name)
+        if queue is None:
+            queue = self._queues[queue_name] = asyncio.PriorityQueue()
+        return queue
+
+    def _put(self, queue_name: str, message: MemoryMessage) -> None:
+        # Higher priority first, then publish order.
+        self._queue(queue_name).put_nowait(
+            (-message.priority, next(self._sequence), message)
+        )
+
+    async def _get(self, queue_name: str) -> MemoryMessage:
+        _, _, message = await self._queue(queue_name).get()
+        return message
+
+    async def publish_many(
+        self,
+        queue_name: str,
+        messages: List[Dict[str, Any]],
+        priority: int = 0,
+        arguments: Optional[Dict[str, Any]] = None,
+        tasks_per_message: int = 1,
+    ) -> None:
+        for body in encode_messages(messages, tasks_per_message):
+            self._put(queue_name, MemoryMessage(body, {}, priority))
+
+    async def consume_messages(
+        self,
+        queue_name: str,
+        callback: Callable,
+        prefetch_count: int = 1,
+        arguments: Optional[Dict[str, Any]] = None,
+        concurrency: int = 1,
+        ordering_key: Optional[Callable[[Dict[str, Any]], Hashable]] = None,
+    ) -> None:
+        dispatcher = KeyedDispatcher(concurrency, ordering_key)
+
+        try:
+            while True:
+                message = await self._get(queue_name)
+                tasks = self._decode(queue_name, message)
+                if tasks is None:
+                    continue
+
+                await dispatcher.submit(
+                    tasks,
+                    partial(self._handle_message, queue_name, message, tasks, callback),
+                )
+        finally:
+            await dispatcher.drain(settings.consumer_drain_timeout_seconds)
+
+    def _decode(
+        self,
+        queue_name: str,
+        message: MemoryMessage,
+    ) -> Optional[List[Dict[str, Any]]]:
+        try:
+            return decode_message(message.body)
+        except ValueError as e:
+            print(f"Error decoding message: {e}")
+            self.dead_letter(queue_name, message, f"Undecodable: {e}")
+            return None
+
+    async def _handle_message(
+        self,
+        queue_name: str,
+        message: MemoryMessage,
+        tasks: List[Dict[str, Any]],
+        callback: Callable,
+    ) -> None:
+        try:
+            for task in tasks:
+                await callback(task)
+        except Exception as e:
+            print(f"Error processing message: {e}")
+            self.retry_later(queue_name, message, str(e))
+
+    def retry_later(self, queue_name: str, message: MemoryMessage, error: str) -> None:
+        attempt = int(message.headers.get("x-retry-count", 0)) + 1
+
+        if attempt > settings.broker_max_retries:
+            self.dead_letter(queue_name, message, error)
+            return
+
+        retry = MemoryMessage(
+            message.body,
+            {**message.headers, "x-retry-count": attempt, "x-last-error": error[:500]},
+            message.priority,
+        )
+        timer_id = next(self._sequence)
+        self._timers[timer_id] = asyncio.get_running_loop().call_later(
+            retry_delay_ms(attempt) / 1000,
+            self._release_retry,
+            timer_id,
+            queue_name,
+            retry,
+        )
+
+    def _release_retry(
+        self,
+        timer_id: int,
+        queue_name: str,
+        message: MemoryMessage,
+    ) -> None:
+        del self._timers[timer_id]
+        self._put(queue_name, message)
+
+    def dead_letter(self, queue_name: str, message: MemoryMessage, error: str) -> None:
+        self._put(
+            dead_letter_queue_name(queue_name),
+            MemoryMessage(
+                message.body,
+                {
+                    **message.headers,
+                    "x-last-error": error[:500],
+                    "x-original-queue": queue_name,
+                },
+                message.priority,
+            ),
+        )
+
+    async def replay_dead_letters(
+        self,
+        queue_name: str,
+        limit: Optional[int] = None,
+    ) -> int:
+        dlq = self._queue(dead_letter_queue_name(queue_name))
+        replayed = 0
+
+        while (limit is None or replayed < limit) and not dlq.empty():
+            _, _, message = dlq.get_nowait()
+            headers = {
+                key: value for key, value in message.headers.items()
+                if key not in ("x-retry-count", "x-last-error", "x-original-queue")
+            }
+            self._put(queue_name, MemoryMessage(message.body, headers, message.priority))
+            replayed += 1
+
+        return replayed
+
+    async def drain_queue(
+        self,
+        queue_name: str,
+        callback: Callable,
+        idle_timeout: float,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        drained = 0
+
+        while True:
+            try:
+                message = await asyncio.wait_for(self._get(queue_name), idle_timeout)
+            except asyncio.TimeoutError:
+                return drained
+
+            tasks = self._decode(queue_name, message)
+            if tasks is not None:
+                await self._handle_message(queue_name, message, tasks, callback)
+            drained += 1
+
+    async def consume_batches(
+        self,
+        queue_name: str,
+        callback: Callable,
+        batch_size: int,
+        batch_timeout: float,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            messages = [await self._get(queue_name)]
+            deadline = loop.time() + batch_timeout
+
+            while len(messages) < batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    messages.append(
+                        await asyncio.wait_for(self._get(queue_name), remaining)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            batch: List[Dict[str, Any]] = []
+            decoded: List[MemoryMessage] = []
+            for message in messages:
+                tasks = self._decode(queue_name, message)
+                if tasks is not None:
+                    batch.extend(tasks)
+                    decoded.append(message)
+
+            try:
+                if batch:
+                    await callback(batch)
+            except Exception as e:
+                print(f"Error processing batch of {len(messages)} messages: {e}")
+                for message in decoded:
+                    self.retry_later(queue_name, message, str(e))
@@ -0,0 +1,449 @@
+import os
+import json
+import time
+import uuid
+import base64
+import socket
+import asyncio
+from functools import partial
+from typing import Dict, Any, Optional, Callable, List, Set, Tuple, Hashable
+import redis.asyncio as redis
+from redis.exceptions import ResponseError
+from app.core.config import settings
+from app.utils.brokers.base import (
+    BaseBroker,
+    KeyedDispatcher,
+    dead_letter_queue_name,
+    decode_message,
+    encode_messages,
+    retry_delay_ms,
+)
+
+BLOCK_MS = 1000
+PROMOTE_BATCH_SIZE = 100
+
+RENEW_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+StreamEntry = Tuple[bytes, Dict[bytes, bytes]]
+
+
+def delayed_set_name(queue_name: str) -> str:
+    return f"{queue_name}.delayed"
+
+
+def consumer_lease_name(queue_name: str) -> str:
+    return f"{queue_name}.active-consumer"
+
+
+class RedisStreamsBroker(BaseBroker):
+    # One stream per queue, read through a consumer group. Entries are acked
+    # and deleted once handled, so XLEN is the backlog. Retries wait in a
+    # sorted set scored by due time and are moved back by the consumers.
+    # Streams have no priorities: the priority argument is accepted and
+    # ignored.
+    # A consumer group spreads one stream across all of its consumers, which
+    # would break per-account ordering within a shard. For queues declared
+    # with x-single-active-consumer, as AMQP does, a consumer first takes a
+    # lease on the stream and only reads while it holds it; the others wait.
+
+    def __init__(self):
+        self.client: Optional[redis.Redis] = None
+        self._groups: Set[str] = set()
+        self.consumer_name = f"{socket.gethostname()}-{os.getpid()}"
+
+    async def connect(self) -> None:
+        self.client = redis.from_url(settings.broker_redis_url or settings.redis_url)
+        self._groups.clear()
+
+    async def close(self) -> None:
+        if self.client:
+            await self.client.close()
+            self.client = None
+        self._groups.clear()
+
+    async def _ensure_group(self, queue_name: str) -> None:
+        if queue_name in self._groups:
+            return
+        try:
+            await self.client.xgroup_create(
+                queue_name, settings.redis_streams_group, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._groups.add(queue_name)
+
+    async def _acquire_lease(
+        self,
+        queue_name: str,
+        arguments: Optional[Dict[str, Any]],
+    ) -> Optional[str]:
+        if not (arguments or {}).get("x-single-active-consumer"):
+            return None
+
+        lease = consumer_lease_name(queue_name)
+        while not await self.client.set(
+            lease,
+            self.consumer_name,
+            nx=True,
+            px=settings.redis_streams_claim_idle_ms,
+        ):
+            await asyncio.sleep(BLOCK_MS / 1000)
+        return lease
+
+    async def _renew_lease(
+        self,
+        queue_name: str,
+        lease: Optional[str],
+    ) -> Optional[str]:
+        if lease is None:
+            return None
+        if await self.client.eval(
+            RENEW_LEASE_SCRIPT,
+            1,
+            lease,
+            self.consumer_name,
+            settings.redis_streams_claim_idle_ms,
+        ):
+            return lease
+
+        # Lost after stalling past the TTL; another consumer may be reading.
+        print(f"Lost the consumer lease on {queue_name}, waiting to retake it")
+        return await self._acquire_lease(
+            queue_name, {"x-single-active-consumer": True}
+        )
+
+    async def _release_lease(self, lease: Optional[str]) -> None:
+        if lease is not None and self.client:
+            await self.client.eval(RELEASE_LEASE_SCRIPT, 1, lease, self.consumer_name)
+
+    async def _add(
+        self,
+        queue_name: str,
+        body: bytes,
+        headers: Optional[Dict[str, Any]] = None,
+        pipe=None,
+    ) -> None:
+        fields = {"body": body}
+        if headers:
+            fields["headers"] = json.dumps(headers)
+        await (pipe or self.client).xadd(queue_name, fields)
+
+    async def publish_many(
+        self,
+        queue_name: str,
+        messages: List[Dict[str, Any]],
+        priority: int = 0,
+        arguments: Optional[Dict[str, Any]] = None,
+        tasks_per_message: int = 1,
+    ) -> None:
+        if not self.client:
+            await self.connect()
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            for body in encode_messages(messages, tasks_per_message):
+                await self._add(queue_name, body, pipe=pipe)
+            await pipe.execute()
+
+    @staticmethod
+    def _headers(fields: Dict[bytes, bytes]) -> Dict[str, Any]:
+        raw = fields.get(b"headers")
+        return json.loads(raw) if raw else {}
+
+    async def _promote_due(self, queue_name: str) -> None:
+        delayed = delayed_set_name(queue_name)
+        due = await self.client.zrangebyscore(
+            delayed, "-inf", time.time(), start=0, num=PROMOTE_BATCH_SIZE
+        )
+        for member in due:
+            # Only the consumer whose ZREM succeeds moves the entry.
+            if not await self.client.zrem(delayed, member):
+                continue
+            entry = json.loads(member)
+            await self._add(
+                queue_name, base64.b64decode(entry["body"]), entry["headers"]
+            )
+
+    async def _read(
+        self,
+        queue_name: str,
+        count: int,
+        block_ms: int,
+    ) -> List[StreamEntry]:
+        await self._promote_due(queue_name)
+        response = await self.client.xreadgroup(
+            settings.redis_streams_group,
+            self.consumer_name,
+            {queue_name: ">"},
+            count=count,
+            block=block_ms,
+        )
+        return response[0][1] if response else []
+
+    async def _claim_stale(self, queue_name: str, count: int) -> List[StreamEntry]:
+        # Entries a dead consumer read but never acked.
+        response = await self.client.xautoclaim(
+            queue_name,
+            settings.redis_streams_group,
+            self.consumer_name,
+            min_idle_time=settings.redis_streams_claim_idle_ms,
+            start_id="0-0",
+            count=count,
+        )
+        return response[1]
+
+    async def _finish(self, queue_name: str, entry_id: bytes) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.xack(queue_name, settings.redis_streams_group, entry_id)
+            pipe.xdel(queue_name, entry_id)
+            await pipe.execute()
+
+    def _decode(self, fields: Dict[bytes, bytes]) -> List[Dict[str, Any]]:
+        return decode_message(fields.get(b"body", b""))
+
+    async def _handle_entry(
+        self,
+        queue_name: str,
+        entry: StreamEntry,
+        tasks: List[Dict[str, Any]],
+        callback: Callable,
+    ) -> None:
+        entry_id, fields = entry
+        try:
+            for task in tasks:
+                await callback(task)
+        except Exception as e:
+            print(f"Error processing message: {e}")
+            await self.retry_later(queue_name, fields, str(e))
+        await self._finish(queue_name, entry_id)
+
+    async def _undecodable(self, queue_name: str, entry: StreamEntry, error: Exception) -> None:
+        print(f"Error decoding message: {error}")
+        await self.dead_letter(queue_name, entry[1], f"Undecodable: {error}")
+        await self._finish(queue_name, entry[0])
+
+    async def retry_later(
+        self,
+        queue_name: str,
+        fields: Dict[bytes, bytes],
+        error: str,
+    ) -> None:
+        headers = self._headers(fields)
+        attempt = int(headers.get("x-retry-count", 0)) + 1
+
+        if attempt > settings.broker_max_retries:
+            await self.dead_letter(queue_name, fields, error)
+            return
+
+        member = json.dumps({
+            "id": uuid.uuid4().hex,
+            "body": base64.b64encode(fields.get(b"body", b"")).decode(),
+            "headers": {**headers, "x-retry-count": attempt, "x-last-error": error[:500]},
+        })
+        await self.client.zadd(
+            delayed_set_name(queue_name),
+            {member: time.time() + retry_delay_ms(attempt) / 1000},
+        )
+
+    async def dead_letter(
+        self,
+        queue_name: str,
+        fields: Dict[bytes, bytes],
+        error: str,
+    ) -> None:
+        await self._add(
+            dead_letter_queue_name(queue_name),
+            fields.get(b"body", b""),
+            {
+                **self._headers(fields),
+                "x-last-error": error[:500],
+                "x-original-queue": queue_name,
+            },
+        )
+
+    async def replay_dead_letters(
+        self,
+        queue_name: str,
+        limit: Optional[int] = None,
+    ) -> int:
+        if not self.client:
+            await self.connect()
+
+        dlq = dead_letter_queue_name(queue_name)
+        replayed = 0
+
+        while limit is None or replayed < limit:
+            count = PROMOTE_BATCH_SIZE if limit is None else min(PROMOTE_BATCH_SIZE, limit - replayed)
+            entries = await self.client.xrange(dlq, "-", "+", count=count)
+            if not entries:
+                break
+
+            for entry_id, fields in entries:
+                headers = {
+                    key: value for key, value in self._headers(fields).items()
+                    if key not in ("x-retry-count", "x-last-error", "x-original-queue")
+                }
+                await self._add(queue_name, fields.get(b"body", b""), headers)
+                await self.client.xdel(dlq, entry_id)
+                replayed += 1
+
+        return replayed
+
+    async def consume_messages(
+        self,
+        queue_name: str,
+        callback: Callable,
+        prefetch_count: int = 1,
+        arguments: Optional[Dict[str, Any]] = None,
+        concurrency: int = 1,
+        ordering_key: Optional[Callable[[Dict[str, Any]], Hashable]] = None,
+    ) -> None:
+        if not self.client:
+            await self.connect()
+        await self._ensure_group(queue_name)
+
+        count = max(prefetch_count, concurrency)
+        dispatcher = KeyedDispatcher(concurrency, ordering_key)
+        lease = await self._acquire_lease(queue_name, arguments)
+
+        try:
+            entries = await self._claim_stale(queue_name, count)
+            while True:
+                for entry in entries:
+                    try:
+                        tasks = self._decode(entry[1])
+                    except ValueError as e:
+                        await self._undecodable(queue_name, entry, e)
+                        continue
+
+                    await dispatcher.submit(
+                        tasks,
+                        partial(self._handle_entry, queue_name, entry, tasks, callback),
+                    )
+                lease = await self._renew_lease(queue_name, lease)
+                entries = await self._read(queue_name, count, BLOCK_MS)
+        finally:
+            await dispatcher.drain(settings.consumer_drain_timeout_seconds)
+            await self._release_lease(lease)
+
+    async def drain_queue(
+        self,
+        queue_name: str,
+        callback: Callable,
+        idle_timeout: float,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        if not self.client:
+            await self.connect()
+        await self._ensure_group(queue_name)
+
+        drained = 0
+        lease = await self._acquire_lease(queue_name, arguments)
+
+        try:
+            entries = await self._claim_stale(queue_name, 1)
+            while True:
+                if not entries:
+                    lease = await self._renew_lease(queue_name, lease)
+                    entries = await self._read(
+                        queue_name, 1, int(idle_timeout * 1000)
+                    )
+                if not entries:
+                    pending = await self.client.xlen(queue_name)
+                    delayed = await self.client.zcard(delayed_set_name(queue_name))
+                    if not pending and not delayed:
+                        return drained
+                    continue
+
+                entry = entries.pop(0)
+                try:
+                    tasks = self._decode(entry[1])
+                except ValueError as e:
+                    await self._undecodable(queue_name, entry, e)
+                else:
+                    await self._handle_entry(queue_name, entry, tasks, callback)
+                drained += 1
+        finally:
+            await self._release_lease(lease)
+
+    async def consume_batches(
+        self,
+        queue_name: str,
+        callback: Callable,
+        batch_size: int,
+        batch_timeout: float,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if not self.client:
+            await self.connect()
+        await self._ensure_group(queue_name)
+
+        lease = await self._acquire_lease(queue_name, arguments)
+        try:
+            await self._consume_batches(
+                queue_name, callback, batch_size, batch_timeout, lease
+            )
+        finally:
+            await self._release_lease(lease)
+
+    async def _consume_batches(
+        self,
+        queue_name: str,
+        callback: Callable,
+        batch_size: int,
+        batch_timeout: float,
+        lease: Optional[str],
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        entries = await self._claim_stale(queue_name, batch_size)
+
+        while True:
+            if not entries:
+                lease = await self._renew_lease(queue_name, lease)
+                entries = await self._read(queue_name, batch_size, BLOCK_MS)
+                if not entries:
+                    continue
+
+            deadline = loop.time() + batch_timeout
+            while len(entries) < batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                more = await self._read(
+                    queue_name, batch_size - len(entries), max(int(remaining * 1000), 1)
+                )
+                if not more:
+                    break
+                entries.extend(more)
+
+            batch: List[Dict[str, Any]] = []
+            decoded: List[StreamEntry] = []
+            for entry in entries:
+                try:
+                    batch.extend(self._decode(entry[1]))
+                    decoded.append(entry)
+                except ValueError as e:
+                    await self._undecodable(queue_name, entry, e)
+
+            try:
+                if batch:
+                    await callback(batch)
+            except Exception as e:
+                print(f"Error processing batch of {len(entries)} messages: {e}")
+                for _, fields in decoded:
+                    await self.retry_later(queue_name, fields, str(e))
+
+            for entry_id, _ in decoded:
+                await self._finish(queue_name, entry_id)
+            entries = []
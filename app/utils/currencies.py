@@ -0,0 +1,69 @@
+from decimal import Decimal
+from typing import Dict, Tuple
+
+DEFAULT_MINOR_UNITS = 2
+
+# Scale of the Numeric money columns. Amounts in currencies with finer
+# minor units (KWD, BHD, ...) are quantized to this scale, since nothing
+# finer is stored.
+AMOUNT_SCALE = 2
+
+# ISO 4217 code -> (name, minor units)
+ISO_4217: Dict[str, Tuple[str, int]] = {
+    "AED": ("UAE Dirham", 2),
+    "AUD": ("Australian Dollar", 2),
+    "BGN": ("Bulgarian Lev", 2),
+    "BHD": ("Bahraini Dinar", 3),
+    "BRL": ("Brazilian Real", 2),
+    "CAD": ("Canadian Dollar", 2),
+    "CHF": ("Swiss Franc", 2),
+    "CLP": ("Chilean Peso", 0),
+    "CNY": ("Yuan Renminbi", 2),
+    "CZK": ("Czech Koruna", 2),
+    "DKK": ("Danish Krone", 2),
+    "EUR": ("Euro", 2),
+    "GBP": ("Pound Sterling", 2),
+    "HKD": ("Hong Kong Dollar", 2),
+    "HUF": ("Forint", 2),
+    "IDR": ("Rupiah", 2),
+    "ILS": ("New Israeli Sheqel", 2),
+    "INR": ("Indian Rupee", 2),
+    "ISK": ("Iceland Krona", 0),
+    "JOD": ("Jordanian Dinar", 3),
+    "JPY": ("Yen", 0),
+    "KRW": ("Won", 0),
+    "KWD": ("Kuwaiti Dinar", 3),
+    "KZT": ("Tenge", 2),
+    "MXN": ("Mexican Peso", 2),
+    "MYR": ("Malaysian Ringgit", 2),
+    "NOK": ("Norwegian Krone", 2),
+    "NZD": ("New Zealand Dollar", 2),
+    "OMR": ("Rial Omani", 3),
+    "PHP": ("Philippine Peso", 2),
+    "PLN": ("Zloty", 2),
+    "RON": ("Romanian Leu", 2),
+    "RUB": ("Russian Ruble", 2),
+    "SAR": ("Saudi Riyal", 2),
+    "SEK": ("Swedish Krona", 2),
+    "SGD": ("Singapore Dollar", 2),
+    "THB": ("Baht", 2),
+    "TND": ("Tunisian Dinar", 3),
+    "TRY": ("Turkish Lira", 2),
+    "TWD": ("New Taiwan Dollar", 2),
+    "UAH": ("Hryvnia", 2),
+    "USD": ("US Dollar", 2),
+    "VND": ("Dong", 0),
+    "ZAR": ("Rand", 2),
+}
+
+
+def currency_name(code: str) -> str:
+    return ISO_4217.get(code, (code, DEFAULT_MINOR_UNITS))[0]
+
+
+def minor_units_for(code: str) -> int:
+    return ISO_4217.get(code, (code, DEFAULT_MINOR_UNITS))[1]
+
+
+def quantum_for(minor_units: int) -> Decimal:
+    return Decimal(1).scaleb(-minor_units)
@@ -0,0 +1,154 @@
+import asyncio
+import random
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+import httpx
+from app.core.config import settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class FrankfurterClient:
+
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = base_url or settings.frankfurter_api_url
+        self.client: Optional[httpx.AsyncClient] = None
+        self.max_retries = settings.frankfurter_max_retries
+        self.retry_backoff = settings.frankfurter_retry_backoff_seconds
+        self.hedge_after = settings.frankfurter_hedge_after_seconds
+        self._validators: Dict[str, Dict[str, str]] = {}
+        self._pending_validators: Dict[str, Dict[str, str]] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self.client is None or self.client.is_closed:
+            limits = httpx.Limits(
+                max_connections=settings.fx_fetch_max_connections,
+                max_keepalive_connections=settings.fx_fetch_max_connections,
+                keepalive_expiry=settings.frankfurter_keepalive_seconds,
+            )
+            self.client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=settings.frankfurter_http2 and HTTP2_AVAILABLE,
+                limits=limits,
+                timeout=settings.frankfurter_timeout_seconds,
+            )
+        return self.client
+
+    async def close(self) -> None:
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    async def fetch_latest(
+        self,
+        base_currency: str,
+        conditional: bool = True,
+    ) -> Optional[Dict[str, Decimal]]:
+        headers = {}
+        validators = self._validators.get(base_currency, {})
+        if conditional:
+            if "etag" in validators:
+                headers["If-None-Match"] = validators["etag"]
+            if "last_modified" in validators:
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        response = await self._get_with_retries({"base": base_currency}, headers)
+
+        if response.status_code == 304:
+            return None
+
+        response.raise_for_status()
+
+        new_validators = {}
+        if response.headers.get("etag"):
+            new_validators["etag"] = response.headers["etag"]
+        if response.headers.get("last-modified"):
+            new_validators["last_modified"] = response.headers["last-modified"]
+        self._pending_validators[base_currency] = new_validators
+
+        data = response.json()
+        rates = {base_currency: Decimal("1.0")}
+        for currency, rate in data.get("rates", {}).items():
+            rates[currency] = Decimal(str(rate))
+
+        return rates
+
+    def confirm_validators(self, base_currencies: Iterable[str]) -> None:
+        # Only remember ETag/Last-Modified once the rates they describe are
+        # stored, otherwise a failed write would be skipped as "unchanged".
+        for base_currency in base_currencies:
+            if base_currency in self._pending_validators:
+                self._validators[base_currency] = self._pending_validators.pop(base_currency)
+
+    def forget_validators(self, base_currency: Optional[str] = None) -> None:
+        if base_currency is None:
+            self._validators.clear()
+            self._pending_validators.clear()
+        else:
+            self._validators.pop(base_currency, None)
+            self._pending_validators.pop(base_currency, None)
+
+    async def _get_with_retries(
+        self,
+        params: Dict[str, str],
+        headers: Dict[str, str],
+    ) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = await self._hedged_get(params, headers)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    return response
+                if attempt >= self.max_retries:
+                    return response
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+
+            # Full jitter keeps a fleet of workers from retrying in lockstep.
+            await asyncio.sleep(random.uniform(0, self.retry_backoff * (2 ** attempt)))
+            attempt += 1
+
+    async def _hedged_get(
+        self,
+        params: Dict[str, str],
+        headers: Dict[str, str],
+    ) -> httpx.Response:
+        client = self._get_client()
+
+        def send() -> asyncio.Task:
+            return asyncio.create_task(client.get("/v1/latest", params=params, headers=headers))
+
+        first = send()
+        if not self.hedge_after:
+            return await first
+
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+        if done:
+            return first.result()
+
+        pending = {first, send()}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+frankfurter_client = FrankfurterClient()
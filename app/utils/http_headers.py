@@ -0,0 +1,43 @@
+import re
+from typing import Optional
+
+_ENTITY_TAG = re.compile(r'(?:W/)?"([^"]*)"')
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored and
+    # any tag in the list may match.
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque = _ENTITY_TAG.fullmatch(etag)
+    return opaque is not None and opaque.group(1) in _ENTITY_TAG.findall(
+        if_none_match
+    )
+
+
+def accepts_encoding(accept_encoding: Optional[str], coding: str) -> bool:
+    # A coding listed by name uses its own q-value; otherwise * applies.
+    # q=0 means "not acceptable".
+    if not accept_encoding:
+        return False
+
+    qualities = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value.strip())
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+
+    return qualities.get(coding, qualities.get("*", 0.0)) > 0
@@ -1,77 +1,95 @@
-import json
-import asyncio
-from typing import Dict, Any, Optional, Callable
-from aio_pika import connect_robust, Message, Channel, Queue
-from aio_pika.abc import AbstractRobustConnection
+import time
+from typing import Dict, Any, Optional
 from app.core.config import settings
+from app.utils.brokers import BaseBroker, create_broker
+from app.utils.sharding import (
+    jump_consistent_hash,
+    shard_queue_arguments,
+    shard_queue_name,
+)
 
+message_broker: BaseBroker = create_broker(settings.message_broker_backend)
 
-class MessageBroker:
-
-    def __init__(self):
-        self.connection: Optional[AbstractRobustConnection] = None
-        self.channel: Optional[Channel] = None
-
-    async def connect(self) -> None:
-        self.connection = await connect_robust(settings.rabbitmq_url)
-        self.channel = await self.connection.channel()
-
-    async def close(self) -> None:
-        if self.channel:
-            await self.channel.close()
-        if self.connection:
-            await self.connection.close()
-
-    async def publish_message(
-        self,
-        queue_name: str,
-        message: Dict[str, Any],
-        priority: int = 0,
-    ) -> None:
-        if not self.channel:
-            await self.connect()
-
-        queue = await self.channel.declare_queue(queue_name, durable=True)
-
-        message_body = json.dumps(message).encode()
-        await self.channel.default_exchange.publish(
-            Message(
-                body=message_body,
-                delivery_mode=2,
-                priority=priority,
-            ),
-            routing_key=queue_name,
-        )
-
-    async def consume_messages(
-        self,
-        queue_name: str,
-        callback: Callable,
-        prefetch_count: int = 1,
-    ) -> None:
-        if not self.channel:
-            await self.connect()
-
-        await self.channel.set_qos(prefetch_count=prefetch_count)
-        queue = await self.channel.declare_queue(queue_name, durable=True)
-
-        async with queue.iterator() as queue_iter:
-            async for message in queue_iter:
-                async with message.process():
-                    try:
-                        data = json.loads(message.body.decode())
-                        await callback(data)
-                    except Exception as e:
-                        print(f"Error processing message: {e}")
-
-
-message_broker = MessageBroker()
-
-
-async def publish_transfer_task(transfer_id: int) -> None:
+
+TRANSFER_LANES = {"bulk": 0, "standard": 1, "express": 2}
+DEFAULT_TRANSFER_LANE = "standard"
+
+
+def transfer_lane_priority(lane: Optional[str]) -> int:
+    return TRANSFER_LANES.get(lane, TRANSFER_LANES[DEFAULT_TRANSFER_LANE])
+
+
+def transfer_queue_base(priority_lanes: Optional[bool] = None) -> str:
+    priority_lanes = (
+        settings.transfer_priority_lanes if priority_lanes is None else priority_lanes
+    )
+    # x-max-priority cannot be added to an existing queue, so the priority
+    # layout lives under its own name.
+    if priority_lanes:
+        return f"{settings.rabbitmq_transfer_queue}.prio"
+    return settings.rabbitmq_transfer_queue
+
+
+def transfer_queue_arguments(
+    shards: Optional[int] = None,
+    priority_lanes: Optional[bool] = None,
+) -> Dict[str, Any]:
+    shards = settings.transfer_shards if shards is None else shards
+    priority_lanes = (
+        settings.transfer_priority_lanes if priority_lanes is None else priority_lanes
+    )
+    arguments = shard_queue_arguments(shards)
+    if priority_lanes:
+        arguments["x-max-priority"] = max(TRANSFER_LANES.values())
+    return arguments
+
+
+def transfer_queue_for_account(
+    account_id: int,
+    shards: Optional[int] = None,
+    priority_lanes: Optional[bool] = None,
+) -> str:
+    shards = settings.transfer_shards if shards is None else shards
+    shard = jump_consistent_hash(account_id, shards) if shards > 1 else 0
+    return shard_queue_name(transfer_queue_base(priority_lanes), shard, shards)
+
+
+def transfer_task_payload(
+    transfer_id: int,
+    account_id: Optional[int],
+    lane: str = DEFAULT_TRANSFER_LANE,
+    snapshot: Optional[Dict[str, Any]] = None,
+    trace_id: Optional[str] = None,
+    enqueued_at: Optional[float] = None,
+) -> Dict[str, Any]:
+    payload = {
+        "transfer_id": transfer_id,
+        "account_id": account_id,
+        "action": "process",
+        "lane": lane,
+        "enqueued_at": enqueued_at or time.time(),
+    }
+    if snapshot is not None:
+        payload["transfer"] = snapshot
+    if trace_id is not None:
+        payload["trace_id"] = trace_id
+    return payload
+
+
+async def publish_transfer_task(
+    transfer_id: int,
+    account_id: Optional[int] = None,
+    lane: str = DEFAULT_TRANSFER_LANE,
+) -> None:
+    # Routing on the source account keeps every debit of an account on one
+    # shard, and so on one consumer, in publish order.
     await message_broker.publish_message(
-        settings.rabbitmq_transfer_queue,
-        {"transfer_id": transfer_id, "action": "process"},
+        transfer_queue_for_account(
+            account_id if account_id is not None else transfer_id
+        ),
+        transfer_task_payload(transfer_id, account_id, lane),
+        priority=transfer_lane_priority(lane),
+        arguments=transfer_queue_arguments(),
     )
 
 
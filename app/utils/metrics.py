@@ -0,0 +1,36 @@
+import time
+from typing import Any, Dict
+from prometheus_client import Histogram, start_http_server
+from app.utils.message_broker import DEFAULT_TRANSFER_LANE, TRANSFER_LANES
+
+QUEUE_LATENCY_BUCKETS = (
+    0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0,
+)
+
+transfer_queue_latency = Histogram(
+    "transfer_queue_latency_seconds",
+    "Time from enqueueing a transfer task to the start of its processing",
+    ["lane"],
+    buckets=QUEUE_LATENCY_BUCKETS,
+)
+
+
+def observe_transfer_latency(data: Dict[str, Any]) -> None:
+    enqueued_at = data.get("enqueued_at")
+    if enqueued_at is None:
+        return
+
+    lane = data.get("lane")
+    if lane not in TRANSFER_LANES:
+        lane = DEFAULT_TRANSFER_LANE
+
+    # enqueued_at is set when the task enters the outbox, so retries and
+    # relay lag both count against the lane.
+    transfer_queue_latency.labels(lane=lane).observe(
+        max(time.time() - float(enqueued_at), 0.0)
+    )
+
+
+def start_metrics_server(port: int) -> None:
+    if port:
+        start_http_server(port)
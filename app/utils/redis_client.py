@@ -1,6 +1,7 @@
 import json
 from typing import Optional
 import redis.asyncio as redis
+from redis.asyncio.client import PubSub
 from app.core.config import settings
 
 
@@ -32,6 +33,16 @@ class RedisClient:
         else:
             await self.client.set(key, value)
 
+    async def set_if_absent(self, key: str, value: str, ttl: int) -> bool:
+        if not self.client:
+            return True
+        return bool(await self.client.set(key, value, ex=ttl, nx=True))
+
+    async def expire(self, key: str, ttl: int):
+        if not self.client:
+            return
+        await self.client.expire(key, ttl)
+
     async def delete(self, key: str):
         if not self.client:
             return
@@ -47,5 +58,15 @@ class RedisClient:
         json_str = json.dumps(value)
         await self.set(key, json_str, ttl)
 
+    async def publish_json(self, channel: str, value) -> int:
+        if not self.client:
+            return 0
+        return await self.client.publish(channel, json.dumps(value))
+
+    def pubsub(self) -> Optional[PubSub]:
+        if not self.client:
+            return None
+        return self.client.pubsub(ignore_subscribe_messages=True)
+
 
 redis_client = RedisClient()
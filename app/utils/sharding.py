@@ -0,0 +1,33 @@
+from typing import List
+
+
+def jump_consistent_hash(key: int, buckets: int) -> int:
+    # Lamping & Veach: growing from N to N+1 buckets moves only 1/(N+1) of keys.
+    if buckets <= 0:
+        raise ValueError("buckets must be positive")
+
+    key &= 0xFFFFFFFFFFFFFFFF
+    bucket, candidate = -1, 0
+    while candidate < buckets:
+        bucket = candidate
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        candidate = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_queue_name(base_name: str, shard: int, shards: int) -> str:
+    if shards <= 1:
+        return base_name
+    return f"{base_name}.{shards}.{shard}"
+
+
+def shard_queue_names(base_name: str, shards: int) -> List[str]:
+    return [shard_queue_name(base_name, shard, shards) for shard in range(max(shards, 1))]
+
+
+def shard_queue_arguments(shards: int) -> dict:
+    # The unsharded queue predates sharding and was declared without
+    # arguments; redeclaring it with different ones would fail.
+    if shards <= 1:
+        return {}
+    return {"x-single-active-consumer": True}
@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator, List
+from app.db.models.ledger_entry import LedgerEntry
+
+STATEMENT_COLUMNS = (
+    "id",
+    "created_at",
+    "entry_type",
+    "amount",
+    "currency",
+    "balance_after",
+    "transfer_id",
+    "description",
+)
+STATEMENT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+EntryBatches = AsyncIterator[List[LedgerEntry]]
+
+
+def entry_row(entry: LedgerEntry) -> list:
+    return [
+        entry.id,
+        entry.created_at.isoformat(),
+        entry.entry_type.value,
+        str(entry.amount),
+        entry.currency,
+        str(entry.balance_after),
+        entry.transfer_id,
+        entry.description or "",
+    ]
+
+
+async def iter_csv_chunks(batches: EntryBatches) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(STATEMENT_COLUMNS)
+    yield buffer.getvalue().encode("utf-8")
+
+    async for entries in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(entry_row(entry) for entry in entries)
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def iter_jsonl_chunks(batches: EntryBatches) -> AsyncIterator[bytes]:
+    async for entries in batches:
+        yield "".join(
+            json.dumps(dict(zip(STATEMENT_COLUMNS, entry_row(entry)))) + "\n"
+            for entry in entries
+        ).encode("utf-8")
+
+
+def iter_statement_chunks(output_format: str, batches: EntryBatches) -> AsyncIterator[bytes]:
+    if output_format == "csv":
+        return iter_csv_chunks(batches)
+    if output_format == "jsonl":
+        return iter_jsonl_chunks(batches)
+    raise ValueError(f"Unsupported statement format {output_format}")
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    # wbits 31 writes a gzip header. Each chunk is sync-flushed so the client
+    # can decode as it downloads instead of waiting for the end.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
@@ -0,0 +1,28 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class StageTimer:
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + (
+                time.perf_counter() - start
+            )
+
+    @property
+    def total(self) -> float:
+        return sum(self.timings.values())
+
+    def report(self) -> str:
+        parts = [f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.timings.items()]
+        parts.append(f"total={self.total * 1000:.1f}ms")
+        return " ".join(parts)
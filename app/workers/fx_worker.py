@@ -3,7 +3,10 @@ import sys
 from typing import Dict, Any
 from app.db.session import AsyncSessionLocal
 from app.services.fx_rate_service import FxRateService
+from app.services.fx_history_service import FxHistoryService
 from app.utils.message_broker import message_broker
+from app.utils.redis_client import redis_client
+from app.services.fx_providers import fx_rate_provider
 from app.utils.telegram_logger import telegram_logger
 from app.core.config import settings
 
@@ -13,27 +16,41 @@ async def update_fx_rates(data: Dict[str, Any]) -> None:
         try:
             fx_service = FxRateService()
 
-            currencies = ["USD", "EUR", "GBP", "JPY", "CHF", "CAD", "AUD"]
-            total_count = 0
+            report = await fx_service.ingest_latest_rates(
+                db, settings.fx_base_currencies_list
+            )
 
-            for base_currency in currencies:
-                count = await fx_service.update_rates_from_api(db, base_currency)
-                total_count += count
+            print(f"[FX] {report.summary()}")
 
-            await db.commit()
+            await telegram_logger.log_success(f"FX rates updated: {report.summary()}")
 
-            await telegram_logger.log_success(
-                f"FX rates updated: {total_count} rates imported"
-            )
+            if report.failed:
+                await telegram_logger.log_warning(
+                    "FX rates not fetched for: "
+                    + ", ".join(f"{base} ({error})" for base, error in report.failed.items())
+                )
 
         except Exception as e:
             await telegram_logger.log_error(f"FX worker error: {str(e)}")
 
 
+async def prune_fx_history() -> None:
+    async with AsyncSessionLocal() as db:
+        try:
+            rolled_up, pruned = await FxHistoryService().rollup_and_prune(db)
+
+            if pruned:
+                print(f"[FX] Pruned {pruned} rates into {rolled_up} daily rollups")
+
+        except Exception as e:
+            await telegram_logger.log_error(f"FX history retention error: {str(e)}")
+
+
 async def periodic_update() -> None:
     while True:
         try:
             await update_fx_rates({"action": "update_rates"})
+            await prune_fx_history()
             await asyncio.sleep(settings.fx_update_interval_seconds)
         except Exception as e:
             await telegram_logger.log_error(f"FX periodic update error: {str(e)}")
@@ -44,6 +61,7 @@ async def main() -> None:
     await telegram_logger.log_info("FX rate worker started")
 
     try:
+        await redis_client.connect()
         await message_broker.connect()
 
         periodic_task = asyncio.create_task(periodic_update())
@@ -62,6 +80,8 @@ async def main() -> None:
         await telegram_logger.log_critical(f"FX rate worker crashed: {str(e)}")
     finally:
         await message_broker.close()
+        await redis_client.disconnect()
+        await fx_rate_provider.close()
 
 
 if __name__ == "__main__":
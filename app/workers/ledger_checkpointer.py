@@ -0,0 +1,47 @@
+import asyncio
+from datetime import datetime, timedelta
+from app.db.session import AsyncSessionLocal
+from app.services.ledger_service import LedgerService, checkpoint_boundary
+from app.utils.telegram_logger import telegram_logger
+from app.core.config import settings
+
+
+async def write_checkpoints() -> None:
+    async with AsyncSessionLocal() as db:
+        try:
+            written = await LedgerService().create_checkpoints(db)
+
+            if written:
+                print(f"[Ledger] Wrote {written} balance checkpoints")
+
+        except Exception as e:
+            await telegram_logger.log_error(f"Ledger checkpoint error: {str(e)}")
+
+
+async def periodic_checkpoints() -> None:
+    while True:
+        await write_checkpoints()
+
+        # Wake up once the next boundary has settled.
+        now = datetime.utcnow()
+        next_run = (
+            checkpoint_boundary(now)
+            + timedelta(seconds=settings.ledger_checkpoint_interval_seconds)
+            + timedelta(seconds=settings.ledger_checkpoint_settle_seconds)
+        )
+        await asyncio.sleep(max((next_run - now).total_seconds(), 1))
+
+
+async def main() -> None:
+    await telegram_logger.log_info("Ledger checkpointer started")
+
+    try:
+        await periodic_checkpoints()
+    except KeyboardInterrupt:
+        await telegram_logger.log_info("Ledger checkpointer stopped")
+    except Exception as e:
+        await telegram_logger.log_critical(f"Ledger checkpointer crashed: {str(e)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
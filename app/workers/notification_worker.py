@@ -1,4 +1,5 @@
 import asyncio
+import signal
 import sys
 from typing import Dict, Any
 from app.utils.message_broker import message_broker
@@ -41,15 +42,20 @@ async def send_notification(data: Dict[str, Any]) -> None:
 
 async def main() -> None:
     await telegram_logger.log_info("Notification worker started")
+    asyncio.get_running_loop().add_signal_handler(
+        signal.SIGTERM, asyncio.current_task().cancel
+    )
 
     try:
         await message_broker.connect()
         await message_broker.consume_messages(
             settings.rabbitmq_notification_queue,
             send_notification,
-            prefetch_count=10,
+            prefetch_count=settings.notification_worker_concurrency,
+            concurrency=settings.notification_worker_concurrency,
+            ordering_key=lambda data: data.get("user_id"),
         )
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, asyncio.CancelledError):
         await telegram_logger.log_info("Notification worker stopped")
     except Exception as e:
         await telegram_logger.log_critical(f"Notification worker crashed: {str(e)}")
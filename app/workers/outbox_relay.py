@@ -0,0 +1,42 @@
+import asyncio
+from app.db.session import AsyncSessionLocal
+from app.services.outbox_service import OutboxService
+from app.utils.message_broker import message_broker
+from app.utils.telegram_logger import telegram_logger
+from app.core.config import settings
+
+
+async def relay_outbox() -> None:
+    outbox_service = OutboxService()
+
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                relayed = await outbox_service.relay_batch(
+                    db, settings.outbox_batch_size
+                )
+        except Exception as e:
+            await telegram_logger.log_error(f"Outbox relay error: {str(e)}")
+            relayed = 0
+
+        # A full batch means there is probably more waiting.
+        if relayed < settings.outbox_batch_size:
+            await asyncio.sleep(settings.outbox_poll_interval_ms / 1000)
+
+
+async def main() -> None:
+    await telegram_logger.log_info("Outbox relay started")
+
+    try:
+        await message_broker.connect()
+        await relay_outbox()
+    except KeyboardInterrupt:
+        await telegram_logger.log_info("Outbox relay stopped")
+    except Exception as e:
+        await telegram_logger.log_critical(f"Outbox relay crashed: {str(e)}")
+    finally:
+        await message_broker.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
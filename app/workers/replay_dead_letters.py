@@ -0,0 +1,29 @@
+import argparse
+import asyncio
+from typing import Optional
+from app.utils.brokers import dead_letter_queue_name
+from app.utils.message_broker import message_broker
+
+
+async def replay(queue_name: str, limit: Optional[int]) -> None:
+    try:
+        await message_broker.connect()
+        replayed = await message_broker.replay_dead_letters(queue_name, limit)
+        print(f"Replayed {replayed} messages from {dead_letter_queue_name(queue_name)}")
+    finally:
+        await message_broker.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Move dead-lettered messages back onto their work queue"
+    )
+    parser.add_argument("--queue", required=True, help="Work queue, e.g. transfer_processing")
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    asyncio.run(replay(args.queue, args.limit))
+
+
+if __name__ == "__main__":
+    main()
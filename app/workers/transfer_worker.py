@@ -1,17 +1,33 @@
 import asyncio
+import signal
 import sys
-from typing import Dict, Any
+from typing import Dict, Any, List
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models.audit import Audit
+from app.db.models.transfer import Transfer
 from app.db.session import AsyncSessionLocal
 from app.services.transfer_service import TransferService
 from app.services.audit_service import AuditService
-from app.utils.message_broker import message_broker
+from app.services.fx_snapshot import fx_snapshot_store
+from app.utils.message_broker import (
+    message_broker,
+    transfer_queue_arguments,
+    transfer_queue_base,
+)
+from app.utils.metrics import observe_transfer_latency, start_metrics_server
+from app.utils.redis_client import redis_client
+from app.utils.sharding import shard_queue_name, shard_queue_names
 from app.utils.telegram_logger import telegram_logger
 from app.core.config import settings
 
+TRANSFER_DRAIN_LEASE_TTL_SECONDS = 60
+TRANSFER_DRAIN_DONE_TTL_SECONDS = 86400
+
 
 async def process_transfer(data: Dict[str, Any]) -> None:
     transfer_id = data.get("transfer_id")
+    observe_transfer_latency(data)
 
     if not transfer_id:
         await telegram_logger.log_error("Transfer worker: Missing transfer_id")
@@ -22,7 +38,10 @@ async def process_transfer(data: Dict[str, Any]) -> None:
             transfer_service = TransferService()
             audit_service = AuditService()
 
-            transfer = await transfer_service.get_transfer_by_id(db, transfer_id)
+            if data.get("transfer"):
+                transfer = transfer_service.transfer_from_snapshot(db, data["transfer"])
+            else:
+                transfer = await transfer_service.get_transfer_by_id(db, transfer_id)
 
             if not transfer:
                 await telegram_logger.log_error(
@@ -30,7 +49,13 @@ async def process_transfer(data: Dict[str, Any]) -> None:
                 )
                 return
 
-            await transfer_service.execute_transfer(db, transfer)
+            if not await transfer_service.execute_transfer(db, transfer):
+                # A redelivery or retry of a transfer that is already final.
+                await telegram_logger.log_info(
+                    f"Transfer {transfer_id} already processed, skipping "
+                    f"(trace {data.get('trace_id')})"
+                )
+                return
 
             await audit_service.log_action(
                 db=db,
@@ -48,28 +73,192 @@ async def process_transfer(data: Dict[str, Any]) -> None:
                 f"{transfer.to_amount} {transfer.to_currency}"
             )
 
+        except ValueError as e:
+            await telegram_logger.log_error(
+                f"Transfer {transfer_id} failed: {str(e)} "
+                f"(trace {data.get('trace_id')})"
+            )
         except Exception as e:
             await telegram_logger.log_error(
-                f"Transfer worker error for transfer {transfer_id}: {str(e)}"
+                f"Transfer worker error for transfer {transfer_id}: {str(e)} "
+                f"(trace {data.get('trace_id')})"
             )
+            raise
 
 
-async def main() -> None:
-    await telegram_logger.log_info("Transfer worker started")
+async def process_transfer_batch(items: List[Dict[str, Any]]) -> None:
+    for item in items:
+        observe_transfer_latency(item)
+
+    transfer_ids = sorted({
+        item["transfer_id"] for item in items if item.get("transfer_id")
+    })
+
+    if len(transfer_ids) < len(items):
+        await telegram_logger.log_error(
+            f"Transfer worker: {len(items) - len(transfer_ids)} messages in batch "
+            "had a missing or duplicate transfer_id"
+        )
+    if not transfer_ids:
+        return
+
+    async with AsyncSessionLocal() as db:
+        transfer_service = TransferService()
+
+        snapshots = {
+            item["transfer_id"]: item["transfer"]
+            for item in items if item.get("transfer_id") and item.get("transfer")
+        }
+        transfers = [
+            transfer_service.transfer_from_snapshot(db, snapshot)
+            for snapshot in snapshots.values()
+        ]
+
+        unloaded = [transfer_id for transfer_id in transfer_ids if transfer_id not in snapshots]
+        if unloaded:
+            result = await db.execute(select(Transfer).where(Transfer.id.in_(unloaded)))
+            transfers.extend(result.scalars().all())
+
+        missing = set(transfer_ids) - {transfer.id for transfer in transfers}
+        for transfer_id in sorted(missing):
+            await telegram_logger.log_error(
+                f"Transfer worker: Transfer {transfer_id} not found"
+            )
+
+        results = await transfer_service.apply_transfers(db, transfers)
+
+        db.add_all([
+            Audit(
+                action="transfer_completed",
+                entity_type="transfer",
+                entity_id=transfer_id,
+                description=f"Transfer {transfer_id} completed successfully",
+            )
+            for transfer_id, error in results.items()
+            if error is None
+        ])
+        await db.commit()
+
+    failed = {transfer_id: error for transfer_id, error in results.items() if error}
+    for transfer_id, error in failed.items():
+        await telegram_logger.log_error(
+            f"Transfer worker error for transfer {transfer_id}: {error}"
+        )
+
+    await telegram_logger.log_success(
+        f"Transfer batch: {len(results) - len(failed)} completed, {len(failed)} failed"
+    )
 
+
+async def _hold_drain_lease(lease_key: str) -> None:
+    while True:
+        await asyncio.sleep(TRANSFER_DRAIN_LEASE_TTL_SECONDS / 3)
+        await redis_client.expire(lease_key, TRANSFER_DRAIN_LEASE_TTL_SECONDS)
+
+
+async def drain_previous_shards() -> None:
+    previous = settings.transfer_previous_layout
+    if previous is None:
+        return
+    shards, priority_lanes = previous
+
+    # Only one worker drains: two consumers on the same old queue would
+    # interleave messages for one account. The rest wait for it to finish,
+    # since no new-layout message may start before the old ones are done.
+    layout = f"{shards}:{int(priority_lanes)}"
+    done_key = f"transfer_drain_done:{layout}"
+    lease_key = f"transfer_drain_lease:{layout}"
+    while not await redis_client.set_if_absent(
+        lease_key, "1", TRANSFER_DRAIN_LEASE_TTL_SECONDS
+    ):
+        if await redis_client.get(done_key):
+            return
+        await asyncio.sleep(settings.transfer_drain_idle_seconds)
+    if await redis_client.get(done_key):
+        await redis_client.delete(lease_key)
+        return
+
+    lease = asyncio.create_task(_hold_drain_lease(lease_key))
     try:
-        await message_broker.connect()
+        # Old-layout messages must finish before any new-layout message for
+        # the same account can start, so every old queue is drained first.
+        for queue_name in shard_queue_names(
+            transfer_queue_base(priority_lanes), shards
+        ):
+            drained = await message_broker.drain_queue(
+                queue_name,
+                process_transfer,
+                idle_timeout=settings.transfer_drain_idle_seconds,
+                arguments=transfer_queue_arguments(shards, priority_lanes),
+            )
+            await telegram_logger.log_info(
+                f"Transfer worker: drained {drained} messages from {queue_name}"
+            )
+        await redis_client.set(done_key, "1", TRANSFER_DRAIN_DONE_TTL_SECONDS)
+    finally:
+        lease.cancel()
+        await asyncio.gather(lease, return_exceptions=True)
+        await redis_client.delete(lease_key)
+
+
+def transfer_ordering_key(data: Dict[str, Any]) -> Any:
+    # Older messages carry no account_id; fall back to the shard's order.
+    return data.get("account_id") or "unkeyed"
+
+
+async def consume_shard(shard: int) -> None:
+    queue_name = shard_queue_name(
+        transfer_queue_base(), shard, settings.transfer_shards
+    )
+    arguments = transfer_queue_arguments()
+
+    if settings.transfer_batch_size > 1:
+        await message_broker.consume_batches(
+            queue_name,
+            process_transfer_batch,
+            batch_size=settings.transfer_batch_size,
+            batch_timeout=settings.transfer_batch_timeout_ms / 1000,
+            arguments=arguments,
+        )
+    else:
         await message_broker.consume_messages(
-            settings.rabbitmq_transfer_queue,
+            queue_name,
             process_transfer,
-            prefetch_count=5,
+            prefetch_count=settings.transfer_worker_concurrency,
+            arguments=arguments,
+            concurrency=settings.transfer_worker_concurrency,
+            ordering_key=transfer_ordering_key,
         )
-    except KeyboardInterrupt:
+
+
+async def main() -> None:
+    await telegram_logger.log_info("Transfer worker started")
+
+    fx_watch_task = None
+    asyncio.get_running_loop().add_signal_handler(
+        signal.SIGTERM, asyncio.current_task().cancel
+    )
+
+    try:
+        start_metrics_server(settings.transfer_worker_metrics_port)
+        await redis_client.connect()
+        fx_watch_task = asyncio.create_task(fx_snapshot_store.watch(AsyncSessionLocal))
+
+        await message_broker.connect()
+        await drain_previous_shards()
+        await asyncio.gather(*(
+            consume_shard(shard) for shard in settings.transfer_worker_shards_list
+        ))
+    except (KeyboardInterrupt, asyncio.CancelledError):
         await telegram_logger.log_info("Transfer worker stopped")
     except Exception as e:
         await telegram_logger.log_critical(f"Transfer worker crashed: {str(e)}")
     finally:
+        if fx_watch_task:
+            fx_watch_task.cancel()
+            await asyncio.gather(fx_watch_task, return_exceptions=True)
         await message_broker.close()
+        await redis_client.disconnect()
 
 
 if __name__ == "__main__":
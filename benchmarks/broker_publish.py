@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import json
+import time
+from aio_pika import Message
+from app.utils.brokers import AmqpBroker
+
+QUEUE = "bench_transfers"
+
+
+class InMemoryExchange:
+
+    def __init__(self, channel: "InMemoryChannel"):
+        self.channel = channel
+
+    async def publish(self, message: Message, routing_key: str) -> None:
+        self.channel.connection.queues.setdefault(routing_key, []).append(message.body)
+        if self.channel.publisher_confirms:
+            await asyncio.sleep(self.channel.connection.rtt)
+
+
+class InMemoryChannel:
+
+    def __init__(self, connection: "InMemoryConnection", publisher_confirms: bool):
+        self.connection = connection
+        self.publisher_confirms = publisher_confirms
+        self.default_exchange = InMemoryExchange(self)
+        self.is_closed = False
+
+    async def declare_queue(self, name: str, **kwargs) -> None:
+        self.connection.declares += 1
+        await asyncio.sleep(self.connection.rtt)
+
+    async def close(self) -> None:
+        return None
+
+
+class InMemoryConnection:
+    # Stands in for RabbitMQ: every declare and every confirm costs one RTT.
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.queues = {}
+        self.declares = 0
+
+    async def channel(self, publisher_confirms: bool = True) -> InMemoryChannel:
+        return InMemoryChannel(self, publisher_confirms)
+
+    async def close(self) -> None:
+        return None
+
+
+async def publish_legacy(channel: InMemoryChannel, messages) -> None:
+    # The previous publish_message: declare on every call, one shared channel.
+    for message in messages:
+        await channel.declare_queue(QUEUE, durable=True)
+        await channel.default_exchange.publish(
+            Message(body=json.dumps(message).encode(), delivery_mode=2),
+            routing_key=QUEUE,
+        )
+
+
+async def run(count: int, rtt: float, concurrency: int) -> None:
+    messages = [{"transfer_id": i, "action": "process"} for i in range(count)]
+
+    def report(name: str, elapsed: float, connection: InMemoryConnection) -> None:
+        print(
+            f"{name:<34}: {count / elapsed:10.0f} msg/s "
+            f"({connection.declares} declares)"
+        )
+
+    print(f"messages={count} rtt={rtt * 1000:.1f}ms concurrency={concurrency}")
+
+    connection = InMemoryConnection(rtt)
+    channel = await connection.channel()
+    start = time.perf_counter()
+    await publish_legacy(channel, messages)
+    report("declare + publish per message", time.perf_counter() - start, connection)
+
+    broker = AmqpBroker()
+    broker.connection = InMemoryConnection(rtt)
+    await broker.open_channels()
+
+    start = time.perf_counter()
+    chunks = [messages[i::concurrency] for i in range(concurrency)]
+
+    async def publish_each(chunk) -> None:
+        for message in chunk:
+            await broker.publish_message(QUEUE, message)
+
+    await asyncio.gather(*(publish_each(chunk) for chunk in chunks))
+    report("pooled publish_message", time.perf_counter() - start, broker.connection)
+
+    broker.connection = InMemoryConnection(rtt)
+    await broker.open_channels()
+    start = time.perf_counter()
+    await broker.publish_many(QUEUE, messages)
+    report("publish_many (batched confirms)", time.perf_counter() - start, broker.connection)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark AmqpBroker publishing")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.count, args.rtt_ms / 1000, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
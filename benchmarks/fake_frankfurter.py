@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+from decimal import Decimal
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+import uvicorn
+
+USD_RATES = {
+    "USD": "1.0", "EUR": "0.92", "GBP": "0.79", "JPY": "149.50", "CHF": "0.88",
+    "CAD": "1.36", "AUD": "1.52", "NZD": "1.64", "SEK": "10.45", "NOK": "10.60",
+    "DKK": "6.86", "PLN": "3.98", "CZK": "22.70", "HUF": "355.20", "RON": "4.57",
+    "BGN": "1.80", "TRY": "32.10", "ILS": "3.70", "ZAR": "18.60", "BRL": "4.97",
+    "MXN": "17.05", "CNY": "7.19", "HKD": "7.82", "SGD": "1.34", "KRW": "1330.00",
+    "INR": "83.10", "IDR": "15600.00", "MYR": "4.72", "PHP": "56.10", "THB": "35.90",
+    "ISK": "137.50",
+}
+
+config = {
+    "latency": 0.02,
+    "jitter": 0.01,
+    "error_rate": 0.0,
+    "rotate_every": 0.0,
+}
+
+app = FastAPI(title="Fake Frankfurter")
+
+
+def _generation() -> int:
+    if not config["rotate_every"]:
+        return 0
+    return int(time.time() // config["rotate_every"])
+
+
+def _rates_for(base: str, generation: int) -> dict:
+    drift = Decimal(1) + Decimal(generation % 7) / Decimal(10000)
+    base_in_usd = Decimal(USD_RATES[base])
+    return {
+        currency: float((Decimal(rate) / base_in_usd * drift).quantize(Decimal("0.00001")))
+        for currency, rate in USD_RATES.items()
+        if currency != base
+    }
+
+
+@app.get("/v1/latest")
+async def latest(request: Request, base: str = "EUR"):
+    await asyncio.sleep(config["latency"] + random.uniform(0, config["jitter"]))
+
+    if random.random() < config["error_rate"]:
+        return Response(status_code=503)
+
+    base = base.upper()
+    if base not in USD_RATES:
+        return JSONResponse({"message": "not found"}, status_code=404)
+
+    generation = _generation()
+    etag = f'"{base}-{generation}"'
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return JSONResponse(
+        {
+            "amount": 1.0,
+            "base": base,
+            "date": datetime.utcnow().date().isoformat(),
+            "rates": _rates_for(base, generation),
+        },
+        headers={"ETag": etag},
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local Frankfurter stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=config["latency"])
+    parser.add_argument("--jitter", type=float, default=config["jitter"])
+    parser.add_argument("--error-rate", type=float, default=config["error_rate"])
+    parser.add_argument(
+        "--rotate-every",
+        type=float,
+        default=config["rotate_every"],
+        help="Seconds between rate changes (0 keeps rates fixed)",
+    )
+    args = parser.parse_args()
+
+    config.update(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rotate_every=args.rotate_every,
+    )
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
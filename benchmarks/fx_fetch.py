@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+import time
+import httpx
+from app.utils.frankfurter_client import FrankfurterClient
+
+BASES = ["USD", "EUR", "GBP", "JPY", "CHF", "CAD", "AUD"]
+
+
+async def fetch_with_new_clients(url: str, bases) -> None:
+    for base in bases:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"{url}/v1/latest", params={"base": base})
+            response.raise_for_status()
+            response.json()
+
+
+async def fetch_pooled(client: FrankfurterClient, bases, conditional: bool) -> int:
+    results = await asyncio.gather(
+        *(client.fetch_latest(base, conditional=conditional) for base in bases)
+    )
+    client.confirm_validators(bases)
+    return sum(1 for result in results if result is None)
+
+
+async def run(url: str, rounds: int) -> None:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await fetch_with_new_clients(url, BASES)
+    naive = time.perf_counter() - start
+
+    client = FrankfurterClient(url)
+    try:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await fetch_pooled(client, BASES, conditional=False)
+        pooled = time.perf_counter() - start
+
+        await fetch_pooled(client, BASES, conditional=False)
+        start = time.perf_counter()
+        unchanged = 0
+        for _ in range(rounds):
+            unchanged += await fetch_pooled(client, BASES, conditional=True)
+        conditional = time.perf_counter() - start
+    finally:
+        await client.close()
+
+    def per_round(total: float) -> str:
+        return f"{total / rounds * 1000:.1f}ms/round"
+
+    print(f"bases={len(BASES)} rounds={rounds}")
+    print(f"serial, new client per call : {per_round(naive)}")
+    print(f"concurrent, pooled client   : {per_round(pooled)}")
+    print(
+        f"pooled + conditional (304)  : {per_round(conditional)} "
+        f"({unchanged}/{rounds * len(BASES)} unchanged)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Frankfurter fetch strategies")
+    parser.add_argument("--url", default="http://127.0.0.1:8081")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
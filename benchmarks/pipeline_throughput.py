@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import time
+import uuid
+from decimal import Decimal
+from typing import List, Tuple
+from httpx import AsyncClient
+from sqlalchemy import select, func
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.models.account import Account
+from app.db.models.transfer import Transfer, TransferStatus
+from app.db.models.user import User
+from app.db.session import AsyncSessionLocal, engine, init_db
+from app.main import app
+from app.utils.message_broker import message_broker
+from app.workers.outbox_relay import relay_outbox
+from app.workers.transfer_worker import consume_shard
+
+AMOUNT = "1.00"
+
+
+async def setup(accounts: int) -> List[Tuple[str, int, int]]:
+    # One user per account: each may hold a single account per currency.
+    async with AsyncSessionLocal() as db:
+        run = uuid.uuid4().hex[:12]
+        users = [
+            User(email=f"bench-{run}-{i}@example.com", hashed_password="x")
+            for i in range(accounts)
+        ]
+        db.add_all(users)
+        await db.flush()
+
+        rows = [
+            Account(user_id=user.id, currency="USD", balance=Decimal("1000000.00"))
+            for user in users
+        ]
+        db.add_all(rows)
+        await db.commit()
+
+    return [
+        (
+            create_access_token({"sub": str(users[i].id)}),
+            rows[i].id,
+            rows[(i + 1) % accounts].id,
+        )
+        for i in range(accounts)
+    ]
+
+
+async def finished_since(started_after: int) -> int:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(func.count(Transfer.id)).where(
+                Transfer.id > started_after,
+                Transfer.status.in_([TransferStatus.COMPLETED, TransferStatus.FAILED]),
+            )
+        )
+        return result.scalar_one()
+
+
+async def run(accounts: int, transfers: int, concurrency: int, timeout: float) -> None:
+    await init_db()
+    await message_broker.connect()
+    routes = await setup(accounts)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(func.coalesce(func.max(Transfer.id), 0)))
+        last_transfer_id = result.scalar_one()
+
+    workers = [asyncio.create_task(relay_outbox())] + [
+        asyncio.create_task(consume_shard(shard))
+        for shard in settings.transfer_worker_shards_list
+    ]
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(transfers):
+        queue.put_nowait(routes[i % accounts])
+    errors = 0
+
+    async def client_loop(client: AsyncClient) -> None:
+        nonlocal errors
+        while not queue.empty():
+            token, source, target = queue.get_nowait()
+            response = await client.post(
+                "/api/v1/transfers",
+                json={"from_account_id": source, "to_account_id": target, "from_amount": AMOUNT},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            if response.status_code != 201:
+                errors += 1
+
+    print(
+        f"backend={settings.message_broker_backend} transfers={transfers} "
+        f"accounts={accounts} concurrency={concurrency} "
+        f"shards={len(settings.transfer_worker_shards_list)}"
+    )
+
+    try:
+        start = time.perf_counter()
+        async with AsyncClient(app=app, base_url="http://bench") as client:
+            await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        accepted = time.perf_counter() - start
+        print(f"{'API accepted':<14}: {transfers / accepted:8.1f} transfers/s, errors={errors}")
+
+        expected = transfers - errors
+        finished = 0
+        while time.perf_counter() - start < timeout:
+            finished = await finished_since(last_transfer_id)
+            if finished >= expected:
+                break
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{'end to end':<14}: {finished / elapsed:8.1f} transfers/s, "
+            f"finished={finished}/{expected}"
+        )
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await message_broker.close()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark API to worker transfer throughput in one process. "
+                    "The broker comes from MESSAGE_BROKER_BACKEND and the "
+                    "database from DATABASE_URL."
+    )
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--transfers", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.accounts, args.transfers, args.concurrency, args.timeout))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.core.config import settings
+from app.db.base import Base
+from app.db.models.account import Account
+from app.db.models.ledger_entry import LedgerEntry, LedgerEntryType
+from app.db.models.transfer import Transfer, TransferStatus
+from app.db.models.user import User
+from app.services.account_service import AccountService
+from app.services.transfer_service import TransferService
+
+AMOUNT = Decimal("1.00")
+
+
+async def legacy_execute_transfer(db: AsyncSession, transfer: Transfer) -> None:
+    # The pre-locking implementation: read, modify, flush, refresh per account.
+    account_service = AccountService()
+    transfer.status = TransferStatus.PROCESSING
+    await db.flush()
+
+    from_account = await account_service.get_account_by_id(db, transfer.from_account_id)
+    to_account = await account_service.get_account_by_id(db, transfer.to_account_id)
+
+    await account_service.update_balance(db, from_account, -transfer.from_amount)
+    db.add(LedgerEntry(
+        account_id=from_account.id,
+        transfer_id=transfer.id,
+        entry_type=LedgerEntryType.DEBIT,
+        amount=transfer.from_amount,
+        currency=from_account.currency,
+        balance_after=from_account.balance,
+    ))
+
+    await account_service.update_balance(db, to_account, transfer.to_amount)
+    db.add(LedgerEntry(
+        account_id=to_account.id,
+        transfer_id=transfer.id,
+        entry_type=LedgerEntryType.CREDIT,
+        amount=transfer.to_amount,
+        currency=to_account.currency,
+        balance_after=to_account.balance,
+    ))
+
+    transfer.status = TransferStatus.COMPLETED
+    transfer.completed_at = datetime.utcnow()
+    await db.commit()
+
+
+async def locked_execute_transfer(db: AsyncSession, transfer: Transfer) -> None:
+    await TransferService().execute_transfer(db, transfer)
+
+
+async def setup(session_factory, sources: int, transfers: int):
+    async with session_factory() as db:
+        user = User(email=f"bench-{uuid.uuid4().hex[:12]}@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+
+        hot = Account(user_id=user.id, currency="USD", balance=Decimal("0.00"))
+        source_accounts = [
+            Account(user_id=user.id, currency="USD", balance=Decimal("1000000.00"))
+            for _ in range(sources)
+        ]
+        db.add(hot)
+        db.add_all(source_accounts)
+        await db.flush()
+
+        transfer_rows = [
+            Transfer(
+                from_account_id=source_accounts[i % sources].id,
+                to_account_id=hot.id,
+                from_currency="USD",
+                to_currency="USD",
+                from_amount=AMOUNT,
+                to_amount=AMOUNT,
+                exchange_rate=Decimal("1.0"),
+                commission_amount=Decimal("0.00"),
+                fixed_commission=Decimal("0.00"),
+                percentage_commission=Decimal("0.00"),
+                status=TransferStatus.CREATED,
+                user_id=user.id,
+            )
+            for i in range(transfers)
+        ]
+        db.add_all(transfer_rows)
+        await db.commit()
+        return hot.id, [transfer.id for transfer in transfer_rows]
+
+
+async def run_variant(session_factory, execute, transfer_ids: List[int], concurrency: int):
+    queue: asyncio.Queue = asyncio.Queue()
+    for transfer_id in transfer_ids:
+        queue.put_nowait(transfer_id)
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        while not queue.empty():
+            transfer_id = queue.get_nowait()
+            async with session_factory() as db:
+                try:
+                    transfer = await db.get(Transfer, transfer_id)
+                    await execute(db, transfer)
+                except Exception:
+                    errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, errors
+
+
+async def run(database_url: str, sources: int, transfers: int, concurrency: int) -> None:
+    pool_options = {} if database_url.startswith("sqlite") else {
+        "pool_size": concurrency,
+        "max_overflow": 0,
+    }
+    engine = create_async_engine(database_url, **pool_options)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    print(f"transfers={transfers} sources={sources} concurrency={concurrency}")
+    try:
+        for name, execute in (
+            ("read-modify-write", legacy_execute_transfer),
+            ("row-locked", locked_execute_transfer),
+        ):
+            hot_id, transfer_ids = await setup(session_factory, sources, transfers)
+            elapsed, errors = await run_variant(
+                session_factory, execute, transfer_ids, concurrency
+            )
+
+            async with session_factory() as db:
+                result = await db.execute(select(Account.balance).where(Account.id == hot_id))
+                balance = result.scalar_one()
+
+            expected = AMOUNT * (transfers - errors)
+            lost = int((expected - balance) / AMOUNT)
+            print(
+                f"{name:<18}: {transfers / elapsed:8.1f} transfers/s, "
+                f"errors={errors}, lost updates={lost}"
+            )
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark transfer execution against a single hot account"
+    )
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--sources", type=int, default=20)
+    parser.add_argument("--transfers", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.database_url, args.sources, args.transfers, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -16,8 +16,9 @@ setup(
         "asyncpg>=0.29.0",
         "python-jose[cryptography]>=3.3.0",
         "passlib[bcrypt]>=1.7.4",
-        "httpx>=0.26.0",
+        "httpx[http2]>=0.26.0",
         "aio-pika>=9.4.0",
+        "msgpack>=1.0.7",
         "redis>=5.0.1",
         "python-telegram-bot>=20.8",
         "babel>=2.14.0",
@@ -7,6 +7,9 @@ from app.main import app
 from app.db.base import Base
 from app.db.session import get_db
 from app.core.config import settings
+from app.services.currency_registry import currency_registry
+from app.services.fx_snapshot import fx_snapshot_store
+from app.services.fx_history_service import reset_time_index
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
@@ -18,6 +21,17 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def reset_fx_snapshot():
+    fx_snapshot_store.clear()
+    currency_registry.clear()
+    reset_time_index()
+    yield
+    fx_snapshot_store.clear()
+    currency_registry.clear()
+    reset_time_index()
+
+
 @pytest.fixture(scope="function")
 async def db_engine():
     engine = create_async_engine(TEST_DATABASE_URL, echo=False)
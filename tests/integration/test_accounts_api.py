@@ -0,0 +1,132 @@
+import csv
+import json
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from httpx import AsyncClient
+
+
+async def _auth_headers(client: AsyncClient, email: str = "holder@example.com") -> dict:
+    await client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "SecurePassword123!",
+        },
+    )
+    response = await client.post(
+        "/api/v1/auth/login",
+        json={
+            "email": email,
+            "password": "SecurePassword123!",
+        },
+    )
+    token = response.json()["data"]["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def _create_account(client: AsyncClient, headers: dict, currency: str) -> int:
+    response = await client.post(
+        "/api/v1/accounts", json={"currency": currency}, headers=headers
+    )
+    return response.json()["data"]["id"]
+
+
+async def _balance_at(client: AsyncClient, headers: dict, account_id: int, at: str):
+    response = await client.get(
+        f"/api/v1/accounts/{account_id}/balance", params={"at": at}, headers=headers
+    )
+    if response.status_code != 200:
+        return response.status_code
+    return Decimal(response.json()["data"]["balance"])
+
+
+@pytest.mark.asyncio
+async def test_balance_as_of_covers_deposits_withdrawals_and_transfers(client: AsyncClient):
+    headers = await _auth_headers(client)
+    payee_headers = await _auth_headers(client, "payee@example.com")
+    source = await _create_account(client, headers, "USD")
+    target = await _create_account(client, payee_headers, "USD")
+    points = [datetime.utcnow().isoformat()]
+
+    await client.post(
+        f"/api/v1/accounts/{source}/deposit", json={"amount": "100.00"}, headers=headers
+    )
+    points.append(datetime.utcnow().isoformat())
+
+    await client.post(
+        "/api/v1/transfers?execute=sync",
+        json={"from_account_id": source, "to_account_id": target, "from_amount": "10.00"},
+        headers=headers,
+    )
+    points.append(datetime.utcnow().isoformat())
+
+    await client.post(
+        f"/api/v1/accounts/{source}/withdraw", json={"amount": "20.00"}, headers=headers
+    )
+    points.append(datetime.utcnow().isoformat())
+
+    response = await client.get(f"/api/v1/accounts/{source}", headers=headers)
+    current = Decimal(response.json()["data"]["balance"])
+    after_transfer = current + Decimal("20.00")
+
+    assert [await _balance_at(client, headers, source, at) for at in points] == [
+        404,
+        Decimal("100.00"),
+        after_transfer,
+        current,
+    ]
+    assert await _balance_at(client, payee_headers, target, points[1]) == 404
+    assert await _balance_at(client, payee_headers, target, points[3]) == Decimal("10.00")
+
+    response = await client.post(
+        "/api/v1/accounts/balances/batch",
+        json={"account_ids": [source, target], "at": points[3]},
+        headers=headers,
+    )
+    data = response.json()["data"]
+    assert Decimal(data[0]["balance"]) == current
+    assert data[1]["error"] == "Account not found"
+
+
+@pytest.mark.asyncio
+async def test_statement_streams_ledger_entries(client: AsyncClient):
+    headers = await _auth_headers(client)
+    payee_headers = await _auth_headers(client, "payee@example.com")
+    source = await _create_account(client, headers, "USD")
+    target = await _create_account(client, payee_headers, "USD")
+    await client.post(
+        f"/api/v1/accounts/{source}/deposit", json={"amount": "100.00"}, headers=headers
+    )
+    for amount in ("10.00", "20.00"):
+        await client.post(
+            "/api/v1/transfers?execute=sync",
+            json={"from_account_id": source, "to_account_id": target, "from_amount": amount},
+            headers=headers,
+        )
+
+    response = await client.get(
+        f"/api/v1/accounts/{target}/statement",
+        params={"format": "jsonl"},
+        headers={**payee_headers, "Accept-Encoding": "br;q=1.0, GZIP;q=0.5"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    entries = [json.loads(line) for line in response.text.splitlines()]
+    assert [(entry["entry_type"], entry["balance_after"]) for entry in entries] == [
+        ("credit", "10.00"),
+        ("credit", "30.00"),
+    ]
+
+    for accept_encoding in ("identity", "gzip;q=0, identity", "x-gzip", "*;q=0"):
+        response = await client.get(
+            f"/api/v1/accounts/{target}/statement",
+            headers={**payee_headers, "Accept-Encoding": accept_encoding},
+        )
+        assert "content-encoding" not in response.headers
+    rows = list(csv.reader(response.text.splitlines()))
+    assert rows[0][:3] == ["id", "created_at", "entry_type"]
+    assert len(rows) == 3
+
+    response = await client.get(f"/api/v1/accounts/{target}/statement", headers=headers)
+    assert response.status_code == 403
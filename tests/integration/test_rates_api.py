@@ -0,0 +1,100 @@
+import pytest
+from decimal import Decimal
+from datetime import datetime
+from httpx import AsyncClient
+from app.db.models.fx_rate import FxRate
+from app.services.fx_providers import StaticFxRateProvider
+from app.services.fx_rate_service import FxRateService
+from app.services.fx_snapshot import fx_snapshot_store
+
+
+async def _auth_headers(client: AsyncClient) -> dict:
+    await client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": "rates@example.com",
+            "password": "SecurePassword123!",
+        },
+    )
+    response = await client.post(
+        "/api/v1/auth/login",
+        json={
+            "email": "rates@example.com",
+            "password": "SecurePassword123!",
+        },
+    )
+    token = response.json()["data"]["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.asyncio
+async def test_latest_rates_served_from_snapshot(client: AsyncClient, db_session):
+    db_session.add(
+        FxRate(
+            base_currency="USD",
+            quote_currency="EUR",
+            rate=Decimal("0.92"),
+            rate_date=datetime.utcnow(),
+            source="test",
+        )
+    )
+    await db_session.commit()
+    await fx_snapshot_store.refresh(db_session)
+
+    headers = await _auth_headers(client)
+
+    response = await client.get("/api/v1/rates/latest?base=usd", headers=headers)
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["base"] == "USD"
+    assert Decimal(data["rates"]["EUR"]) == Decimal("0.92")
+    assert response.headers["cache-control"].startswith("private, max-age=")
+
+    etag = response.headers["etag"]
+    response = await client.get(
+        "/api/v1/rates/latest?base=USD",
+        headers={**headers, "If-None-Match": etag},
+    )
+
+    assert response.status_code == 304
+
+    response = await client.get(
+        "/api/v1/rates/latest?base=USD",
+        headers={**headers, "If-None-Match": f'"stale", {etag.removeprefix("W/")}'},
+    )
+    assert response.status_code == 304
+
+    response = await client.get(
+        "/api/v1/rates/latest?base=USD",
+        headers={**headers, "If-None-Match": "*"},
+    )
+    assert response.status_code == 304
+
+    response = await client.get(
+        "/api/v1/rates/latest?base=USD",
+        headers={**headers, "If-None-Match": 'W/"stale"'},
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_latest_rates_etag_follows_checked_at(client: AsyncClient, db_session):
+    fx_service = FxRateService()
+    fx_service.provider = StaticFxRateProvider({"USD": {"EUR": Decimal("0.92")}})
+    await fx_service.ingest_latest_rates(db_session, ["USD"])
+
+    headers = await _auth_headers(client)
+    response = await client.get("/api/v1/rates/latest?base=USD", headers=headers)
+    etag = response.headers["etag"]
+    version = response.json()["data"]["version"]
+
+    report = await fx_service.ingest_latest_rates(db_session, ["USD"])
+    assert report.version == version
+
+    response = await client.get(
+        "/api/v1/rates/latest?base=USD",
+        headers={**headers, "If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
@@ -0,0 +1,167 @@
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from app.core.config import settings
+from app.utils.message_broker import transfer_queue_base
+from app.db.models.outbox_message import OutboxMessage
+from app.db.models.fx_rate import FxRate
+from app.db.models.user import User
+from app.services.fx_snapshot import fx_snapshot_store
+
+
+async def _auth_headers(client: AsyncClient, email: str = "payroll@example.com") -> dict:
+    await client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "SecurePassword123!",
+        },
+    )
+    response = await client.post(
+        "/api/v1/auth/login",
+        json={
+            "email": email,
+            "password": "SecurePassword123!",
+        },
+    )
+    token = response.json()["data"]["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def _create_account(client: AsyncClient, headers: dict, currency: str) -> int:
+    response = await client.post(
+        "/api/v1/accounts", json={"currency": currency}, headers=headers
+    )
+    return response.json()["data"]["id"]
+
+
+async def _queued_transfers(db_session) -> list:
+    result = await db_session.execute(
+        select(OutboxMessage.payload)
+        .where(OutboxMessage.queue_name == transfer_queue_base())
+        .order_by(OutboxMessage.id)
+    )
+    return [payload["transfer_id"] for payload in result.scalars().all()]
+
+
+@pytest.mark.asyncio
+async def test_sync_execution_for_same_currency_transfer(client: AsyncClient, db_session):
+    headers = await _auth_headers(client)
+    payee_headers = await _auth_headers(client, "payee@example.com")
+    source = await _create_account(client, headers, "USD")
+    target = await _create_account(client, payee_headers, "USD")
+    await client.post(
+        f"/api/v1/accounts/{source}/deposit", json={"amount": "100.00"}, headers=headers
+    )
+
+    response = await client.post(
+        "/api/v1/transfers?execute=sync",
+        json={"from_account_id": source, "to_account_id": target, "from_amount": "10.00"},
+        headers=headers,
+    )
+
+    assert response.status_code == 201
+    assert response.json()["data"]["status"] == "completed"
+    assert await _queued_transfers(db_session) == []
+
+    response = await client.get(f"/api/v1/accounts/{target}", headers=payee_headers)
+    assert Decimal(response.json()["data"]["balance"]) == Decimal("10.00")
+
+
+@pytest.mark.asyncio
+async def test_sync_execution_checks_the_destination(client: AsyncClient, db_session):
+    headers = await _auth_headers(client)
+    payee_headers = await _auth_headers(client, "payee@example.com")
+    source = await _create_account(client, headers, "USD")
+    target = await _create_account(client, payee_headers, "USD")
+    await client.post(
+        f"/api/v1/accounts/{source}/deposit", json={"amount": "100.00"}, headers=headers
+    )
+    await db_session.execute(
+        update(User).where(User.email == "payee@example.com").values(is_active=False)
+    )
+    await db_session.commit()
+
+    response = await client.post(
+        "/api/v1/transfers?execute=sync",
+        json={"from_account_id": source, "to_account_id": target, "from_amount": "10.00"},
+        headers=headers,
+    )
+
+    assert response.status_code == 422
+    assert response.json()["status"] == "error"
+    data = response.json()["data"]
+    assert data["status"] == "failed"
+    assert data["error_message"] == "Destination account is inactive"
+    assert await _queued_transfers(db_session) == []
+    result = await db_session.execute(
+        select(OutboxMessage).where(
+            OutboxMessage.queue_name == settings.rabbitmq_notification_queue
+        )
+    )
+    assert result.scalars().all() == []
+
+    response = await client.get(f"/api/v1/accounts/{source}", headers=headers)
+    assert Decimal(response.json()["data"]["balance"]) == Decimal("100.00")
+    assert Decimal(response.json()["data"]["held_balance"]) == Decimal("0.00")
+
+
+@pytest.mark.asyncio
+async def test_batch_transfers_from_csv(client: AsyncClient, db_session):
+    db_session.add(
+        FxRate(
+            base_currency="USD",
+            quote_currency="EUR",
+            rate=Decimal("0.5"),
+            rate_date=datetime.utcnow(),
+            source="test",
+        )
+    )
+    await db_session.commit()
+    await fx_snapshot_store.refresh(db_session)
+
+    headers = await _auth_headers(client)
+    source = await _create_account(client, headers, "USD")
+    target = await _create_account(client, headers, "EUR")
+    await client.post(
+        f"/api/v1/accounts/{source}/deposit", json={"amount": "100.00"}, headers=headers
+    )
+
+    body = (
+        "from_account_id,to_account_id,from_amount,idempotency_key\n"
+        f"{source},{target},40.00,pay-1\n"
+        f"{source},{target},40.00,pay-2\n"
+        f"{source},{target},40.00,pay-3\n"
+        f"{source},999,1.00,\n"
+        f"{source},{target},,pay-4\n"
+    )
+    response = await client.post(
+        "/api/v1/transfers/batch",
+        content=body,
+        headers={**headers, "Content-Type": "text/csv"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert (data["created"], data["failed"]) == (2, 3)
+    assert [result["status"] for result in data["results"]] == [
+        "created", "created", "error", "error", "error"
+    ]
+    assert data["results"][2]["error"] == "Insufficient funds"
+    assert data["results"][3]["error"] == "Destination account not found"
+    assert Decimal(data["results"][0]["transfer"]["to_amount"]) == Decimal("20.00")
+    published = await _queued_transfers(db_session)
+    assert len(published) == 2
+
+    response = await client.post(
+        "/api/v1/transfers/batch",
+        content=f'{{"from_account_id": {source}, "to_account_id": {target}, '
+                f'"from_amount": "40.00", "idempotency_key": "pay-1"}}\n',
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+
+    data = response.json()["data"]
+    assert data["existing"] == 1
+    assert data["results"][0]["transfer"]["id"] == published[0]
@@ -0,0 +1,67 @@
+import pytest
+from app.utils.batch_input import iter_records
+
+
+async def _chunks(body: bytes, size: int):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+async def _records(content_type: str, body: bytes, size: int = 3, max_bytes=None):
+    return [
+        record
+        async for record in iter_records(content_type, _chunks(body, size), max_bytes)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_csv_fields_may_span_lines():
+    body = (
+        'from_account_id,to_account_id,from_amount,description\r\n'
+        '1,2,10.00,"rent\r\nfor ""May"", flat 4"\r\n'
+        '\r\n'
+        '1,2,5.00\r\n'
+    ).encode()
+
+    assert await _records("text/csv", body) == [
+        {
+            "from_account_id": "1",
+            "to_account_id": "2",
+            "from_amount": "10.00",
+            "description": 'rent\nfor "May", flat 4',
+        },
+        "Expected 4 columns, got 3",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_json_array_is_parsed_incrementally():
+    body = ' [ {"from_amount": "1.50", "note": "é ]"}, 7 ,{"to_amount": 12} ] '.encode()
+
+    for size in (1, 2, 5, len(body)):
+        assert await _records("application/json", body, size) == [
+            {"from_amount": "1.50", "note": "é ]"},
+            "Expected a JSON object",
+            {"to_amount": 12},
+        ]
+
+
+@pytest.mark.asyncio
+async def test_json_array_errors():
+    with pytest.raises(ValueError, match="Expected a JSON array"):
+        await _records("application/json", b'{"from_amount": 1}')
+    with pytest.raises(ValueError, match="Invalid JSON"):
+        await _records("application/json", b'[{"from_amount": 1}')
+    with pytest.raises(ValueError, match="Invalid JSON"):
+        await _records("application/json", b'[{"from_amount": 1}] []')
+
+
+@pytest.mark.asyncio
+async def test_body_is_cut_off_at_max_bytes():
+    records = iter_records(
+        "application/json", _chunks(b'[{"a": 1}, {"b": 2}, {"c": 3}]', 10), 15
+    )
+
+    assert await records.__anext__() == {"a": 1}
+    with pytest.raises(ValueError, match="Batch exceeds 15 bytes"):
+        await records.__anext__()
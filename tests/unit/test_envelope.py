@@ -0,0 +1,40 @@
+import json
+import pytest
+from app.utils.brokers.envelope import (
+    CODEC_JSON,
+    CODEC_MSGPACK,
+    decode_envelope,
+    encode_envelope,
+)
+
+TASKS = [
+    {"transfer_id": 1, "lane": "express", "enqueued_at": 100.0, "trace_id": "abc"},
+    {"transfer_id": 2, "lane": "bulk", "enqueued_at": 100.0, "trace_id": "abc"},
+]
+
+
+@pytest.mark.parametrize("codec", [CODEC_JSON, CODEC_MSGPACK])
+def test_batch_envelope_round_trip(codec):
+    if codec == CODEC_MSGPACK:
+        pytest.importorskip("msgpack")
+
+    body = encode_envelope(TASKS, codec)
+
+    assert decode_envelope(body) == TASKS
+    assert body.count(b"abc") == 1
+
+
+def test_msgpack_envelope_is_smaller_than_json():
+    pytest.importorskip("msgpack")
+    legacy = b"".join(json.dumps(task).encode() for task in TASKS)
+
+    assert len(encode_envelope(TASKS, CODEC_MSGPACK)) < len(legacy)
+
+
+def test_decode_accepts_legacy_json_and_rejects_unknown_versions():
+    assert decode_envelope(b'{"transfer_id": 7}') == [{"transfer_id": 7}]
+
+    with pytest.raises(ValueError):
+        decode_envelope(b"\x00\x09j{}")
+    with pytest.raises(ValueError):
+        decode_envelope(b"[1, 2]")
@@ -0,0 +1,40 @@
+import pytest
+import httpx
+from decimal import Decimal
+from app.utils.frankfurter_client import FrankfurterClient
+
+
+def _client_with(handler) -> FrankfurterClient:
+    client = FrankfurterClient("http://frankfurter.test")
+    client.retry_backoff = 0
+    client.client = httpx.AsyncClient(
+        base_url="http://frankfurter.test",
+        transport=httpx.MockTransport(handler),
+    )
+    return client
+
+
+@pytest.mark.asyncio
+async def test_retries_then_skips_unchanged_rates():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(503)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"rates": {"EUR": 0.92}}, headers={"ETag": '"v1"'})
+
+    client = _client_with(handler)
+
+    rates = await client.fetch_latest("USD")
+    assert rates == {"USD": Decimal("1.0"), "EUR": Decimal("0.92")}
+    assert len(calls) == 2
+
+    # Validators only count once the caller confirms the rates were stored.
+    assert await client.fetch_latest("USD") is not None
+    client.confirm_validators(["USD"])
+    assert await client.fetch_latest("USD") is None
+
+    await client.close()
@@ -0,0 +1,94 @@
+import pytest
+from decimal import Decimal
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from app.services.fx_history_service import FxHistoryService, FxRateTimeIndex
+from app.db.models.fx_rate import FxRate
+from app.db.models.fx_rate_daily import FxRateDaily
+
+
+@pytest.mark.asyncio
+async def test_rollup_and_prune_builds_daily_candles(db_session):
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    old_day = today - timedelta(days=10)
+    for hour, rate in enumerate(["0.90", "0.95", "0.88", "0.91"]):
+        db_session.add(
+            FxRate(
+                base_currency="USD",
+                quote_currency="EUR",
+                rate=Decimal(rate),
+                rate_date=old_day + timedelta(hours=hour),
+                source="test",
+            )
+        )
+    db_session.add(
+        FxRate(
+            base_currency="USD",
+            quote_currency="EUR",
+            rate=Decimal("0.92"),
+            rate_date=datetime.utcnow(),
+            source="test",
+        )
+    )
+    await db_session.commit()
+
+    rolled_up, pruned = await FxHistoryService().rollup_and_prune(
+        db_session, retention_days=1, batch_size=3
+    )
+
+    assert (rolled_up, pruned) == (1, 4)
+
+    result = await db_session.execute(select(FxRateDaily))
+    candle = result.scalar_one()
+    assert candle.day == old_day.date()
+    assert candle.open_rate == Decimal("0.90")
+    assert candle.high_rate == Decimal("0.95")
+    assert candle.low_rate == Decimal("0.88")
+    assert candle.close_rate == Decimal("0.91")
+    assert candle.samples == 4
+
+    result = await db_session.execute(select(FxRate))
+    assert [rate.rate for rate in result.scalars().all()] == [Decimal("0.92")]
+
+
+def test_time_index_returns_rate_in_effect_at_time():
+    index = FxRateTimeIndex()
+    start = datetime(2024, 1, 1)
+    index.add("USD", "EUR", start, Decimal("0.90"))
+    index.add("USD", "EUR", start + timedelta(hours=2), Decimal("0.95"))
+    index.add("EUR", "JPY", start, Decimal("160"))
+
+    assert index.rate_at("USD", "EUR", start - timedelta(seconds=1)) is None
+    assert index.rate_at("USD", "EUR", start + timedelta(hours=1)) == (Decimal("0.90"), start)
+    assert index.rate_at("USD", "EUR", start + timedelta(hours=3))[0] == Decimal("0.95")
+    assert index.rate_at("EUR", "USD", start)[0] == Decimal("1.11111111")
+    assert index.rate_at("USD", "JPY", start + timedelta(hours=3))[0] == Decimal("152.00000000")
+
+
+@pytest.mark.asyncio
+async def test_bulk_rates_at_loads_history_once(db_session):
+    start = datetime(2024, 1, 1)
+    db_session.add_all([
+        FxRate(
+            base_currency="USD",
+            quote_currency="EUR",
+            rate=Decimal(rate),
+            rate_date=start + timedelta(days=day),
+            source="test",
+        )
+        for day, rate in enumerate(["0.90", "0.91", "0.92"])
+    ])
+    await db_session.commit()
+
+    results = await FxHistoryService().get_rates_at(
+        db_session,
+        [
+            ("USD", "EUR", start + timedelta(days=1, hours=5)),
+            ("USD", "EUR", start + timedelta(days=30)),
+            ("USD", "GBP", start),
+        ],
+    )
+
+    assert results[0] == (Decimal("0.91"), start + timedelta(days=1))
+    assert results[1][0] == Decimal("0.92")
+    assert results[2] is None
@@ -1,8 +1,15 @@
 import pytest
 from decimal import Decimal
+from sqlalchemy import select
 from app.services.fx_rate_service import FxRateService
+from app.services.fx_providers import StaticFxRateProvider
+from app.services.currency_registry import currency_registry
+from app.db.models.currency import Currency
 from app.db.models.fx_rate import FxRate
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.services import fx_rate_service
+from app.services.fx_snapshot import FxRateSnapshot, build_rate_matrix, fx_snapshot_store
 
 
 @pytest.mark.asyncio
@@ -49,3 +56,171 @@ async def test_convert_without_rate(db_session):
         await fx_service.convert_amount(
             db_session, Decimal("100.00"), "USD", "XYZ"
         )
+
+
+@pytest.mark.asyncio
+async def test_ingest_latest_rates_bulk_writes_all_bases(db_session):
+    fx_service = FxRateService()
+    fx_service.provider = StaticFxRateProvider(
+        {"USD": {"EUR": Decimal("0.5"), "JPY": Decimal("150.0")}}
+    )
+
+    report = await fx_service.ingest_latest_rates(db_session, ["USD", "EUR", "GBP"])
+
+    assert report.count == 4
+    assert set(report.failed) == {"GBP"}
+    assert {"fetch", "transform", "write"} <= set(report.timer.timings)
+
+    rate = await fx_service.get_exchange_rate(db_session, "EUR", "JPY")
+    assert rate == Decimal("300.0")
+
+
+@pytest.mark.asyncio
+async def test_ingest_writes_only_rates_that_moved(db_session):
+    provider = StaticFxRateProvider(
+        {"USD": {"EUR": Decimal("0.5"), "JPY": Decimal("150.0")}}
+    )
+    fx_service = FxRateService()
+    fx_service.provider = provider
+
+    await fx_service.ingest_latest_rates(db_session, ["USD"])
+    report = await fx_service.ingest_latest_rates(db_session, ["USD"])
+    assert (report.count, report.skipped) == (0, 2)
+
+    provider.rates["USD"]["JPY"] = Decimal("151.0")
+    report = await fx_service.ingest_latest_rates(db_session, ["USD"])
+    assert (report.count, report.skipped) == (1, 1)
+
+    result = await db_session.execute(select(FxRate))
+    assert len(result.scalars().all()) == 3
+
+
+@pytest.mark.asyncio
+async def test_ingest_registers_currencies_with_minor_units(db_session):
+    fx_service = FxRateService()
+    fx_service.provider = StaticFxRateProvider(
+        {"USD": {"EUR": Decimal("0.5"), "JPY": Decimal("150.0")}}
+    )
+
+    await fx_service.ingest_latest_rates(db_session, ["USD"])
+
+    result = await db_session.execute(select(Currency.code, Currency.minor_units))
+    assert dict(result.all()) == {"EUR": 2, "JPY": 0, "USD": 2}
+    assert await fx_service.get_all_supported_currencies(db_session) == [
+        "EUR", "JPY", "USD"
+    ]
+    assert currency_registry.is_supported("JPY")
+    assert not currency_registry.is_supported("GBP")
+
+    converted, _ = await fx_service.convert_amount(
+        db_session, Decimal("10.00"), "USD", "JPY"
+    )
+    assert converted == Decimal("1500")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_for_same_base_are_coalesced(monkeypatch):
+    calls = []
+
+    async def fake_refresh(self, base_currency, use_lock):
+        calls.append(base_currency)
+
+    monkeypatch.setattr(FxRateService, "_refresh_base", fake_refresh)
+
+    fx_service = FxRateService()
+    first = fx_service.refresh_base("USD")
+    second = fx_service.refresh_base("USD")
+
+    assert first is second
+    await first
+    assert calls == ["USD"]
+
+
+@pytest.mark.asyncio
+async def test_only_configured_bases_are_refreshed(monkeypatch):
+    calls = []
+
+    async def fake_refresh(self, base_currency, use_lock):
+        calls.append(base_currency)
+
+    monkeypatch.setattr(FxRateService, "_refresh_base", fake_refresh)
+    fx_service = FxRateService()
+
+    with pytest.raises(ValueError):
+        await fx_service.get_latest_rates("XYZ")
+
+    # SEK is a base only through the inverse of USD/SEK.
+    fx_snapshot_store._snapshot = FxRateSnapshot(
+        build_rate_matrix({("USD", "SEK"): Decimal("10")}),
+        1,
+        datetime.utcnow() - timedelta(days=1),
+    )
+    snapshot = await fx_service.get_latest_rates("SEK")
+    assert snapshot.get_rate("SEK", "USD") == Decimal("0.1")
+
+    await fx_service.get_latest_rates("USD")
+    for task in list(fx_rate_service._refresh_tasks.values()):
+        await task
+    assert calls == ["USD"]
+
+
+class FakeLockRedis:
+
+    def __init__(self):
+        self.keys = set()
+
+    async def set_if_absent(self, key, value, ttl):
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        return True
+
+    async def delete(self, key):
+        self.keys.discard(key)
+
+
+@pytest.mark.asyncio
+async def test_refresh_lock_is_released_after_a_failure(db_engine, monkeypatch):
+    redis = FakeLockRedis()
+    monkeypatch.setattr(fx_rate_service, "redis_client", redis)
+
+    async def failing_ingest(self, db, base_currencies):
+        assert redis.keys == {"fx_refresh_lock:USD"}
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(FxRateService, "ingest_latest_rates", failing_ingest)
+    fx_service = FxRateService()
+    fx_service.session_factory = async_sessionmaker(db_engine, class_=AsyncSession)
+
+    with pytest.raises(RuntimeError):
+        await fx_service.refresh_base("USD")
+    assert redis.keys == set()
+
+
+@pytest.mark.asyncio
+async def test_convert_many_resolves_each_pair_once(db_session, monkeypatch):
+    lookups = []
+
+    async def fake_get_exchange_rate(self, db, base_currency, quote_currency):
+        lookups.append((base_currency, quote_currency))
+        return Decimal("0.5") if quote_currency == "EUR" else None
+
+    monkeypatch.setattr(FxRateService, "get_exchange_rate", fake_get_exchange_rate)
+
+    results = await FxRateService().convert_many(
+        db_session,
+        [
+            (Decimal("10.00"), "USD", "EUR"),
+            (Decimal("3.33"), "USD", "EUR"),
+            (Decimal("5.00"), "USD", "XYZ"),
+            (Decimal("7.00"), "USD", "USD"),
+        ],
+    )
+
+    assert lookups == [("USD", "EUR"), ("USD", "XYZ")]
+    assert results == [
+        (Decimal("5.00"), Decimal("0.5")),
+        (Decimal("1.66"), Decimal("0.5")),
+        (None, None),
+        (Decimal("7.00"), Decimal("1.0")),
+    ]
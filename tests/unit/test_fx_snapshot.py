@@ -0,0 +1,161 @@
+import asyncio
+import json
+import pytest
+from decimal import Decimal
+from datetime import datetime, timedelta
+from app.services.fx_rate_service import FxRateService
+from app.core.config import settings
+from app.services.fx_snapshot import (
+    FxRateSnapshot,
+    FxSnapshotStore,
+    build_rate_matrix,
+    fx_snapshot_store,
+)
+from app.db.models.fx_rate import FxRate
+from app.utils.redis_client import redis_client
+
+
+def test_build_rate_matrix_adds_inverse_and_cross_rates():
+    matrix = build_rate_matrix({
+        ("USD", "EUR"): Decimal("0.5"),
+        ("USD", "JPY"): Decimal("100"),
+    })
+
+    assert matrix[("EUR", "USD")] == Decimal("2.00000000")
+    assert matrix[("EUR", "JPY")] == Decimal("200.00000000")
+    assert matrix[("JPY", "EUR")] == Decimal("0.00500000")
+
+
+def test_snapshot_is_immutable():
+    snapshot = FxRateSnapshot({("USD", "EUR"): Decimal("0.92")}, 1, None)
+
+    with pytest.raises(AttributeError):
+        snapshot.version = 2
+
+    assert snapshot.get_rate("USD", "USD") == Decimal("1.0")
+    assert snapshot.get_rate("USD", "GBP") is None
+
+
+@pytest.mark.asyncio
+async def test_refresh_loads_latest_rate_per_pair(db_session):
+    now = datetime.utcnow()
+    db_session.add_all([
+        FxRate(
+            base_currency="USD",
+            quote_currency="EUR",
+            rate=Decimal("0.90"),
+            rate_date=now - timedelta(hours=1),
+            source="test",
+        ),
+        FxRate(
+            base_currency="USD",
+            quote_currency="EUR",
+            rate=Decimal("0.92"),
+            rate_date=now,
+            source="test",
+        ),
+    ])
+    await db_session.commit()
+
+    snapshot = await fx_snapshot_store.refresh(db_session)
+
+    assert fx_snapshot_store.snapshot is snapshot
+    assert snapshot.as_of == now
+    assert snapshot.version > 0
+    assert snapshot.get_rate("USD", "EUR") == Decimal("0.92")
+
+    converted, rate = await FxRateService().convert_amount(
+        db_session, Decimal("100.00"), "EUR", "USD"
+    )
+    assert rate == snapshot.get_rate("EUR", "USD")
+    assert converted == Decimal("108.70")
+
+
+class FakePubSub:
+
+    def __init__(self, messages=(), fail_subscribe=False):
+        self.messages = list(messages)
+        self.fail_subscribe = fail_subscribe
+        self.closed = False
+
+    async def subscribe(self, channel):
+        if self.fail_subscribe:
+            raise ConnectionError("redis down")
+
+    async def listen(self):
+        for message in self.messages:
+            yield {"data": message}
+        await asyncio.Event().wait()
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeSessionFactory:
+
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.mark.asyncio
+async def test_watch_reconnects_and_refreshes_only_on_newer_versions(monkeypatch):
+    as_of = datetime(2024, 1, 1)
+    store = FxSnapshotStore()
+    refreshed = []
+
+    async def refresh(db):
+        refreshed.append(len(refreshed) + 1)
+        store._snapshot = FxRateSnapshot({}, 10 * len(refreshed), as_of)
+
+    store.refresh = refresh
+
+    pubsubs = [
+        FakePubSub(fail_subscribe=True),
+        FakePubSub([
+            "not json",
+            json.dumps({"version": 5, "as_of": as_of.isoformat()}),
+            json.dumps({"version": 10, "as_of": as_of.isoformat()}),
+            json.dumps({"version": 11, "as_of": as_of.isoformat()}),
+        ]),
+    ]
+    handed_out = iter(pubsubs)
+    monkeypatch.setattr(redis_client, "pubsub", lambda: next(handed_out))
+
+    watcher = asyncio.create_task(store.watch(FakeSessionFactory, retry_delay=0))
+    await asyncio.sleep(0.05)
+    watcher.cancel()
+    await asyncio.gather(watcher, return_exceptions=True)
+
+    # The catch-up refresh after reconnecting, then only version 11.
+    assert refreshed == [1, 2]
+    assert store.version == 20
+    assert [pubsub.closed for pubsub in pubsubs] == [True, True]
+
+
+@pytest.mark.asyncio
+async def test_watch_stops_without_redis(monkeypatch):
+    monkeypatch.setattr(redis_client, "pubsub", lambda: None)
+
+    await asyncio.wait_for(FxSnapshotStore().watch(FakeSessionFactory), 1)
+
+
+@pytest.mark.asyncio
+async def test_publish_version_announces_version_and_as_of(monkeypatch):
+    published = []
+
+    async def publish_json(channel, value):
+        published.append((channel, value))
+        return 1
+
+    monkeypatch.setattr(redis_client, "publish_json", publish_json)
+
+    await FxSnapshotStore().publish_version(
+        FxRateSnapshot({}, 7, datetime(2024, 1, 1, 12))
+    )
+
+    assert published == [
+        (settings.fx_rates_channel, {"version": 7, "as_of": "2024-01-01T12:00:00"}),
+    ]
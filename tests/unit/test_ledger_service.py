@@ -0,0 +1,92 @@
+import pytest
+from decimal import Decimal
+from datetime import datetime
+from sqlalchemy import select, delete
+from app.db.models.account import Account
+from app.db.models.ledger_checkpoint import LedgerCheckpoint
+from app.db.models.ledger_entry import LedgerEntry, LedgerEntryType
+from app.db.models.user import User
+from app.services.ledger_service import LedgerService
+
+
+async def _create_history(db_session):
+    user = User(email="ledger@example.com", hashed_password="x")
+    db_session.add(user)
+    await db_session.flush()
+
+    first = Account(user_id=user.id, currency="USD", balance=Decimal("0.00"))
+    second = Account(user_id=user.id, currency="EUR", balance=Decimal("0.00"))
+    db_session.add_all([first, second])
+    await db_session.flush()
+
+    for account, day, balance in [
+        (first, 1, "100.00"),
+        (first, 3, "60.00"),
+        (first, 5, "80.00"),
+        (second, 2, "10.00"),
+    ]:
+        db_session.add(LedgerEntry(
+            account_id=account.id,
+            transfer_id=1,
+            entry_type=LedgerEntryType.CREDIT,
+            amount=Decimal("1.00"),
+            currency=account.currency,
+            balance_after=Decimal(balance),
+            created_at=datetime(2024, 1, day, 12),
+        ))
+    await db_session.commit()
+    return first, second
+
+
+@pytest.mark.asyncio
+async def test_balances_at_match_with_and_without_checkpoints(db_session):
+    first, second = await _create_history(db_session)
+    ledger_service = LedgerService()
+    account_ids = [first.id, second.id, 999]
+
+    expected = {
+        datetime(2024, 1, 1): {first.id: None, second.id: None, 999: None},
+        datetime(2024, 1, 2, 13): {
+            first.id: (Decimal("100.00"), "USD"),
+            second.id: (Decimal("10.00"), "EUR"),
+            999: None,
+        },
+        datetime(2024, 1, 4): {
+            first.id: (Decimal("60.00"), "USD"),
+            second.id: (Decimal("10.00"), "EUR"),
+            999: None,
+        },
+        datetime(2024, 2, 1): {
+            first.id: (Decimal("80.00"), "USD"),
+            second.id: (Decimal("10.00"), "EUR"),
+            999: None,
+        },
+    }
+    for at, balances in expected.items():
+        assert await ledger_service.get_balances_at(db_session, account_ids, at) == balances
+
+    assert await ledger_service.create_checkpoints(db_session, datetime(2024, 1, 2)) == 1
+    assert await ledger_service.create_checkpoints(db_session, datetime(2024, 1, 4)) == 2
+    assert await ledger_service.create_checkpoints(db_session, datetime(2024, 1, 4)) == 0
+
+    result = await db_session.execute(
+        select(LedgerCheckpoint.account_id, LedgerCheckpoint.as_of, LedgerCheckpoint.balance)
+        .order_by(LedgerCheckpoint.as_of, LedgerCheckpoint.account_id)
+    )
+    assert result.all() == [
+        (first.id, datetime(2024, 1, 2), Decimal("100.00")),
+        (first.id, datetime(2024, 1, 4), Decimal("60.00")),
+        (second.id, datetime(2024, 1, 4), Decimal("10.00")),
+    ]
+
+    for at, balances in expected.items():
+        assert await ledger_service.get_balances_at(db_session, account_ids, at) == balances
+
+    # Checkpoints answer on their own once older entries are gone.
+    await db_session.execute(
+        delete(LedgerEntry).where(LedgerEntry.created_at < datetime(2024, 1, 4))
+    )
+    await db_session.commit()
+    assert await ledger_service.get_balances_at(
+        db_session, [first.id, second.id], datetime(2024, 1, 4, 12)
+    ) == {first.id: (Decimal("60.00"), "USD"), second.id: (Decimal("10.00"), "EUR")}
@@ -0,0 +1,453 @@
+import asyncio
+import json
+import pytest
+from app.core.config import settings
+from app.utils.brokers import AmqpBroker, create_broker
+from app.utils.brokers import redis_streams
+from app.utils.brokers.redis_streams import (
+    RELEASE_LEASE_SCRIPT,
+    RENEW_LEASE_SCRIPT,
+    RedisStreamsBroker,
+)
+
+
+class FakeMessage:
+
+    def __init__(self, payload, headers=None):
+        self.body = json.dumps(payload).encode()
+        self.headers = headers or {}
+        self.priority = 0
+        self.outcome = None
+
+    async def ack(self):
+        self.outcome = "ack"
+
+    async def nack(self, requeue=True):
+        self.outcome = "nack"
+
+    async def reject(self, requeue=False):
+        self.outcome = "reject"
+
+
+class FakeIterator:
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.messages:
+            raise StopAsyncIteration
+        return self.messages.pop(0)
+
+
+class FakeChannel:
+
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def set_qos(self, prefetch_count):
+        return None
+
+    async def declare_queue(self, name, **kwargs):
+        messages = self.messages
+
+        class FakeQueue:
+            def iterator(self):
+                return FakeIterator(messages)
+
+        return FakeQueue()
+
+
+@pytest.mark.asyncio
+async def test_consume_runs_handlers_concurrently_and_keeps_key_order():
+    messages = [
+        FakeMessage({"key": key, "seq": seq})
+        for seq in range(3)
+        for key in ("a", "b", "c")
+    ]
+    messages.append(FakeMessage({"key": "a", "fail": True}))
+    broker = AmqpBroker()
+    broker.channel = FakeChannel(messages)
+    retried = []
+
+    async def retry_later(queue_name, message, error):
+        retried.append((queue_name, error))
+
+    broker.retry_later = retry_later
+
+    handled = []
+    running = 0
+    peak = 0
+
+    async def callback(data):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if data.get("fail"):
+            raise RuntimeError("boom")
+        handled.append((data["key"], data["seq"]))
+
+    await broker.consume_messages(
+        "notifications",
+        callback,
+        prefetch_count=3,
+        concurrency=3,
+        ordering_key=lambda data: data["key"],
+    )
+
+    assert peak == 3
+    for key in ("a", "b", "c"):
+        assert [seq for k, seq in handled if k == key] == [0, 1, 2]
+    assert [message.outcome for message in messages] == ["ack"] * 10
+    assert retried == [("notifications", "boom")]
+
+
+class FakeConsumerQueue:
+    # Mirrors Queue.consume/cancel. Re-registering a consumer is what moves
+    # a single-active-consumer queue to another worker, so the tests count
+    # both calls.
+
+    name = "transfer_processing.0"
+
+    def __init__(self, schedule):
+        self.schedule = schedule
+        self.consumed = 0
+        self.cancelled = 0
+
+    async def consume(self, callback):
+        self.consumed += 1
+
+        async def deliver():
+            for delay, message in self.schedule:
+                await asyncio.sleep(delay)
+                await callback(message)
+
+        self.delivery = asyncio.create_task(deliver())
+        return "ctag"
+
+    async def cancel(self, consumer_tag):
+        self.cancelled += 1
+        self.delivery.cancel()
+
+
+class FakeBatchMessage(FakeMessage):
+
+    async def ack(self, multiple=False):
+        self.outcome = "ack-multiple" if multiple else "ack"
+
+    async def nack(self, requeue=True, multiple=False):
+        self.outcome = "nack-multiple" if multiple else "nack"
+
+
+@pytest.mark.asyncio
+async def test_partial_batches_keep_one_consumer():
+    messages = [FakeBatchMessage({"id": i}) for i in range(5)]
+    # Two short batches separated by pauses longer than the batch timeout.
+    queue = FakeConsumerQueue([
+        (0, messages[0]),
+        (0, messages[1]),
+        (0.05, messages[2]),
+        (0.05, messages[3]),
+        (0, messages[4]),
+    ])
+    batches = []
+
+    async def callback(batch):
+        batches.append([data["id"] for data in batch])
+
+    consumer = asyncio.create_task(
+        AmqpBroker()._consume_batches(queue, callback, batch_size=10, batch_timeout=0.01)
+    )
+    await asyncio.sleep(0.2)
+    consumer.cancel()
+    await asyncio.gather(consumer, return_exceptions=True)
+
+    assert batches == [[0, 1], [2], [3, 4]]
+    assert (queue.consumed, queue.cancelled) == (1, 1)
+    assert [message.outcome for message in messages] == [
+        None, "ack-multiple", "ack-multiple", None, "ack-multiple"
+    ]
+
+
+class FakeDrainChannel:
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    async def set_qos(self, prefetch_count):
+        return None
+
+    async def declare_queue(self, name, passive=False, **kwargs):
+        if passive:
+            class Declared:
+                class declaration_result:
+                    message_count = 0
+            return Declared()
+        return self.queue
+
+
+@pytest.mark.asyncio
+async def test_drain_queue_waits_out_idle_gaps_on_one_consumer():
+    messages = [FakeMessage({"id": i}) for i in range(3)]
+    queue = FakeConsumerQueue([(0, messages[0]), (0.05, messages[1]), (0.05, messages[2])])
+    broker = AmqpBroker()
+    broker.channel = FakeDrainChannel(queue)
+    handled = []
+
+    async def callback(data):
+        handled.append(data["id"])
+
+    assert await broker.drain_queue("transfer_processing.0", callback, idle_timeout=0.01) == 1
+    assert handled == [0]
+    assert (queue.consumed, queue.cancelled) == (1, 1)
+
+    queue = FakeConsumerQueue([(0, messages[0]), (0.02, messages[1]), (0.02, messages[2])])
+    broker.channel = FakeDrainChannel(queue)
+    handled.clear()
+    assert await broker.drain_queue("transfer_processing.0", callback, idle_timeout=0.1) == 3
+    assert handled == [0, 1, 2]
+    assert (queue.consumed, queue.cancelled) == (1, 1)
+    assert [message.outcome for message in messages] == ["ack"] * 3
+
+
+class FakeExchange:
+
+    def __init__(self, published):
+        self.published = published
+
+    async def publish(self, message, routing_key):
+        self.published.append((routing_key, message.headers))
+
+
+class FakePublishChannel:
+
+    def __init__(self):
+        self.is_closed = False
+        self.declare_calls = 0
+        self.declared = {}
+        self.published = []
+        self.default_exchange = FakeExchange(self.published)
+
+    async def declare_queue(self, name, durable=True, arguments=None):
+        self.declare_calls += 1
+        self.declared[name] = arguments
+
+    async def close(self):
+        self.is_closed = True
+
+
+def _pooled_broker(*channels):
+    broker = AmqpBroker()
+    broker._publish_channels = asyncio.Queue()
+    for channel in channels:
+        broker._publish_channels.put_nowait(channel)
+    return broker
+
+
+@pytest.mark.asyncio
+async def test_declare_queue_caches_by_arguments():
+    channel = FakePublishChannel()
+    broker = _pooled_broker(channel)
+
+    await broker.declare_queue(channel, "transfers", {"x-max-priority": 2})
+    await broker.declare_queue(channel, "transfers", {"x-max-priority": 2})
+    await broker.declare_queue(channel, "notifications")
+    await broker.declare_queue(channel, "notifications", {})
+    assert channel.declare_calls == 2
+
+    with pytest.raises(ValueError, match="already declared"):
+        await broker.declare_queue(channel, "transfers", {"x-single-active-consumer": True})
+    assert channel.declare_calls == 2
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.opened = []
+
+    async def channel(self, publisher_confirms=True):
+        channel = FakePublishChannel()
+        self.opened.append(channel)
+        return channel
+
+
+@pytest.mark.asyncio
+async def test_publish_channel_returns_to_pool_and_replaces_closed_ones():
+    first, second = FakePublishChannel(), FakePublishChannel()
+    broker = _pooled_broker(first, second)
+    broker.connection = FakeConnection()
+
+    with pytest.raises(RuntimeError):
+        async with broker.publish_channel() as channel:
+            assert channel is first
+            raise RuntimeError("publish failed")
+
+    with pytest.raises(RuntimeError):
+        async with broker.publish_channel() as channel:
+            assert channel is second
+            channel.is_closed = True
+            raise RuntimeError("PRECONDITION_FAILED")
+
+    pooled = [broker._publish_channels.get_nowait() for _ in range(2)]
+    assert broker._publish_channels.empty()
+    assert pooled == [first, broker.connection.opened[0]]
+
+
+@pytest.mark.asyncio
+async def test_close_reaches_checked_out_publish_channels():
+    idle, busy = FakePublishChannel(), FakePublishChannel()
+    broker = _pooled_broker(busy, idle)
+
+    async with broker.publish_channel() as channel:
+        assert channel is busy
+        await broker.close()
+        assert idle.is_closed and not busy.is_closed
+
+    assert busy.is_closed
+    assert broker._publish_channels is None
+
+
+@pytest.mark.asyncio
+async def test_retry_backs_off_then_dead_letters(monkeypatch):
+    monkeypatch.setattr(settings, "broker_max_retries", 2)
+    monkeypatch.setattr(settings, "broker_retry_base_delay_ms", 1000)
+
+    channel = FakePublishChannel()
+    broker = AmqpBroker()
+    broker._publish_channels = asyncio.Queue()
+    broker._publish_channels.put_nowait(channel)
+
+    await broker.retry_later("transfers", FakeMessage({}), "db down")
+    await broker.retry_later("transfers", FakeMessage({}, {"x-retry-count": 1}), "db down")
+    await broker.retry_later("transfers", FakeMessage({}, {"x-retry-count": 2}), "db down")
+
+    assert [routing_key for routing_key, _ in channel.published] == [
+        "transfers.retry.1",
+        "transfers.retry.2",
+        "transfers.dlq",
+    ]
+    assert channel.published[1][1]["x-retry-count"] == 2
+    assert channel.declared["transfers.retry.2"] == {
+        "x-message-ttl": 2000,
+        "x-dead-letter-exchange": "",
+        "x-dead-letter-routing-key": "transfers",
+    }
+
+
+@pytest.mark.asyncio
+async def test_in_memory_broker_orders_by_priority_and_dead_letters(monkeypatch):
+    monkeypatch.setattr(settings, "broker_max_retries", 1)
+    monkeypatch.setattr(settings, "broker_retry_base_delay_ms", 10)
+
+    broker = create_broker("memory")
+    await broker.publish_many("transfers", [{"id": 1}, {"id": 2}], priority=0)
+    await broker.publish_message("transfers", {"id": 3}, priority=2)
+    await broker.publish_message("transfers", {"id": 4, "fail": True}, priority=1)
+
+    handled = []
+
+    async def callback(data):
+        handled.append(data["id"])
+        if data.get("fail"):
+            raise RuntimeError("boom")
+
+    consumer = asyncio.create_task(broker.consume_messages("transfers", callback))
+    await asyncio.sleep(0.05)
+    consumer.cancel()
+    await asyncio.gather(consumer, return_exceptions=True)
+
+    assert handled == [3, 4, 1, 2, 4]
+    assert await broker.replay_dead_letters("transfers") == 1
+    # The replayed message fails again, is retried once and dead-lettered.
+    assert await broker.drain_queue("transfers", callback, idle_timeout=0.05) == 2
+    assert broker.queue_size("transfers.dlq") == 1
+    await broker.close()
+
+
+@pytest.mark.asyncio
+async def test_batch_envelopes_keep_order_across_keys():
+    broker = create_broker("memory")
+    await broker.publish_many(
+        "transfers",
+        [{"key": key, "seq": seq} for seq in range(3) for key in ("a", "b")],
+        tasks_per_message=2,
+    )
+    await broker.publish_message("transfers", {"key": "b", "seq": 3})
+
+    handled = []
+
+    async def callback(data):
+        await asyncio.sleep(0.001 * (3 - data["seq"]))
+        handled.append((data["key"], data["seq"]))
+
+    consumer = asyncio.create_task(broker.consume_messages(
+        "transfers", callback, concurrency=4, ordering_key=lambda data: data["key"]
+    ))
+    await asyncio.sleep(0.05)
+    consumer.cancel()
+    await asyncio.gather(consumer, return_exceptions=True)
+
+    for key, last in (("a", 2), ("b", 3)):
+        assert [seq for k, seq in handled if k == key] == list(range(last + 1))
+
+
+def test_create_broker_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        create_broker("carrier-pigeon")
+
+
+class FakeLeaseRedis:
+
+    def __init__(self):
+        self.values = {}
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, owner, *args):
+        if self.values.get(key) != owner:
+            return 0
+        if script == RELEASE_LEASE_SCRIPT:
+            del self.values[key]
+        else:
+            assert script == RENEW_LEASE_SCRIPT
+        return 1
+
+
+@pytest.mark.asyncio
+async def test_redis_streams_single_active_consumer_lease(monkeypatch):
+    monkeypatch.setattr(redis_streams, "BLOCK_MS", 10)
+    client = FakeLeaseRedis()
+    first, second = RedisStreamsBroker(), RedisStreamsBroker()
+    first.client = second.client = client
+    first.consumer_name, second.consumer_name = "worker-1", "worker-2"
+    arguments = {"x-single-active-consumer": True}
+
+    assert await first._acquire_lease("transfers", {}) is None
+    lease = await first._acquire_lease("transfers", arguments)
+    assert lease == "transfers.active-consumer"
+
+    waiting = asyncio.create_task(second._acquire_lease("transfers", arguments))
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+    assert await first._renew_lease("transfers", lease) == lease
+    await second._release_lease(lease)
+    assert client.values[lease] == "worker-1"
+
+    await first._release_lease(lease)
+    assert await asyncio.wait_for(waiting, 1) == lease
+    assert client.values[lease] == "worker-2"
@@ -0,0 +1,118 @@
+import pytest
+from decimal import Decimal
+from sqlalchemy import select
+from app.core.config import settings
+from app.db.models.outbox_message import OutboxMessage
+from app.db.models.transfer import Transfer, TransferStatus
+from app.services.outbox_service import OutboxService
+from app.utils.message_broker import TRANSFER_LANES, message_broker, transfer_queue_base
+
+
+def _transfer(transfer_id: int, account_id: int) -> Transfer:
+    return Transfer(
+        id=transfer_id,
+        user_id=1,
+        from_account_id=account_id,
+        to_account_id=99,
+        from_currency="USD",
+        to_currency="USD",
+        from_amount=Decimal("5.00"),
+        to_amount=Decimal("5.00"),
+        exchange_rate=Decimal("1.0"),
+        commission_amount=Decimal("0.05"),
+        status=TransferStatus.CREATED,
+    )
+
+
+@pytest.mark.asyncio
+async def test_relay_publishes_in_order_and_deletes_sent_rows(db_session, monkeypatch):
+    published = []
+
+    async def publish_many(queue_name, messages, priority=0, arguments=None, tasks_per_message=1):
+        published.append((queue_name, [message["transfer_id"] for message in messages]))
+
+    monkeypatch.setattr(message_broker, "publish_many", publish_many)
+
+    outbox_service = OutboxService()
+    await outbox_service.enqueue_transfer_tasks(
+        db_session, [_transfer(1, 10), _transfer(2, 10), _transfer(3, 11)]
+    )
+    await db_session.commit()
+
+    assert await outbox_service.relay_batch(db_session, batch_size=2) == 2
+    assert await outbox_service.relay_batch(db_session, batch_size=2) == 1
+    assert await outbox_service.relay_batch(db_session, batch_size=2) == 0
+
+    assert [ids for _, ids in published] == [[1, 2], [3]]
+    result = await db_session.execute(select(OutboxMessage))
+    assert result.scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_relay_without_the_lock_publishes_nothing(db_session, monkeypatch):
+    published = []
+
+    async def publish_many(queue_name, messages, **kwargs):
+        published.append(queue_name)
+
+    async def lock_taken(self, db):
+        return False
+
+    monkeypatch.setattr(message_broker, "publish_many", publish_many)
+    monkeypatch.setattr(OutboxService, "_take_relay_lock", lock_taken)
+
+    outbox_service = OutboxService()
+    await outbox_service.enqueue_transfer_tasks(db_session, [_transfer(1, 10)])
+    await db_session.commit()
+
+    assert await outbox_service.relay_batch(db_session, batch_size=10) == 0
+    assert published == []
+    result = await db_session.execute(select(OutboxMessage))
+    assert len(result.scalars().all()) == 1
+
+
+@pytest.mark.asyncio
+async def test_transfer_tasks_carry_lane_priority(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "transfer_priority_lanes", True)
+    outbox_service = OutboxService()
+    await outbox_service.enqueue_transfer_tasks(
+        db_session,
+        [_transfer(1, 10), _transfer(2, 11), _transfer(3, 12)],
+        {1: "bulk", 2: "express", 3: "standard"},
+    )
+    await db_session.commit()
+
+    result = await db_session.execute(select(OutboxMessage).order_by(OutboxMessage.id))
+    messages = {
+        message.payload["transfer_id"]: message for message in result.scalars().all()
+    }
+
+    assert {transfer_id: message.priority for transfer_id, message in messages.items()} == {
+        1: TRANSFER_LANES["bulk"],
+        2: TRANSFER_LANES["express"],
+        3: TRANSFER_LANES["standard"],
+    }
+    assert messages[2].payload["lane"] == "express"
+    assert messages[2].payload["transfer"]["from_amount"] == "5.00"
+    assert messages[1].payload["trace_id"] == messages[2].payload["trace_id"]
+    assert messages[2].arguments["x-max-priority"] == max(TRANSFER_LANES.values())
+    assert messages[2].queue_name == transfer_queue_base()
+
+
+@pytest.mark.asyncio
+async def test_failed_publish_keeps_rows_for_retry(db_session, monkeypatch):
+    async def publish_many(*args, **kwargs):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(message_broker, "publish_many", publish_many)
+
+    outbox_service = OutboxService()
+    await outbox_service.enqueue_notification(db_session, 1, "hello")
+    await db_session.commit()
+
+    with pytest.raises(ConnectionError):
+        await outbox_service.relay_batch(db_session, batch_size=10)
+    await db_session.rollback()
+
+    result = await db_session.execute(select(OutboxMessage))
+    assert len(result.scalars().all()) == 1
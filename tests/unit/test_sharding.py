@@ -0,0 +1,34 @@
+from collections import Counter
+from app.utils.sharding import jump_consistent_hash, shard_queue_name
+
+
+def test_jump_hash_is_balanced_and_stable():
+    shards = Counter(jump_consistent_hash(account_id, 8) for account_id in range(8000))
+
+    assert set(shards) == set(range(8))
+    assert min(shards.values()) > 800
+    assert jump_consistent_hash(42, 8) == jump_consistent_hash(42, 8)
+
+
+def test_growing_shards_only_moves_keys_to_the_new_shard():
+    for account_id in range(2000):
+        before = jump_consistent_hash(account_id, 4)
+        after = jump_consistent_hash(account_id, 5)
+        assert after in (before, 4)
+
+
+def test_single_shard_keeps_legacy_queue_name():
+    assert shard_queue_name("transfer_processing", 0, 1) == "transfer_processing"
+    assert shard_queue_name("transfer_processing", 3, 8) == "transfer_processing.8.3"
+
+
+def test_enabling_lanes_drains_the_legacy_queue_by_default():
+    from app.core.config import Settings
+
+    base = {"JWT_SECRET_KEY": "x", "DATABASE_URL": "sqlite+aiosqlite://"}
+
+    assert Settings(**base).transfer_previous_layout is None
+    assert Settings(**base, TRANSFER_PRIORITY_LANES=True).transfer_previous_layout == (1, False)
+    assert Settings(
+        **base, TRANSFER_PRIORITY_LANES=True, TRANSFER_PREVIOUS_PRIORITY_LANES="true"
+    ).transfer_previous_layout is None
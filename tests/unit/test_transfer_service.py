@@ -0,0 +1,241 @@
+import pytest
+from decimal import Decimal
+from sqlalchemy import select, update
+from app.db.models.account import Account
+from app.db.models.ledger_entry import LedgerEntry, LedgerEntryType
+from app.db.models.transfer import Transfer, TransferStatus
+from app.db.models.user import User
+from app.schemas.transfer import TransferCreate, TransferBatchItem
+from app.services.transfer_service import TransferService
+
+
+async def _create_accounts(db_session, balance: Decimal):
+    user = User(email="payer@example.com", hashed_password="x")
+    db_session.add(user)
+    await db_session.flush()
+
+    source = Account(
+        user_id=user.id,
+        currency="USD",
+        balance=balance,
+        fixed_commission=Decimal("1.00"),
+        percentage_commission=Decimal("0.0000"),
+    )
+    target = Account(user_id=user.id, currency="USD", balance=Decimal("0.00"))
+    db_session.add_all([source, target])
+    await db_session.commit()
+    return user, source, target
+
+
+@pytest.mark.asyncio
+async def test_execute_transfer_moves_funds_once(db_session):
+    user, source, target = await _create_accounts(db_session, Decimal("100.00"))
+    transfer_service = TransferService()
+
+    transfer = await transfer_service.create_transfer(
+        db_session,
+        user,
+        TransferCreate(
+            from_account_id=source.id,
+            to_account_id=target.id,
+            from_amount=Decimal("40.00"),
+        ),
+    )
+    await db_session.commit()
+
+    await transfer_service.execute_transfer(db_session, transfer)
+    await transfer_service.execute_transfer(db_session, transfer)
+
+    assert transfer.status == TransferStatus.COMPLETED
+    assert transfer.completed_at is not None
+
+    result = await db_session.execute(
+        select(Account.id, Account.balance).execution_options(populate_existing=True)
+    )
+    assert dict(result.all()) == {
+        source.id: Decimal("58.60"),
+        target.id: Decimal("40.00"),
+    }
+
+    result = await db_session.execute(
+        select(LedgerEntry.entry_type, LedgerEntry.balance_after).order_by(LedgerEntry.id)
+    )
+    assert result.all() == [
+        (LedgerEntryType.DEBIT, Decimal("58.60")),
+        (LedgerEntryType.CREDIT, Decimal("40.00")),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_execute_transfer_rolls_back_on_insufficient_funds(db_session):
+    user, source, target = await _create_accounts(db_session, Decimal("100.00"))
+    target_id = target.id
+    transfer_service = TransferService()
+
+    transfer = await transfer_service.create_transfer(
+        db_session,
+        user,
+        TransferCreate(
+            from_account_id=source.id,
+            to_account_id=target_id,
+            from_amount=Decimal("90.00"),
+        ),
+    )
+    await db_session.commit()
+
+    await db_session.execute(
+        update(Account).where(Account.id == source.id).values(balance=Decimal("50.00"))
+    )
+    await db_session.commit()
+
+    with pytest.raises(ValueError, match="Insufficient funds"):
+        await transfer_service.execute_transfer(db_session, transfer)
+
+    assert transfer.status == TransferStatus.FAILED
+    assert transfer.error_message == "Insufficient funds"
+
+    result = await db_session.execute(
+        select(Account.held_balance).where(Account.id == transfer.from_account_id)
+    )
+    assert result.scalar_one() == Decimal("0.00")
+
+    result = await db_session.execute(select(Account.balance).where(Account.id == target_id))
+    assert result.scalar_one() == Decimal("0.00")
+    result = await db_session.execute(select(LedgerEntry))
+    assert result.scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_execute_transfers_isolates_failures_in_one_commit(db_session):
+    user, source, target = await _create_accounts(db_session, Decimal("100.00"))
+    transfer_service = TransferService()
+
+    transfers = []
+    for _ in range(3):
+        transfers.append(await transfer_service.create_transfer(
+            db_session,
+            user,
+            TransferCreate(
+                from_account_id=source.id,
+                to_account_id=target.id,
+                from_amount=Decimal("20.00"),
+            ),
+        ))
+    await db_session.execute(
+        update(Account).where(Account.id == source.id).values(balance=Decimal("50.00"))
+    )
+    await db_session.commit()
+
+    results = await transfer_service.execute_transfers(db_session, transfers)
+
+    assert list(results.values()) == [None, None, "Insufficient funds"]
+    assert [transfer.status for transfer in transfers] == [
+        TransferStatus.COMPLETED,
+        TransferStatus.COMPLETED,
+        TransferStatus.FAILED,
+    ]
+
+    result = await db_session.execute(
+        select(Account.id, Account.balance, Account.held_balance)
+    )
+    assert {row[0]: tuple(row[1:]) for row in result.all()} == {
+        source.id: (Decimal("7.60"), Decimal("0.00")),
+        target.id: (Decimal("40.00"), Decimal("0.00")),
+    }
+    result = await db_session.execute(select(LedgerEntry))
+    assert len(result.scalars().all()) == 4
+
+
+@pytest.mark.asyncio
+async def test_create_transfer_holds_funds_until_execution(db_session):
+    user, source, target = await _create_accounts(db_session, Decimal("100.00"))
+    source_id, target_id = source.id, target.id
+    transfer_service = TransferService()
+
+    def transfer_data(amount: str) -> TransferBatchItem:
+        return TransferBatchItem(
+            from_account_id=source_id,
+            to_account_id=target_id,
+            from_amount=Decimal(amount),
+        )
+
+    transfer = await transfer_service.create_transfer(
+        db_session, user, transfer_data("60.00")
+    )
+    await db_session.commit()
+    assert transfer.hold_amount == Decimal("61.60")
+
+    with pytest.raises(ValueError, match="Insufficient funds"):
+        await transfer_service.create_transfer(db_session, user, transfer_data("60.00"))
+
+    outcomes = await transfer_service.create_transfers(
+        db_session, user, [transfer_data("30.00"), transfer_data("30.00")]
+    )
+    assert [outcome[0] for outcome in outcomes] == ["created", "error"]
+    await db_session.commit()
+
+    result = await db_session.execute(
+        select(Account.balance, Account.held_balance).where(Account.id == source_id)
+    )
+    assert result.one() == (Decimal("100.00"), Decimal("92.90"))
+
+    await transfer_service.execute_transfer(db_session, transfer)
+
+    result = await db_session.execute(
+        select(Account.balance, Account.held_balance).where(Account.id == source_id)
+    )
+    assert result.one() == (Decimal("38.40"), Decimal("31.30"))
+
+
+@pytest.mark.asyncio
+async def test_transfer_lanes_by_amount_and_tier(db_session):
+    user, source, target = await _create_accounts(db_session, Decimal("0.00"))
+    target.tier = "vip"
+    await db_session.commit()
+
+    transfers = [
+        Transfer(id=1, from_account_id=source.id, from_amount=Decimal("50.00")),
+        Transfer(id=2, from_account_id=source.id, from_amount=Decimal("500.00")),
+        Transfer(id=3, from_account_id=source.id, from_amount=Decimal("50000.00")),
+        Transfer(id=4, from_account_id=target.id, from_amount=Decimal("50000.00")),
+    ]
+    transfer_service = TransferService()
+
+    assert await transfer_service.transfer_lanes(db_session, transfers) == {
+        1: "express",
+        2: "standard",
+        3: "bulk",
+        4: "express",
+    }
+    lanes = await transfer_service.transfer_lanes(db_session, transfers, bulk=True)
+    assert set(lanes.values()) == {"bulk"}
+
+
+@pytest.mark.asyncio
+async def test_execute_transfer_from_snapshot(db_session):
+    user, source, target = await _create_accounts(db_session, Decimal("100.00"))
+    transfer_service = TransferService()
+
+    transfer = await transfer_service.create_transfer(
+        db_session,
+        user,
+        TransferCreate(
+            from_account_id=source.id,
+            to_account_id=target.id,
+            from_amount=Decimal("40.00"),
+        ),
+    )
+    await db_session.commit()
+    snapshot = transfer_service.transfer_snapshot(transfer)
+    db_session.expunge_all()
+
+    restored = transfer_service.transfer_from_snapshot(db_session, snapshot)
+    await transfer_service.execute_transfer(db_session, restored)
+
+    result = await db_session.execute(
+        select(Account.id, Account.balance).execution_options(populate_existing=True)
+    )
+    assert dict(result.all()) == {
+        source.id: Decimal("58.60"),
+        target.id: Decimal("40.00"),
+    }
@@ -0,0 +1,176 @@
+import asyncio
+import pytest
+from decimal import Decimal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.config import settings
+from app.db.models.account import Account
+from app.db.models.audit import Audit
+from app.db.models.currency import Currency
+from app.db.models.ledger_entry import LedgerEntry
+from app.db.models.user import User
+from app.schemas.transfer import TransferCreate
+from app.services.fx_providers import StaticFxRateProvider
+from app.services.fx_rate_service import FxRateService
+from app.services.transfer_service import TransferService
+from app.utils.message_broker import transfer_task_payload
+from app.workers import transfer_worker
+
+
+@pytest.mark.asyncio
+async def test_duplicate_delivery_is_audited_once(db_engine, db_session, monkeypatch):
+    monkeypatch.setattr(
+        transfer_worker,
+        "AsyncSessionLocal",
+        async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False),
+    )
+
+    user = User(email="worker@example.com", hashed_password="x")
+    db_session.add(user)
+    await db_session.flush()
+    source = Account(user_id=user.id, currency="USD", balance=Decimal("100.00"))
+    target = Account(user_id=user.id, currency="USD", balance=Decimal("0.00"))
+    db_session.add_all([source, target])
+    await db_session.commit()
+
+    transfer_service = TransferService()
+    transfer = await transfer_service.create_transfer(
+        db_session,
+        user,
+        TransferCreate(
+            from_account_id=source.id,
+            to_account_id=target.id,
+            from_amount=Decimal("10.00"),
+        ),
+    )
+    await db_session.commit()
+
+    payload = transfer_task_payload(
+        transfer.id,
+        transfer.from_account_id,
+        snapshot=transfer_service.transfer_snapshot(transfer),
+    )
+    await transfer_worker.process_transfer(payload)
+    await transfer_worker.process_transfer(payload)
+
+    result = await db_session.execute(
+        select(Audit).where(Audit.action == "transfer_completed")
+    )
+    assert len(result.scalars().all()) == 1
+    result = await db_session.execute(select(LedgerEntry))
+    assert len(result.scalars().all()) == 2
+
+
+@pytest.mark.asyncio
+async def test_three_decimal_currency_settles_at_column_scale(
+    db_engine, db_session, monkeypatch
+):
+    monkeypatch.setattr(
+        transfer_worker,
+        "AsyncSessionLocal",
+        async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False),
+    )
+    fx_service = FxRateService()
+    fx_service.provider = StaticFxRateProvider({"USD": {"KWD": Decimal("0.3071")}})
+    await fx_service.ingest_latest_rates(db_session, ["USD"])
+
+    result = await db_session.execute(
+        select(Currency.minor_units).where(Currency.code == "KWD")
+    )
+    assert result.scalar_one() == 3
+    details = await fx_service.get_currency_details(db_session)
+    assert {"code": "KWD", "name": "Kuwaiti Dinar", "minor_units": 3} in details
+
+    user = User(email="dinar@example.com", hashed_password="x")
+    db_session.add(user)
+    await db_session.flush()
+    source = Account(user_id=user.id, currency="USD", balance=Decimal("100.00"))
+    target = Account(user_id=user.id, currency="KWD", balance=Decimal("0.00"))
+    db_session.add_all([source, target])
+    await db_session.commit()
+    source_id, target_id = source.id, target.id
+
+    transfer_service = TransferService()
+    transfer = await transfer_service.create_transfer(
+        db_session,
+        user,
+        TransferCreate(
+            from_account_id=source_id,
+            to_account_id=target_id,
+            from_amount=Decimal("10.00"),
+        ),
+    )
+    await db_session.commit()
+    assert transfer.to_amount == Decimal("3.07")
+
+    await transfer_worker.process_transfer(
+        transfer_task_payload(
+            transfer.id,
+            transfer.from_account_id,
+            snapshot=transfer_service.transfer_snapshot(transfer),
+        )
+    )
+
+    db_session.expire_all()
+    target = await db_session.get(Account, target_id)
+    assert target.balance == Decimal("3.07")
+    result = await db_session.execute(
+        select(LedgerEntry.amount, LedgerEntry.balance_after)
+        .where(LedgerEntry.account_id == target_id)
+    )
+    assert result.all() == [(Decimal("3.07"), Decimal("3.07"))]
+
+
+class FakeDrainRedis:
+
+    def __init__(self):
+        self.values = {}
+
+    async def set_if_absent(self, key, value, ttl):
+        if key in self.values:
+            return False
+        self.values[key] = value
+        return True
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ttl=None):
+        self.values[key] = value
+
+    async def expire(self, key, ttl):
+        pass
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+
+class FakeDrainBroker:
+
+    def __init__(self):
+        self.active = 0
+        self.drained = []
+
+    async def drain_queue(self, queue_name, callback, idle_timeout, arguments=None):
+        self.active += 1
+        assert self.active == 1
+        await asyncio.sleep(0.02)
+        self.active -= 1
+        self.drained.append(queue_name)
+        return 0
+
+
+@pytest.mark.asyncio
+async def test_one_worker_drains_the_previous_layout(monkeypatch):
+    monkeypatch.setattr(settings, "transfer_shards", 4)
+    monkeypatch.setattr(settings, "transfer_previous_shards", 2)
+    monkeypatch.setattr(settings, "transfer_drain_idle_seconds", 0.01)
+    broker = FakeDrainBroker()
+    monkeypatch.setattr(transfer_worker, "message_broker", broker)
+    monkeypatch.setattr(transfer_worker, "redis_client", FakeDrainRedis())
+
+    await asyncio.gather(*(transfer_worker.drain_previous_shards() for _ in range(3)))
+
+    assert broker.drained == [
+        "transfer_processing.2.0", "transfer_processing.2.1"
+    ]